@@ -17,9 +17,19 @@ def create_app(deploy_env: str = ENV) -> Flask:
     CORS(app)
     app.config.from_object(f"starwars.config.{deploy_env}Config")
 
+    __register_url_converters(app)
     __register_blueprints(app)
+    __register_error_handlers(app)
     __configure_logger(app)
     __register_commands(app)
+    __configure_events(app)
+    __configure_monitoring(app)
+    __configure_persistency(app)
+    __configure_deadlines(app)
+    __configure_rate_limiting(app)
+    __configure_lanes(app)
+    __configure_jobs(app)
+    __configure_load_shedding(app)
 
     if app.testing:
         from mongomock import MongoClient
@@ -31,24 +41,46 @@ def create_app(deploy_env: str = ENV) -> Flask:
         from uwsgidecorators import postfork
     except ImportError:
         # If not using uwsgi, init mongo client normally
-        mongo_client.init_app(app)
+        mongo_client.init_app(app, **__mongo_client_options(app))
+        __start_jobs_on_first_request(app)
     else:
         # If using uwsgi, init mongo client after forking app to each process, to avoid deadlocks
         @postfork
         def post_fork_init_db():
-            mongo_client.init_app(app)
+            mongo_client.init_app(app, **__mongo_client_options(app))
+            __start_jobs()
 
     return app
 
 
+def __register_url_converters(app: Flask):
+    from starwars.presentation_layer.converters import ObjectIdConverter
+
+    app.url_map.converters["objectid"] = ObjectIdConverter
+
+
 def __register_blueprints(app: Flask):
+    from starwars.presentation_layer.views.admin import bp_admin
     from starwars.presentation_layer.views.index import bp_index
+    from starwars.presentation_layer.views.jobs import bp_jobs
     from starwars.presentation_layer.views.films import bp_films
     from starwars.presentation_layer.views.planets import bp_planets
+    from starwars.presentation_layer.views.stream import bp_stream
 
     app.register_blueprint(bp_index)
     app.register_blueprint(bp_films)
     app.register_blueprint(bp_planets)
+    app.register_blueprint(bp_stream)
+    app.register_blueprint(bp_admin)
+    app.register_blueprint(bp_jobs)
+
+
+def __register_error_handlers(app: Flask):
+    from werkzeug.exceptions import NotFound
+
+    from starwars.presentation_layer.errors import not_found_response
+
+    app.register_error_handler(NotFound, not_found_response)
 
 
 def __configure_logger(app: Flask):
@@ -58,8 +90,126 @@ def __configure_logger(app: Flask):
         logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
+def __configure_events(app: Flask):
+    from starwars.application_layer.events.broadcaster import broadcaster
+
+    broadcaster.init_app(app)
+
+
+def __configure_monitoring(app: Flask):
+    from starwars.application_layer.persistency.monitoring import (
+        add_db_stats_headers,
+        reset_db_stats,
+        slow_query_listener
+    )
+
+    slow_query_listener.init_app(app)
+    app.before_request(reset_db_stats)
+    app.after_request(add_db_stats_headers)
+
+
+def __configure_persistency(app: Flask):
+    from starwars.application_layer.persistency.consistency import consistency
+    from starwars.application_layer.persistency.circuit_breaker import database_breaker
+    from starwars.application_layer.persistency.durability import durability
+    from starwars.application_layer.persistency.item_cache import (
+        add_item_cache_headers,
+        item_cache
+    )
+    from starwars.application_layer.persistency.negative_cache import negative_cache
+    from starwars.application_layer.persistency.reference_ids import reference_ids
+    from starwars.application_layer.persistency.single_flight import single_flight
+    from starwars.application_layer.persistency.write_coalescing import write_coalescer
+
+    consistency.init_app(app)
+    durability.init_app(app)
+    negative_cache.init_app(app)
+    reference_ids.init_app(app)
+    single_flight.init_app(app)
+    write_coalescer.init_app(app)
+    database_breaker.init_app(app)
+    item_cache.init_app(app)
+    app.after_request(add_item_cache_headers)
+
+
+def __configure_deadlines(app: Flask):
+    from starwars.application_layer.persistency.deadlines import end_deadline, start_deadline
+
+    app.before_request(start_deadline)
+    app.teardown_request(end_deadline)
+
+
+def __configure_rate_limiting(app: Flask):
+    from starwars.presentation_layer.rate_limiting import rate_limiter
+
+    rate_limiter.init_app(app)
+
+
+def __configure_lanes(app: Flask):
+    from starwars.presentation_layer.lanes import lanes
+
+    lanes.init_app(app)
+
+
+def __configure_jobs(app: Flask):
+    import starwars.application_layer.jobs.handlers  # noqa: F401, registers the job handlers
+    from starwars.application_layer.jobs.runner import job_runner
+
+    job_runner.init_app(app)
+
+
+def __start_jobs():
+    from starwars.application_layer.jobs.runner import job_runner
+
+    # Threads don't survive the fork, each uwsgi process starts its own
+    job_runner.start()
+
+
+def __start_jobs_on_first_request(app: Flask):
+    from starwars.application_layer.jobs.runner import job_runner
+
+    # CLI commands (e.g. `flask run-worker`) build the app too but never serve
+    # requests, the workers only start in processes that do
+    app.before_request(job_runner.start_once)
+
+
+def __configure_load_shedding(app: Flask):
+    from starwars.presentation_layer.load_shedding import load_shedder
+
+    load_shedder.init_app(app)
+
+
+def __mongo_client_options(app: Flask) -> dict:
+    from starwars.application_layer.persistency.monitoring import (
+        pool_stats_listener,
+        request_stats_listener,
+        slow_query_listener
+    )
+    from starwars.config import MONGO_CLIENT_OPTIONS
+
+    options = {
+        option: app.config[setting]
+        for setting, option in MONGO_CLIENT_OPTIONS.items()
+        if app.config[setting] not in (None, "")
+    }
+    options["event_listeners"] = [
+        slow_query_listener, request_stats_listener, pool_stats_listener
+    ]
+
+    return options
+
+
 def __register_commands(app):
-    from starwars.commands import configure_collections, drop_collections
+    from starwars.commands import (
+        check_query_plans,
+        configure_collections,
+        drop_collections,
+        run_worker,
+        sync_indexes
+    )
 
     app.cli.command("drop-collections")(drop_collections)
     app.cli.command("configure-collections")(configure_collections)
+    app.cli.command("sync-indexes")(sync_indexes)
+    app.cli.command("check-query-plans")(check_query_plans)
+    app.cli.command("run-worker")(run_worker)
@@ -1,11 +1,21 @@
 import bson
+import heapq
 import logging
 
 from datetime import datetime, timezone
-from pymongo.errors import DuplicateKeyError
-from typing import List
+from itertools import islice
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from typing import Iterator, List, Optional
 
 from starwars.app import mongo_client
+from starwars.application_layer.events.broadcaster import broadcaster
+from starwars.application_layer.persistency.consistency import consistency
+from starwars.application_layer.persistency.durability import durability
+from starwars.application_layer.persistency.negative_cache import negative_cache
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.persistency.single_flight import single_flight
+from starwars.application_layer.persistency.write_coalescing import write_coalescer
 from starwars.domain_layer.ports.films import (
     DuplicatedFilm,
     FilmsService,
@@ -14,6 +24,8 @@ from starwars.domain_layer.ports.films import (
 
 logger = logging.getLogger("api-starwars." + __name__)
 
+DUPLICATE_KEY_ERROR = 11000
+
 
 class FilmsRepository(FilmsService):
 
@@ -36,26 +48,31 @@ class FilmsRepository(FilmsService):
             },
         )
 
+        document = {
+            "title": title,
+            "release_date": release_date,
+            "director": director,
+            "planets": planets,
+            "created": datetime.now(timezone.utc),
+            "edited": datetime.now(timezone.utc)
+        }
+
         try:
-            valid_planets = list(mongo_client.db.planets.find(
-                {"_id": {"$in": [bson.ObjectId(planet_id) for planet_id in planets]}}
-            ))
+            if write_coalescer.enabled:
+                inserted_id = cls._persist_coalesced(document)
+            else:
+                cls._validate_planets(planets)
 
-            if len(valid_planets) != len(planets):
-                raise InvalidFilm("One or more planets do not exist")
+                inserted_id = durability.writes(mongo_client.db.films).insert_one(
+                    document, session=consistency.session()
+                ).inserted_id
 
-            film = mongo_client.db.films.insert_one(
-                {
-                    "title": title,
-                    "release_date": release_date,
-                    "director": director,
-                    "planets": planets,
-                    "created": datetime.now(timezone.utc),
-                    "edited": datetime.now(timezone.utc)
-                }
-            )
+            negative_cache.discard("films", str(inserted_id))
+            reference_ids.add("films", [str(inserted_id)])
+
+            broadcaster.publish("created", "films", str(inserted_id))
 
-            return str(film.inserted_id)
+            return str(inserted_id)
         
         except DuplicateKeyError:
             raise DuplicatedFilm(f"Film with title {title} already exists")
@@ -105,16 +122,15 @@ class FilmsRepository(FilmsService):
         }
 
         try:
-            valid_planets = list(mongo_client.db.planets.find(
-                {"_id": {"$in": [bson.ObjectId(planet_id) for planet_id in planets]}}
-            ))
+            cls._validate_planets(planets)
 
-            if len(valid_planets) != len(planets):
-                raise InvalidFilm("One or more planets do not exist")
-
-            mongo_client.db.films.update_one(
-                {"_id": bson.ObjectId(id)}, {"$set": update_data}
+            result = durability.writes(mongo_client.db.films).update_one(
+                {"_id": bson.ObjectId(id)}, {"$set": update_data},
+                session=consistency.session()
             )
+
+            if result.matched_count:
+                broadcaster.publish("updated", "films", id)
         
         except DuplicateKeyError:
             raise DuplicatedFilm(f"Film with title {title} already exists")
@@ -136,7 +152,7 @@ class FilmsRepository(FilmsService):
             raise e
 
     @classmethod
-    def get_film_by_id(cls, id: str):
+    def get_film_by_id(cls, id: str, fields: Optional[List[str]] = None):
         logger.info(
             "Getting film",
             extra={
@@ -144,12 +160,23 @@ class FilmsRepository(FilmsService):
                     "service": "FilmsRepository",
                     "method": "get_film_by_id",
                     "id": id,
+                    "fields": fields,
                 }
             },
         )
 
+        if negative_cache.contains("films", id):
+            return None
+
         try:
-            result = mongo_client.db.films.find_one({"_id": bson.ObjectId(id)})
+            result = single_flight.do(
+                "films.get_film_by_id",
+                (id, tuple(fields or ())),
+                lambda: consistency.reads(mongo_client.db.films).find_one(
+                    {"_id": bson.ObjectId(id)}, cls._build_projection(fields),
+                    session=consistency.session()
+                )
+            )
 
         except bson.errors.InvalidId as e:
             logger.exception(
@@ -182,16 +209,461 @@ class FilmsRepository(FilmsService):
             raise e
         
         if not result:
+            negative_cache.add("films", id)
             return None
 
         cls._parse_id_field(result)
 
         return result
     
+    @classmethod
+    def get_films_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+        logger.info(
+            "Getting films by ids",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "get_films_by_ids",
+                    "ids": ids,
+                    "fields": fields,
+                }
+            },
+        )
+
+        # Invalid ids can never match a document, so they are reported as missing
+        object_ids = list({bson.ObjectId(id) for id in ids if bson.ObjectId.is_valid(id)})
+
+        if not object_ids:
+            return []
+
+        try:
+            result = single_flight.do(
+                "films.get_films_by_ids",
+                (tuple(sorted(object_ids)), tuple(fields or ())),
+                lambda: list(consistency.reads(mongo_client.db.films).find(
+                    {"_id": {"$in": object_ids}}, cls._build_projection(fields),
+                    session=consistency.session()
+                ))
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting films by ids",
+                extra={
+                    "props": {
+                        "service": "FilmsRepository",
+                        "method": "get_films_by_ids",
+                        "ids": ids,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        for document in result:
+            cls._parse_id_field(document)
+
+        return result
+
+    @classmethod
+    def get_film_by_title(cls, title: str, fields: Optional[List[str]] = None):
+        logger.info(
+            "Getting film by title",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "get_film_by_title",
+                    "title": title,
+                    "fields": fields,
+                }
+            },
+        )
+
+        try:
+            result = single_flight.do(
+                "films.get_film_by_title",
+                (title, tuple(fields or ())),
+                lambda: consistency.reads(mongo_client.db.films).find_one(
+                    {"title": title}, cls._build_projection(fields),
+                    session=consistency.session()
+                )
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting film by title",
+                extra={
+                    "props": {
+                        "service": "FilmsRepository",
+                        "method": "get_film_by_title",
+                        "title": title,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        if not result:
+            return None
+
+        cls._parse_id_field(result)
+
+        return result
+
+    @classmethod
+    def upsert_film_by_title(
+        cls,
+        title: str,
+        release_date: str,
+        director: str,
+        planets: List[str]
+    ):
+        logger.info(
+            "Upserting film",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "upsert_film_by_title",
+                    "title": title
+                }
+            },
+        )
+
+        now = datetime.now(timezone.utc)
+        new_id = bson.ObjectId()
+        update_data = {
+            "$set": {
+                "release_date": release_date,
+                "director": director,
+                "planets": planets,
+                "edited": now
+            },
+            # A client generated _id tells apart inserts from updates in the
+            # document returned by the write itself
+            "$setOnInsert": {"_id": new_id, "created": now}
+        }
+
+        try:
+            cls._validate_planets(planets)
+
+            try:
+                film = durability.writes(mongo_client.db.films).find_one_and_update(
+                    {"title": title}, update_data, upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=consistency.session()
+                )
+            except DuplicateKeyError:
+                # A concurrent upsert inserted the same title first, so this one
+                # now matches the existing document
+                film = durability.writes(mongo_client.db.films).find_one_and_update(
+                    {"title": title}, update_data, upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=consistency.session()
+                )
+
+            # Only an upsert stores the _id set on insert
+            created = film["_id"] == new_id
+            cls._parse_id_field(film)
+
+            if created:
+                negative_cache.discard("films", film["id"])
+                reference_ids.add("films", [film["id"]])
+                broadcaster.publish("created", "films", film["id"])
+            else:
+                broadcaster.publish("updated", "films", film["id"])
+
+            return film, created
+
+        except DuplicateKeyError:
+            raise DuplicatedFilm(f"Film with title {title} already exists")
+
+        except Exception as e:
+            logger.exception(
+                "Error upserting film",
+                extra={
+                    "props": {
+                        "service": "FilmsRepository",
+                        "method": "upsert_film_by_title",
+                        "title": title,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+    @classmethod
+    def import_films(cls, films: List[dict]) -> List:
+        """Creates a batch of films with one reference lookup and one insert_many,
+        under the import write concern. Returns, for each film, its id or its error"""
+
+        logger.info(
+            "Importing films",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "import_films",
+                    "count": len(films),
+                }
+            },
+        )
+
+        now = datetime.now(timezone.utc)
+        documents = [{**film, "created": now, "edited": now} for film in films]
+
+        try:
+            results = cls._insert_films(documents, operation="import")
+
+        except Exception as e:
+            logger.exception(
+                "Error importing films",
+                extra={
+                    "props": {
+                        "service": "FilmsRepository",
+                        "method": "import_films",
+                        "count": len(films),
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        imported = []
+
+        for document, result in zip(documents, results):
+            if isinstance(result, DuplicateKeyError):
+                imported.append(DuplicatedFilm(f"Film with title {document['title']} already exists"))
+            elif isinstance(result, Exception):
+                imported.append(result)
+            else:
+                inserted_id = str(result[0])
+                negative_cache.discard("films", inserted_id)
+                reference_ids.add("films", [inserted_id])
+                broadcaster.publish("created", "films", inserted_id)
+                imported.append(inserted_id)
+
+        return imported
+
+    @classmethod
+    def export_films(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[dict]:
+        """Iterates over every film in _id order, fetching batch_size documents per round trip"""
+
+        logger.info(
+            "Exporting films",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "export_films",
+                    "batch_size": batch_size,
+                    "fields": fields,
+                }
+            },
+        )
+
+        cursor = consistency.reads(mongo_client.db.films).find(
+            {}, cls._build_projection(fields),
+            session=consistency.session(),
+            batch_size=batch_size
+        ).sort("_id", 1)
+
+        for document in cursor:
+            cls._parse_id_field(document)
+
+            yield document
+
+    @classmethod
+    def get_films_changes(
+        cls,
+        since_edited: Optional[datetime],
+        since_id: Optional[str],
+        limit: int
+    ):
+        logger.info(
+            "Getting films changes",
+            extra={
+                "props": {
+                    "service": "FilmsRepository",
+                    "method": "get_films_changes",
+                    "since_edited": since_edited,
+                    "since_id": since_id,
+                    "limit": limit,
+                }
+            },
+        )
+
+        query = cls._build_changes_query(since_edited, since_id)
+        sort = [("edited", 1), ("_id", 1)]
+
+        try:
+            documents = list(
+                mongo_client.db.films.find(query, session=consistency.session())
+                .sort(sort)
+                .limit(limit)
+            )
+            tombstones = list(
+                mongo_client.db.films_tombstones.find(query, session=consistency.session())
+                .sort(sort)
+                .limit(limit)
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting films changes",
+                extra={
+                    "props": {
+                        "service": "FilmsRepository",
+                        "method": "get_films_changes",
+                        "since_edited": since_edited,
+                        "since_id": since_id,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        for tombstone in tombstones:
+            tombstone["deleted"] = True
+
+        # Both cursors are already sorted, so merging them keeps the feed order
+        changes = list(islice(
+            heapq.merge(
+                documents,
+                tombstones,
+                key=lambda document: (document["edited"], document["_id"])
+            ),
+            limit
+        ))
+
+        for document in changes:
+            cls._parse_id_field(document)
+
+        return changes
+
+    @staticmethod
+    def _build_changes_query(since_edited: Optional[datetime], since_id: Optional[str]) -> dict:
+        if since_edited is None:
+            return {}
+
+        return {
+            "$or": [
+                {"edited": {"$gt": since_edited}},
+                {"edited": since_edited, "_id": {"$gt": bson.ObjectId(since_id)}},
+            ]
+        }
+
+    @classmethod
+    def _persist_coalesced(cls, document: dict):
+        # Only creates sharing a write concern are flushed together
+        inserted_id, cluster_time, operation_time = write_coalescer.submit(
+            ("films", durability.profile()), document, cls._insert_films
+        )
+
+        # The batch ran in the session of its first writer, the consistency
+        # token of this request must still cover the write
+        session = consistency.session()
+        if session is not None and operation_time is not None:
+            session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+
+        return inserted_id
+
+    @classmethod
+    def _insert_films(cls, documents: List[dict], operation: str = "single") -> List:
+        """Flushes coalesced creates with one reference lookup and one insert_many.
+        Returns, for each document, its id with the session times or its error"""
+
+        referenced = {str(planet_id) for document in documents for planet_id in document["planets"]}
+        missing = reference_ids.missing("planets", referenced)
+        lookup = [bson.ObjectId(planet_id) for planet_id in missing if bson.ObjectId.is_valid(planet_id)]
+        found = {
+            str(planet["_id"])
+            for planet in mongo_client.db.planets.find(
+                {"_id": {"$in": lookup}},
+                {"_id": 1},
+                session=consistency.session()
+            )
+        } if lookup else set()
+        reference_ids.add("planets", found)
+        existing = referenced.difference(missing) | found
+
+        results = [
+            InvalidFilm("One or more planets do not exist")
+            if len(set(map(str, document["planets"]))) != len(document["planets"])
+            or set(map(str, document["planets"])) - existing else None
+            for document in documents
+        ]
+        valid = [index for index, result in enumerate(results) if result is None]
+        write_errors = {}
+
+        if valid:
+            try:
+                durability.writes(mongo_client.db.films, operation).insert_many(
+                    [documents[index] for index in valid], ordered=False, session=consistency.session()
+                )
+            except BulkWriteError as e:
+                write_errors = {error["index"]: error for error in e.details["writeErrors"]}
+
+        session = consistency.session()
+
+        for position, index in enumerate(valid):
+            error = write_errors.get(position)
+
+            if error is None:
+                results[index] = (
+                    documents[index]["_id"],
+                    session.cluster_time if session else None,
+                    session.operation_time if session else None
+                )
+            elif error["code"] == DUPLICATE_KEY_ERROR:
+                results[index] = DuplicateKeyError(error["errmsg"], error["code"], error)
+            else:
+                results[index] = WriteError(error["errmsg"], error["code"], error)
+
+        return results
+
+    @classmethod
+    def _validate_planets(cls, planets: List[str]):
+        if not planets:
+            return
+
+        # Repeated ids are rejected like missing ones, as the full lookup did
+        if len(set(planets)) != len(planets):
+            raise InvalidFilm("One or more planets do not exist")
+
+        # Only the ids not seen lately are looked up, through the _id index alone
+        missing = reference_ids.missing("planets", planets)
+
+        if not missing:
+            return
+
+        found = [
+            str(planet["_id"])
+            for planet in mongo_client.db.planets.find(
+                {"_id": {"$in": [bson.ObjectId(planet_id) for planet_id in missing]}},
+                {"_id": 1},
+                session=consistency.session()
+            )
+        ]
+        reference_ids.add("planets", found)
+
+        if len(found) != len(missing):
+            raise InvalidFilm("One or more planets do not exist")
+
     @staticmethod
     def _parse_id_field(document: dict):
         document["id"] = str(document.pop("_id"))
 
+    @staticmethod
+    def _build_projection(fields: Optional[List[str]]) -> Optional[dict]:
+        if not fields:
+            return None
+
+        return {"_id": 1, **{field: 1 for field in fields if field != "id"}}
+
     @classmethod
     def remove_film(cls, id: str):
         logger.info(
@@ -206,7 +678,24 @@ class FilmsRepository(FilmsService):
         )
 
         try:
-            mongo_client.db.films.delete_one({"_id": bson.ObjectId(id)})
+            result = durability.writes(mongo_client.db.films).delete_one(
+                {"_id": bson.ObjectId(id)}, session=consistency.session()
+            )
+
+            if result.deleted_count:
+                # Tombstones let change feed consumers find out about deletes
+                durability.writes(mongo_client.db.films_tombstones).update_one(
+                    {"_id": bson.ObjectId(id)},
+                    {"$set": {"edited": datetime.now(timezone.utc)}},
+                    upsert=True,
+                    session=consistency.session()
+                )
+
+                negative_cache.add("films", id)
+                reference_ids.discard("films", id)
+                broadcaster.publish("deleted", "films", id)
+
+            return bool(result.deleted_count)
 
         except Exception as e:
             logger.exception(
@@ -222,3 +711,28 @@ class FilmsRepository(FilmsService):
             )
 
             raise e
+
+    @classmethod
+    def remove_planet_references(cls, planet_id: str, limit: int) -> List[str]:
+        """Pulls a removed planet from up to limit films, returning their ids"""
+
+        ids = [
+            document["_id"]
+            for document in mongo_client.db.films.find(
+                {"planets": planet_id}, {"_id": 1}, limit=limit, session=consistency.session()
+            )
+        ]
+
+        if not ids:
+            return []
+
+        durability.writes(mongo_client.db.films, operation="bulk").update_many(
+            {"_id": {"$in": ids}},
+            {"$pull": {"planets": planet_id}, "$set": {"edited": datetime.now(timezone.utc)}},
+            session=consistency.session()
+        )
+
+        for id in ids:
+            broadcaster.publish("updated", "films", str(id))
+
+        return [str(id) for id in ids]
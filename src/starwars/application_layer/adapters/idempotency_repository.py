@@ -0,0 +1,78 @@
+import logging
+
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+
+from starwars.app import mongo_client
+from starwars.application_layer.persistency.consistency import consistency
+from starwars.application_layer.persistency.durability import durability
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+
+class IdempotencyRepository:
+
+    @classmethod
+    def reserve(cls, key: str, fingerprint: str, lock_seconds: float) -> Optional[dict]:
+        """Reserves the key for the request being served. Returns None when the
+        reservation succeeded, otherwise the record of the request holding it"""
+
+        now = datetime.now(timezone.utc)
+
+        try:
+            durability.writes(mongo_client.db.idempotency_keys).insert_one(
+                {"_id": key, "fingerprint": fingerprint, "created": now, "response": None},
+                session=consistency.session()
+            )
+            return None
+
+        except DuplicateKeyError:
+            pass
+
+        # A reservation left behind by a request that died before responding is taken over
+        abandoned = durability.writes(mongo_client.db.idempotency_keys).find_one_and_update(
+            {
+                "_id": key,
+                "fingerprint": fingerprint,
+                "response": None,
+                "created": {"$lt": now - timedelta(seconds=lock_seconds)},
+            },
+            {"$set": {"created": now}},
+            session=consistency.session()
+        )
+
+        if abandoned is not None:
+            logger.info(
+                "Taking over abandoned idempotency key",
+                extra={
+                    "props": {
+                        "service": "IdempotencyRepository",
+                        "method": "reserve",
+                        "key": key,
+                    }
+                },
+            )
+
+            return None
+
+        record = mongo_client.db.idempotency_keys.find_one(
+            {"_id": key}, session=consistency.session()
+        )
+
+        # The record expired in between, so the key is free again
+        return record if record is not None else cls.reserve(key, fingerprint, lock_seconds)
+
+    @classmethod
+    def complete(cls, key: str, status: int, body):
+        durability.writes(mongo_client.db.idempotency_keys).update_one(
+            {"_id": key},
+            {"$set": {"response": {"status": status, "body": body}}},
+            session=consistency.session()
+        )
+
+    @classmethod
+    def release(cls, key: str):
+        durability.writes(mongo_client.db.idempotency_keys).delete_one(
+            {"_id": key, "response": None}, session=consistency.session()
+        )
@@ -0,0 +1,156 @@
+import bson
+import logging
+
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, ReturnDocument
+from typing import Optional
+
+from starwars.app import mongo_client
+from starwars.application_layer.persistency.consistency import consistency
+from starwars.application_layer.persistency.durability import durability
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobsRepository:
+
+    @classmethod
+    def enqueue(cls, type: str, params: dict, max_attempts: int, delay_seconds: float = 0) -> str:
+        now = datetime.now(timezone.utc)
+
+        job = durability.writes(mongo_client.db.jobs).insert_one(
+            {
+                "type": type,
+                "params": params,
+                "status": QUEUED,
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "progress": None,
+                "result": None,
+                "error": None,
+                "run_after": now + timedelta(seconds=delay_seconds),
+                "created": now,
+                "updated": now
+            },
+            session=consistency.session()
+        )
+
+        logger.info(
+            "Job enqueued",
+            extra={
+                "props": {
+                    "service": "JobsRepository",
+                    "method": "enqueue",
+                    "id": str(job.inserted_id),
+                    "type": type,
+                }
+            },
+        )
+
+        return str(job.inserted_id)
+
+    @classmethod
+    def claim(cls, worker: str, lease_seconds: float) -> Optional[dict]:
+        """Leases the oldest runnable job to the worker. A running job whose lease
+        expired belongs to a worker that died and is claimed again, unless it
+        used all its attempts: it may be the one killing its workers, so it
+        fails for good instead"""
+
+        now = datetime.now(timezone.utc)
+        exhausted = {"$expr": {"$gte": ["$attempts", "$max_attempts"]}}
+
+        durability.writes(mongo_client.db.jobs).update_many(
+            {"status": RUNNING, "locked_until": {"$lt": now}, **exhausted},
+            {"$set": {"status": FAILED, "error": "Job lease expired", "updated": now, "finished": now}}
+        )
+
+        return durability.writes(mongo_client.db.jobs).find_one_and_update(
+            {
+                "$or": [
+                    {"status": QUEUED, "run_after": {"$lte": now}},
+                    {
+                        "status": RUNNING,
+                        "locked_until": {"$lt": now},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker": worker,
+                    "locked_until": now + timedelta(seconds=lease_seconds),
+                    "updated": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_after", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    def report_progress(cls, id: str, worker: str, progress: dict, lease_seconds: float) -> bool:
+        """Stores the progress and renews the lease, False when the lease was lost"""
+
+        now = datetime.now(timezone.utc)
+
+        result = durability.writes(mongo_client.db.jobs).update_one(
+            {"_id": bson.ObjectId(id), "status": RUNNING, "worker": worker},
+            {
+                "$set": {
+                    "progress": progress,
+                    "locked_until": now + timedelta(seconds=lease_seconds),
+                    "updated": now
+                }
+            }
+        )
+
+        return bool(result.matched_count)
+
+    @classmethod
+    def complete(cls, id: str, worker: str, result):
+        now = datetime.now(timezone.utc)
+
+        durability.writes(mongo_client.db.jobs).update_one(
+            {"_id": bson.ObjectId(id), "status": RUNNING, "worker": worker},
+            {"$set": {"status": SUCCEEDED, "result": result, "error": None, "updated": now, "finished": now}}
+        )
+
+    @classmethod
+    def fail(cls, id: str, worker: str, error: str, retry_after_seconds: Optional[float]):
+        """Queues the job again after the delay, or fails it for good without one"""
+
+        now = datetime.now(timezone.utc)
+
+        if retry_after_seconds is None:
+            update = {"status": FAILED, "error": error, "updated": now, "finished": now}
+        else:
+            update = {
+                "status": QUEUED,
+                "error": error,
+                "run_after": now + timedelta(seconds=retry_after_seconds),
+                "updated": now
+            }
+
+        durability.writes(mongo_client.db.jobs).update_one(
+            {"_id": bson.ObjectId(id), "status": RUNNING, "worker": worker},
+            {"$set": update}
+        )
+
+    @classmethod
+    def get_job(cls, id: str) -> Optional[dict]:
+        job = mongo_client.db.jobs.find_one(
+            {"_id": bson.ObjectId(id)},
+            {"worker": 0, "locked_until": 0},
+            session=consistency.session()
+        )
+
+        if job:
+            job["id"] = str(job.pop("_id"))
+
+        return job
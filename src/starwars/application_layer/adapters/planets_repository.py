@@ -1,11 +1,21 @@
 import bson
+import heapq
 import logging
 
 from datetime import datetime, timezone
-from pymongo.errors import DuplicateKeyError
-from typing import List
+from itertools import islice
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from typing import Iterator, List, Optional
 
 from starwars.app import mongo_client
+from starwars.application_layer.events.broadcaster import broadcaster
+from starwars.application_layer.persistency.consistency import consistency
+from starwars.application_layer.persistency.durability import durability
+from starwars.application_layer.persistency.negative_cache import negative_cache
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.persistency.single_flight import single_flight
+from starwars.application_layer.persistency.write_coalescing import write_coalescer
 from starwars.domain_layer.ports.planets import (
     DuplicatedPlanet,
     InvalidPlanet,
@@ -14,6 +24,8 @@ from starwars.domain_layer.ports.planets import (
 
 logger = logging.getLogger("api-starwars." + __name__)
 
+DUPLICATE_KEY_ERROR = 11000
+
 
 class PlanetsRepository(PlanetsService):
 
@@ -37,27 +49,32 @@ class PlanetsRepository(PlanetsService):
             },
         )
 
+        document = {
+            "name": name,
+            "climate": climate,
+            "diameter": diameter,
+            "population": population,
+            "films": films,
+            "created": datetime.now(timezone.utc),
+            "edited": datetime.now(timezone.utc)
+        }
+
         try:
-            valid_films = list(mongo_client.db.films.find(
-                {"_id": {"$in": [bson.ObjectId(film_id) for film_id in films]}}
-            ))
+            if write_coalescer.enabled:
+                inserted_id = cls._persist_coalesced(document)
+            else:
+                cls._validate_films(films)
 
-            if len(valid_films) != len(films):
-                raise InvalidPlanet("One or more films do not exist")
+                inserted_id = durability.writes(mongo_client.db.planets).insert_one(
+                    document, session=consistency.session()
+                ).inserted_id
 
-            planet = mongo_client.db.planets.insert_one(
-                {
-                    "name": name,
-                    "climate": climate,
-                    "diameter": diameter,
-                    "population": population,
-                    "films": films,
-                    "created": datetime.now(timezone.utc),
-                    "edited": datetime.now(timezone.utc)
-                }
-            )
+            negative_cache.discard("planets", str(inserted_id))
+            reference_ids.add("planets", [str(inserted_id)])
 
-            return str(planet.inserted_id)
+            broadcaster.publish("created", "planets", str(inserted_id))
+
+            return str(inserted_id)
         
         except DuplicateKeyError:
             raise DuplicatedPlanet(f"Planet with name {name} already exists")
@@ -109,17 +126,16 @@ class PlanetsRepository(PlanetsService):
         }
 
         try:
-            valid_films = list(mongo_client.db.films.find(
-                {"_id": {"$in": [bson.ObjectId(film_id) for film_id in films]}}
-            ))
-
-            if len(valid_films) != len(films):
-                raise InvalidPlanet("One or more films do not exist")
+            cls._validate_films(films)
 
-            mongo_client.db.planets.update_one(
-                {"_id": bson.ObjectId(id)}, {"$set": update_data}
+            result = durability.writes(mongo_client.db.planets).update_one(
+                {"_id": bson.ObjectId(id)}, {"$set": update_data},
+                session=consistency.session()
             )
 
+            if result.matched_count:
+                broadcaster.publish("updated", "planets", id)
+
         except DuplicateKeyError:
             raise DuplicatedPlanet(f"Planet with name {name} already exists")
 
@@ -140,7 +156,7 @@ class PlanetsRepository(PlanetsService):
             raise e
     
     @classmethod
-    def get_planet_by_id(cls, id: str):
+    def get_planet_by_id(cls, id: str, fields: Optional[List[str]] = None):
         logger.info(
             "Getting planet",
             extra={
@@ -148,12 +164,23 @@ class PlanetsRepository(PlanetsService):
                     "service": "PlanetsRepository",
                     "method": "get_planet_by_id",
                     "id": id,
+                    "fields": fields,
                 }
             },
         )
 
+        if negative_cache.contains("planets", id):
+            return None
+
         try:
-            result = mongo_client.db.planets.find_one({"_id": bson.ObjectId(id)})
+            result = single_flight.do(
+                "planets.get_planet_by_id",
+                (id, tuple(fields or ())),
+                lambda: consistency.reads(mongo_client.db.planets).find_one(
+                    {"_id": bson.ObjectId(id)}, cls._build_projection(fields),
+                    session=consistency.session()
+                )
+            )
 
         except bson.errors.InvalidId as e:
             logger.exception(
@@ -186,16 +213,463 @@ class PlanetsRepository(PlanetsService):
             raise e
         
         if not result:
+            negative_cache.add("planets", id)
             return None
 
         cls._parse_id_field(result)
 
         return result
     
+    @classmethod
+    def get_planets_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+        logger.info(
+            "Getting planets by ids",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "get_planets_by_ids",
+                    "ids": ids,
+                    "fields": fields,
+                }
+            },
+        )
+
+        # Invalid ids can never match a document, so they are reported as missing
+        object_ids = list({bson.ObjectId(id) for id in ids if bson.ObjectId.is_valid(id)})
+
+        if not object_ids:
+            return []
+
+        try:
+            result = single_flight.do(
+                "planets.get_planets_by_ids",
+                (tuple(sorted(object_ids)), tuple(fields or ())),
+                lambda: list(consistency.reads(mongo_client.db.planets).find(
+                    {"_id": {"$in": object_ids}}, cls._build_projection(fields),
+                    session=consistency.session()
+                ))
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting planets by ids",
+                extra={
+                    "props": {
+                        "service": "PlanetsRepository",
+                        "method": "get_planets_by_ids",
+                        "ids": ids,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        for document in result:
+            cls._parse_id_field(document)
+
+        return result
+
+    @classmethod
+    def get_planet_by_name(cls, name: str, fields: Optional[List[str]] = None):
+        logger.info(
+            "Getting planet by name",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "get_planet_by_name",
+                    "name": name,
+                    "fields": fields,
+                }
+            },
+        )
+
+        try:
+            result = single_flight.do(
+                "planets.get_planet_by_name",
+                (name, tuple(fields or ())),
+                lambda: consistency.reads(mongo_client.db.planets).find_one(
+                    {"name": name}, cls._build_projection(fields),
+                    session=consistency.session()
+                )
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting planet by name",
+                extra={
+                    "props": {
+                        "service": "PlanetsRepository",
+                        "method": "get_planet_by_name",
+                        "name": name,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        if not result:
+            return None
+
+        cls._parse_id_field(result)
+
+        return result
+
+    @classmethod
+    def upsert_planet_by_name(
+        cls,
+        name: str,
+        climate: str,
+        diameter: str,
+        population: str,
+        films: List[str]
+    ):
+        logger.info(
+            "Upserting planet",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "upsert_planet_by_name",
+                    "name": name
+                }
+            },
+        )
+
+        now = datetime.now(timezone.utc)
+        new_id = bson.ObjectId()
+        update_data = {
+            "$set": {
+                "climate": climate,
+                "diameter": diameter,
+                "population": population,
+                "films": films,
+                "edited": now
+            },
+            # A client generated _id tells apart inserts from updates in the
+            # document returned by the write itself
+            "$setOnInsert": {"_id": new_id, "created": now}
+        }
+
+        try:
+            cls._validate_films(films)
+
+            try:
+                planet = durability.writes(mongo_client.db.planets).find_one_and_update(
+                    {"name": name}, update_data, upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=consistency.session()
+                )
+            except DuplicateKeyError:
+                # A concurrent upsert inserted the same name first, so this one
+                # now matches the existing document
+                planet = durability.writes(mongo_client.db.planets).find_one_and_update(
+                    {"name": name}, update_data, upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=consistency.session()
+                )
+
+            # Only an upsert stores the _id set on insert
+            created = planet["_id"] == new_id
+            cls._parse_id_field(planet)
+
+            if created:
+                negative_cache.discard("planets", planet["id"])
+                reference_ids.add("planets", [planet["id"]])
+                broadcaster.publish("created", "planets", planet["id"])
+            else:
+                broadcaster.publish("updated", "planets", planet["id"])
+
+            return planet, created
+
+        except DuplicateKeyError:
+            raise DuplicatedPlanet(f"Planet with name {name} already exists")
+
+        except Exception as e:
+            logger.exception(
+                "Error upserting planet",
+                extra={
+                    "props": {
+                        "service": "PlanetsRepository",
+                        "method": "upsert_planet_by_name",
+                        "name": name,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+    @classmethod
+    def import_planets(cls, planets: List[dict]) -> List:
+        """Creates a batch of planets with one reference lookup and one insert_many,
+        under the import write concern. Returns, for each planet, its id or its error"""
+
+        logger.info(
+            "Importing planets",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "import_planets",
+                    "count": len(planets),
+                }
+            },
+        )
+
+        now = datetime.now(timezone.utc)
+        documents = [{**planet, "created": now, "edited": now} for planet in planets]
+
+        try:
+            results = cls._insert_planets(documents, operation="import")
+
+        except Exception as e:
+            logger.exception(
+                "Error importing planets",
+                extra={
+                    "props": {
+                        "service": "PlanetsRepository",
+                        "method": "import_planets",
+                        "count": len(planets),
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        imported = []
+
+        for document, result in zip(documents, results):
+            if isinstance(result, DuplicateKeyError):
+                imported.append(DuplicatedPlanet(f"Planet with name {document['name']} already exists"))
+            elif isinstance(result, Exception):
+                imported.append(result)
+            else:
+                inserted_id = str(result[0])
+                negative_cache.discard("planets", inserted_id)
+                reference_ids.add("planets", [inserted_id])
+                broadcaster.publish("created", "planets", inserted_id)
+                imported.append(inserted_id)
+
+        return imported
+
+    @classmethod
+    def export_planets(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[dict]:
+        """Iterates over every planet in _id order, fetching batch_size documents per round trip"""
+
+        logger.info(
+            "Exporting planets",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "export_planets",
+                    "batch_size": batch_size,
+                    "fields": fields,
+                }
+            },
+        )
+
+        cursor = consistency.reads(mongo_client.db.planets).find(
+            {}, cls._build_projection(fields),
+            session=consistency.session(),
+            batch_size=batch_size
+        ).sort("_id", 1)
+
+        for document in cursor:
+            cls._parse_id_field(document)
+
+            yield document
+
+    @classmethod
+    def get_planets_changes(
+        cls,
+        since_edited: Optional[datetime],
+        since_id: Optional[str],
+        limit: int
+    ):
+        logger.info(
+            "Getting planets changes",
+            extra={
+                "props": {
+                    "service": "PlanetsRepository",
+                    "method": "get_planets_changes",
+                    "since_edited": since_edited,
+                    "since_id": since_id,
+                    "limit": limit,
+                }
+            },
+        )
+
+        query = cls._build_changes_query(since_edited, since_id)
+        sort = [("edited", 1), ("_id", 1)]
+
+        try:
+            documents = list(
+                mongo_client.db.planets.find(query, session=consistency.session())
+                .sort(sort)
+                .limit(limit)
+            )
+            tombstones = list(
+                mongo_client.db.planets_tombstones.find(query, session=consistency.session())
+                .sort(sort)
+                .limit(limit)
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Error getting planets changes",
+                extra={
+                    "props": {
+                        "service": "PlanetsRepository",
+                        "method": "get_planets_changes",
+                        "since_edited": since_edited,
+                        "since_id": since_id,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+        for tombstone in tombstones:
+            tombstone["deleted"] = True
+
+        # Both cursors are already sorted, so merging them keeps the feed order
+        changes = list(islice(
+            heapq.merge(
+                documents,
+                tombstones,
+                key=lambda document: (document["edited"], document["_id"])
+            ),
+            limit
+        ))
+
+        for document in changes:
+            cls._parse_id_field(document)
+
+        return changes
+
+    @staticmethod
+    def _build_changes_query(since_edited: Optional[datetime], since_id: Optional[str]) -> dict:
+        if since_edited is None:
+            return {}
+
+        return {
+            "$or": [
+                {"edited": {"$gt": since_edited}},
+                {"edited": since_edited, "_id": {"$gt": bson.ObjectId(since_id)}},
+            ]
+        }
+
+    @classmethod
+    def _persist_coalesced(cls, document: dict):
+        # Only creates sharing a write concern are flushed together
+        inserted_id, cluster_time, operation_time = write_coalescer.submit(
+            ("planets", durability.profile()), document, cls._insert_planets
+        )
+
+        # The batch ran in the session of its first writer, the consistency
+        # token of this request must still cover the write
+        session = consistency.session()
+        if session is not None and operation_time is not None:
+            session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+
+        return inserted_id
+
+    @classmethod
+    def _insert_planets(cls, documents: List[dict], operation: str = "single") -> List:
+        """Flushes coalesced creates with one reference lookup and one insert_many.
+        Returns, for each document, its id with the session times or its error"""
+
+        referenced = {str(film_id) for document in documents for film_id in document["films"]}
+        missing = reference_ids.missing("films", referenced)
+        lookup = [bson.ObjectId(film_id) for film_id in missing if bson.ObjectId.is_valid(film_id)]
+        found = {
+            str(film["_id"])
+            for film in mongo_client.db.films.find(
+                {"_id": {"$in": lookup}},
+                {"_id": 1},
+                session=consistency.session()
+            )
+        } if lookup else set()
+        reference_ids.add("films", found)
+        existing = referenced.difference(missing) | found
+
+        results = [
+            InvalidPlanet("One or more films do not exist")
+            if len(set(map(str, document["films"]))) != len(document["films"])
+            or set(map(str, document["films"])) - existing else None
+            for document in documents
+        ]
+        valid = [index for index, result in enumerate(results) if result is None]
+        write_errors = {}
+
+        if valid:
+            try:
+                durability.writes(mongo_client.db.planets, operation).insert_many(
+                    [documents[index] for index in valid], ordered=False, session=consistency.session()
+                )
+            except BulkWriteError as e:
+                write_errors = {error["index"]: error for error in e.details["writeErrors"]}
+
+        session = consistency.session()
+
+        for position, index in enumerate(valid):
+            error = write_errors.get(position)
+
+            if error is None:
+                results[index] = (
+                    documents[index]["_id"],
+                    session.cluster_time if session else None,
+                    session.operation_time if session else None
+                )
+            elif error["code"] == DUPLICATE_KEY_ERROR:
+                results[index] = DuplicateKeyError(error["errmsg"], error["code"], error)
+            else:
+                results[index] = WriteError(error["errmsg"], error["code"], error)
+
+        return results
+
+    @classmethod
+    def _validate_films(cls, films: List[str]):
+        if not films:
+            return
+
+        # Repeated ids are rejected like missing ones, as the full lookup did
+        if len(set(films)) != len(films):
+            raise InvalidPlanet("One or more films do not exist")
+
+        # Only the ids not seen lately are looked up, through the _id index alone
+        missing = reference_ids.missing("films", films)
+
+        if not missing:
+            return
+
+        found = [
+            str(film["_id"])
+            for film in mongo_client.db.films.find(
+                {"_id": {"$in": [bson.ObjectId(film_id) for film_id in missing]}},
+                {"_id": 1},
+                session=consistency.session()
+            )
+        ]
+        reference_ids.add("films", found)
+
+        if len(found) != len(missing):
+            raise InvalidPlanet("One or more films do not exist")
+
     @staticmethod
     def _parse_id_field(document: dict):
         document["id"] = str(document.pop("_id"))
 
+    @staticmethod
+    def _build_projection(fields: Optional[List[str]]) -> Optional[dict]:
+        if not fields:
+            return None
+
+        return {"_id": 1, **{field: 1 for field in fields if field != "id"}}
+
     @classmethod
     def remove_planet(cls, id: str):
         logger.info(
@@ -210,7 +684,24 @@ class PlanetsRepository(PlanetsService):
         )
 
         try:
-            mongo_client.db.planets.delete_one({"_id": bson.ObjectId(id)})
+            result = durability.writes(mongo_client.db.planets).delete_one(
+                {"_id": bson.ObjectId(id)}, session=consistency.session()
+            )
+
+            if result.deleted_count:
+                # Tombstones let change feed consumers find out about deletes
+                durability.writes(mongo_client.db.planets_tombstones).update_one(
+                    {"_id": bson.ObjectId(id)},
+                    {"$set": {"edited": datetime.now(timezone.utc)}},
+                    upsert=True,
+                    session=consistency.session()
+                )
+
+                negative_cache.add("planets", id)
+                reference_ids.discard("planets", id)
+                broadcaster.publish("deleted", "planets", id)
+
+            return bool(result.deleted_count)
 
         except Exception as e:
             logger.exception(
@@ -226,3 +717,28 @@ class PlanetsRepository(PlanetsService):
             )
 
             raise e
+
+    @classmethod
+    def remove_film_references(cls, film_id: str, limit: int) -> List[str]:
+        """Pulls a removed film from up to limit planets, returning their ids"""
+
+        ids = [
+            document["_id"]
+            for document in mongo_client.db.planets.find(
+                {"films": film_id}, {"_id": 1}, limit=limit, session=consistency.session()
+            )
+        ]
+
+        if not ids:
+            return []
+
+        durability.writes(mongo_client.db.planets, operation="bulk").update_many(
+            {"_id": {"$in": ids}},
+            {"$pull": {"films": film_id}, "$set": {"edited": datetime.now(timezone.utc)}},
+            session=consistency.session()
+        )
+
+        for id in ids:
+            broadcaster.publish("updated", "planets", str(id))
+
+        return [str(id) for id in ids]
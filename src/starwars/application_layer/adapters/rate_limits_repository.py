@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+
+from starwars.app import mongo_client
+from starwars.application_layer.persistency.durability import WRITE_CONCERN_PROFILES
+
+
+class RateLimitsRepository:
+
+    @classmethod
+    def take(cls, key: str, capacity: int, refill_per_second: float, now: float) -> tuple:
+        """Refills the token bucket for the time elapsed since its last use and
+        takes one token from it in a single atomic update, so every uwsgi process
+        shares the same bucket. Returns whether a token was taken and the tokens left"""
+
+        # The collection validator wants doubles, and an int capacity would win
+        # $min on a new or full bucket
+        capacity = float(capacity)
+        refill_per_second = float(refill_per_second)
+        now = float(now)
+
+        tokens = {"$ifNull": ["$tokens", capacity]}
+        elapsed = {"$max": [0.0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}
+
+        bucket = mongo_client.db.rate_limits.with_options(
+            write_concern=WRITE_CONCERN_PROFILES["fast"]
+        ).find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [capacity, {"$add": [tokens, {"$multiply": [elapsed, refill_per_second]}]}]},
+                    "updated": now,
+                    # A bucket left alone until then is full again, same as a missing one
+                    "expires": datetime.fromtimestamp(now + capacity / refill_per_second, timezone.utc),
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1.0]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        return bucket["allowed"], bucket["tokens"]
@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+
+from datetime import datetime, timezone
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from typing import Optional
+
+from starwars.app import mongo_client
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+
+class Subscription:
+    def __init__(self, max_queued_events: int):
+        self.closed = False
+        self._queue = queue.Queue(maxsize=max_queued_events)
+
+    def put(self, event: dict) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return False
+
+        return True
+
+    def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster:
+    """Fans out write events to every subscriber connected to this process"""
+
+    def __init__(self):
+        self.max_queued_events = 100
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._relay = None
+
+    def init_app(self, app):
+        self.max_queued_events = app.config["EVENTS_MAX_QUEUED"]
+
+        if app.config["EVENTS_RELAY"] == "mongo":
+            self._relay = MongoEventRelay(
+                broadcaster=self,
+                collection_name=app.config["EVENTS_COLLECTION"],
+                size=app.config["EVENTS_COLLECTION_SIZE"]
+            )
+        else:
+            self._relay = None
+
+    @property
+    def subscribers_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queued_events)
+
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+        if self._relay:
+            self._relay.start()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, resource: str, id: str):
+        event = {
+            "type": event_type,
+            "resource": resource,
+            "id": id,
+            "published": datetime.now(timezone.utc).isoformat()
+        }
+
+        # A failure to notify must never fail the write that produced the event
+        try:
+            if self._relay:
+                self._relay.publish(event)
+            else:
+                self.deliver(event)
+
+        except Exception as e:
+            logger.exception(
+                "Error publishing event",
+                extra={
+                    "props": {
+                        "service": "Broadcaster",
+                        "method": "publish",
+                        "event": event,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+    def deliver(self, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if not subscription.put(event):
+                # Slow consumers are disconnected instead of buffering without bound
+                subscription.closed = True
+                self.unsubscribe(subscription)
+
+
+class MongoEventRelay:
+    """Relays events through a capped collection so subscribers connected to
+    any uwsgi process receive the writes served by every other process"""
+
+    def __init__(self, broadcaster: Broadcaster, collection_name: str, size: int):
+        self.collection_name = collection_name
+        self.size = size
+        self._broadcaster = broadcaster
+        self._lock = threading.Lock()
+        self._thread = None
+        self._collection_ready = False
+
+    def publish(self, event: dict):
+        # Inserting first would create a regular collection that grows without
+        # bound and can't be tailed
+        self._ensure_collection()
+
+        mongo_client.db[self.collection_name].insert_one(dict(event))
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._thread = threading.Thread(
+                target=self._tail, name="events-relay", daemon=True
+            )
+            self._thread.start()
+
+    def _ensure_collection(self):
+        if self._collection_ready:
+            return
+
+        try:
+            mongo_client.db.create_collection(
+                self.collection_name, capped=True, size=self.size
+            )
+        except CollectionInvalid:
+            if not mongo_client.db[self.collection_name].options().get("capped"):
+                logger.warning(
+                    "Events collection is not capped, converting it",
+                    extra={
+                        "props": {
+                            "service": "MongoEventRelay",
+                            "method": "_ensure_collection",
+                            "collection": self.collection_name,
+                        }
+                    },
+                )
+
+                mongo_client.db.command(
+                    "convertToCapped", self.collection_name, size=self.size
+                )
+
+        self._collection_ready = True
+
+    def _tail(self):
+        self._ensure_collection()
+
+        collection = mongo_client.db[self.collection_name]
+        newest = collection.find_one(sort=[("$natural", -1)])
+        last_id = newest["_id"] if newest else None
+
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id else {}
+
+            try:
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+
+                while cursor.alive:
+                    for document in cursor:
+                        last_id = document.pop("_id")
+                        self._broadcaster.deliver(document)
+
+            except Exception as e:
+                logger.exception(
+                    "Error tailing events collection",
+                    extra={
+                        "props": {
+                            "service": "MongoEventRelay",
+                            "method": "_tail",
+                            "error_message": str(e),
+                        }
+                    },
+                )
+
+            # Tailable cursors die on an empty collection, so wait before retrying
+            time.sleep(1)
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,24 @@
+from flask import current_app
+
+from starwars.application_layer.jobs.runner import job_runner
+from starwars.application_layer.use_cases.films import FilmsUseCase
+from starwars.application_layer.use_cases.jobs import REMOVE_FILM_REFERENCES, REMOVE_PLANET_REFERENCES
+from starwars.application_layer.use_cases.planets import PlanetsUseCase
+
+
+@job_runner.handler(REMOVE_PLANET_REFERENCES)
+def remove_planet_references(params: dict, progress):
+    return FilmsUseCase.remove_planet_references(
+        planet_id=params["planet_id"],
+        batch_size=current_app.config["JOBS_BATCH_SIZE"],
+        progress=progress
+    )
+
+
+@job_runner.handler(REMOVE_FILM_REFERENCES)
+def remove_film_references(params: dict, progress):
+    return PlanetsUseCase.remove_film_references(
+        film_id=params["film_id"],
+        batch_size=current_app.config["JOBS_BATCH_SIZE"],
+        progress=progress
+    )
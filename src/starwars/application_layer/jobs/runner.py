@@ -0,0 +1,163 @@
+import logging
+import os
+import socket
+import threading
+
+from typing import Callable, Optional
+
+from starwars.application_layer.adapters.jobs_repository import JobsRepository
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+
+class JobLeaseLost(Exception):
+    pass
+
+
+def worker_name(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class JobRunner:
+    """Runs the jobs stored in the jobs collection on a pool of threads, inside
+    the uwsgi processes or in a `flask run-worker` process. Claimed jobs are
+    leased, the ones held by a worker that died run again once it expires"""
+
+    def __init__(self):
+        self.threads = 0
+        self.poll_seconds = 1.0
+        self.lease_seconds = 60.0
+        self.max_attempts = 5
+        self.retry_delay_seconds = 5.0
+        self.handlers = {}
+        self._app = None
+        self._stop = threading.Event()
+        self._workers = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.threads = app.config["JOBS_WORKER_THREADS"]
+        self.poll_seconds = app.config["JOBS_POLL_SECONDS"]
+        self.lease_seconds = app.config["JOBS_LEASE_SECONDS"]
+        self.max_attempts = app.config["JOBS_MAX_ATTEMPTS"]
+        self.retry_delay_seconds = app.config["JOBS_RETRY_DELAY_SECONDS"]
+        self._app = app
+        self._started = False
+
+    def handler(self, type: str):
+        """Registers the function running the jobs of a type. It is called with
+        the job params and a progress(**progress) callback, its return value is
+        stored as the job result"""
+
+        def decorator(fn: Callable):
+            self.handlers[type] = fn
+            return fn
+
+        return decorator
+
+    def start(self, threads: Optional[int] = None):
+        self._stop.clear()
+
+        for index in range(self.threads if threads is None else threads):
+            worker = threading.Thread(
+                target=self._work, args=(worker_name(index),), name=f"jobs-{index}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def start_once(self):
+        """Starts the workers the first time it is called in a process, for
+        servers without a post fork hook that are only known to serve requests
+        once the first one comes in"""
+
+        if self._started:
+            return
+
+        with self._lock:
+            if not self._started:
+                self._started = True
+                self.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._started = False
+
+        for worker in self._workers:
+            worker.join(timeout)
+
+        self._workers = []
+
+    def _work(self, worker: str):
+        while not self._stop.is_set():
+            try:
+                with self._app.app_context():
+                    ran = self.run_once(worker)
+
+            except Exception as e:
+                logger.exception(
+                    "Error running jobs",
+                    extra={
+                        "props": {
+                            "service": "JobRunner",
+                            "method": "_work",
+                            "worker": worker,
+                            "error_message": str(e),
+                        }
+                    },
+                )
+                ran = False
+
+            # Keeps draining the queue while there is work, polls once it's empty
+            if not ran:
+                self._stop.wait(self.poll_seconds)
+
+    def run_once(self, worker: str) -> bool:
+        """Runs the next runnable job, returns False when there was none"""
+
+        job = JobsRepository.claim(worker, self.lease_seconds)
+
+        if job is None:
+            return False
+
+        id = str(job["_id"])
+        props = {"service": "JobRunner", "method": "run_once", "id": id, "type": job["type"], "attempt": job["attempts"]}
+        handler = self.handlers.get(job["type"])
+
+        if handler is None:
+            JobsRepository.fail(id, worker, f"Unknown job type {job['type']}", retry_after_seconds=None)
+            return True
+
+        def progress(**progress):
+            if not JobsRepository.report_progress(id, worker, progress, self.lease_seconds):
+                raise JobLeaseLost(f"Job {id} was claimed by another worker")
+
+        logger.info("Running job", extra={"props": props})
+
+        try:
+            result = handler(job["params"], progress)
+
+        except JobLeaseLost as e:
+            logger.warning("Job lease lost", extra={"props": {**props, "error_message": str(e)}})
+            return True
+
+        except Exception as e:
+            retry_after_seconds = None
+            if job["attempts"] < job["max_attempts"]:
+                retry_after_seconds = self.retry_delay_seconds * 2 ** (job["attempts"] - 1)
+
+            logger.exception(
+                "Error running job",
+                extra={"props": {**props, "retry_after_seconds": retry_after_seconds, "error_message": str(e)}},
+            )
+
+            JobsRepository.fail(id, worker, str(e), retry_after_seconds=retry_after_seconds)
+            return True
+
+        JobsRepository.complete(id, worker, result)
+        logger.info("Job succeeded", extra={"props": props})
+
+        return True
+
+
+job_runner = JobRunner()
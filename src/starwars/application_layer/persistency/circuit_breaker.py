@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Database unavailable, try again later")
+        self.retry_after = retry_after
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Failures of the database itself, as opposed to errors of the request"""
+
+    return isinstance(error, ConnectionFailure) or (
+        isinstance(error, PyMongoError) and error.timeout
+    )
+
+
+class CircuitBreaker:
+    """Stops sending calls to the database after consecutive failures and lets
+    a single trial call through once the reset timeout has elapsed"""
+
+    def __init__(self):
+        self.failure_threshold = 5
+        self.reset_seconds = 10.0
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.failure_threshold = app.config["CIRCUIT_FAILURE_THRESHOLD"]
+        self.reset_seconds = app.config["CIRCUIT_RESET_SECONDS"]
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(self.reset_seconds - (time.monotonic() - self._opened_at), 0)
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Database circuit closed", extra={"props": {"service": "CircuitBreaker"}})
+
+            self.state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """Ends a call that failed for reasons unrelated to the database"""
+
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(
+                        "Database circuit opened",
+                        extra={"props": {"service": "CircuitBreaker", "failures": self._failures}},
+                    )
+
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+database_breaker = CircuitBreaker()
@@ -1,13 +1,70 @@
-from typing import NamedTuple, Sequence, Union
+from pymongo import ASCENDING, IndexModel
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+
+class Index(NamedTuple):
+    keys: Union[
+        str, Sequence[tuple]
+    ]  # A sequence will be interpreted as one compound index
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: Optional[int] = None  # TTL index
+    partial_filter_expression: Optional[dict] = None
+    collation: Optional[dict] = None
+    weights: Optional[dict] = None  # Only for text indexes
+    name: Optional[str] = None  # Defaults to the name MongoDB would generate
+
+    @property
+    def key_list(self) -> List[tuple]:
+        if isinstance(self.keys, str):
+            return [(self.keys, ASCENDING)]
+
+        return list(self.keys)
+
+    @property
+    def index_name(self) -> str:
+        if self.name:
+            return self.name
+
+        return "_".join(f"{field}_{direction}" for field, direction in self.key_list)
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == "text" for _, direction in self.key_list)
+
+    @property
+    def options(self) -> dict:
+        options = {
+            "unique": self.unique or None,
+            "sparse": self.sparse or None,
+            "expireAfterSeconds": self.expire_after_seconds,
+            "partialFilterExpression": self.partial_filter_expression,
+            "collation": self.collation,
+            "weights": self.weights,
+        }
+
+        return {option: value for option, value in options.items() if value is not None}
+
+    def as_model(self) -> IndexModel:
+        return IndexModel(self.key_list, name=self.index_name, **self.options)
 
 
 class Collection(NamedTuple):
     name: str
     validator: dict
-    index: Union[
-        str, Sequence[tuple]
-    ]  # A sequence will be interpreted as one compound index
-    unique_index: bool
+    indexes: Sequence[Index] = ()
+
+
+# Serves the incremental change feeds, ordered by edited with _id as tie-breaker
+CHANGES_INDEX = Index([("edited", ASCENDING), ("_id", ASCENDING)])
+
+# Change feed consumers that stay away for longer than this must resync fully
+TOMBSTONES_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Clients retrying a POST after this long get it processed again
+IDEMPOTENCY_KEYS_TTL_SECONDS = 24 * 60 * 60
+# Finished jobs are kept for their status to be queried
+JOBS_TTL_SECONDS = 7 * 24 * 60 * 60
 
 
 collections_definitions = [
@@ -30,8 +87,12 @@ collections_definitions = [
                 }
             }
         },
-        index="name",
-        unique_index=True,
+        indexes=[
+            Index("name", unique=True),
+            CHANGES_INDEX,
+            # Finds the planets to clean up when a film is removed
+            Index("films"),
+        ],
     ),
     Collection(
         "films",
@@ -51,7 +112,90 @@ collections_definitions = [
                 }
             }
         },
-        index="title",
-        unique_index=True,
+        indexes=[
+            Index("title", unique=True),
+            CHANGES_INDEX,
+            # Finds the films to clean up when a planet is removed
+            Index("planets"),
+        ],
+    ),
+    Collection(
+        "planets_tombstones",
+        validator= {
+            "bsonType": "object",
+            "required": ["edited"],
+            "properties": {
+                "edited": { "bsonType": "date" }
+            }
+        },
+        indexes=[
+            CHANGES_INDEX,
+            Index("edited", expire_after_seconds=TOMBSTONES_TTL_SECONDS),
+        ],
+    ),
+    Collection(
+        "films_tombstones",
+        validator= {
+            "bsonType": "object",
+            "required": ["edited"],
+            "properties": {
+                "edited": { "bsonType": "date" }
+            }
+        },
+        indexes=[
+            CHANGES_INDEX,
+            Index("edited", expire_after_seconds=TOMBSTONES_TTL_SECONDS),
+        ],
+    ),
+    Collection(
+        "idempotency_keys",
+        validator= {
+            "bsonType": "object",
+            "required": ["fingerprint", "created"],
+            "properties": {
+                "fingerprint": { "bsonType": "string" },
+                "created": { "bsonType": "date" },
+                "response": { "bsonType": ["object", "null"] }
+            }
+        },
+        indexes=[
+            Index("created", expire_after_seconds=IDEMPOTENCY_KEYS_TTL_SECONDS),
+        ],
+    ),
+    Collection(
+        "rate_limits",
+        validator= {
+            "bsonType": "object",
+            "required": ["tokens", "updated", "expires"],
+            "properties": {
+                "tokens": { "bsonType": "double" },
+                "updated": { "bsonType": "double" },
+                "expires": { "bsonType": "date" }
+            }
+        },
+        indexes=[
+            # Removed once refilled, a missing bucket is a full one
+            Index("expires", expire_after_seconds=0),
+        ],
+    ),
+    Collection(
+        "jobs",
+        validator= {
+            "bsonType": "object",
+            "required": ["type", "status", "attempts", "run_after", "created"],
+            "properties": {
+                "type": { "bsonType": "string" },
+                "status": { "enum": ["queued", "running", "succeeded", "failed"] },
+                "attempts": { "bsonType": "int" },
+                "run_after": { "bsonType": "date" },
+                "created": { "bsonType": "date" }
+            }
+        },
+        indexes=[
+            Index([("status", ASCENDING), ("run_after", ASCENDING)]),
+            Index([("status", ASCENDING), ("locked_until", ASCENDING)]),
+            # Only finished jobs have the field, the others are never expired
+            Index("finished", expire_after_seconds=JOBS_TTL_SECONDS),
+        ],
     )
-]
\ No newline at end of file
+]
@@ -0,0 +1,125 @@
+import base64
+import binascii
+
+import bson
+
+from flask import g, has_request_context, request
+from pymongo import read_preferences
+from pymongo.client_session import ClientSession
+from pymongo.collection import Collection
+from typing import Optional
+
+from starwars.app import mongo_client
+
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+
+class InvalidConsistencyToken(Exception):
+    pass
+
+
+def encode_token(cluster_time: dict, operation_time) -> str:
+    payload = bson.encode({"clusterTime": cluster_time, "operationTime": operation_time})
+
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_token(token: str) -> tuple:
+    try:
+        payload = bson.decode(base64.urlsafe_b64decode(token.encode()))
+
+        return payload["clusterTime"], payload["operationTime"]
+
+    except (binascii.Error, bson.errors.BSONError, ValueError, KeyError):
+        raise InvalidConsistencyToken(f"{token} is not a valid consistency token.")
+
+
+def build_read_preference(mode: str, max_staleness_seconds: int):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {mode}")
+
+    if mode == "primary":
+        return read_preferences.Primary()
+
+    return READ_PREFERENCES[mode](max_staleness=max_staleness_seconds)
+
+
+class ReadRouting:
+    """Routes reads by the configured read preference and ties the commands of
+    a request to a causally consistent session, so a client reading from a
+    secondary after sending back its consistency token still sees its writes"""
+
+    def __init__(self):
+        self.read_preference = read_preferences.Primary()
+        self.causal_consistency = False
+
+    def init_app(self, app):
+        self.read_preference = build_read_preference(
+            app.config["READ_PREFERENCE"], app.config["READ_MAX_STALENESS_SECONDS"]
+        )
+        self.causal_consistency = app.config["CAUSAL_CONSISTENCY"]
+
+        if self.causal_consistency:
+            app.before_request(self._read_token)
+            app.after_request(self._write_token)
+            app.teardown_request(self._end_session)
+
+    def reads(self, collection: Collection) -> Collection:
+        return collection.with_options(read_preference=self.read_preference)
+
+    def session(self) -> Optional[ClientSession]:
+        if not self.causal_consistency or not has_request_context():
+            return None
+
+        # Started on first use, requests that never reach Mongo don't pay for it
+        if "db_session" not in g:
+            session = mongo_client.cx.start_session(causal_consistency=True)
+
+            if g.get("consistency_token"):
+                cluster_time, operation_time = g.consistency_token
+                session.advance_cluster_time(cluster_time)
+                session.advance_operation_time(operation_time)
+
+            g.db_session = session
+
+        return g.db_session
+
+    @staticmethod
+    def _read_token():
+        token = request.headers.get(CONSISTENCY_TOKEN_HEADER)
+        g.consistency_token = None
+
+        if token:
+            try:
+                g.consistency_token = decode_token(token)
+            except InvalidConsistencyToken as e:
+                return {"message": str(e)}, 400
+
+    @staticmethod
+    def _write_token(response):
+        session = g.get("db_session")
+
+        if session is not None and session.operation_time is not None:
+            response.headers[CONSISTENCY_TOKEN_HEADER] = encode_token(
+                session.cluster_time, session.operation_time
+            )
+
+        return response
+
+    @staticmethod
+    def _end_session(exception=None):
+        session = g.pop("db_session", None)
+
+        if session is not None:
+            session.end_session()
+
+
+consistency = ReadRouting()
@@ -0,0 +1,70 @@
+import contextlib
+import pymongo
+
+from flask import current_app, g, request
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError, WaitQueueTimeoutError
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+
+class InvalidRequestTimeout(Exception):
+    pass
+
+
+def parse_request_timeout(value, default: float, maximum: float) -> float:
+    if value is None:
+        return default
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise InvalidRequestTimeout(f"{REQUEST_TIMEOUT_HEADER} must be a number of seconds, got {value}")
+
+    if seconds <= 0:
+        raise InvalidRequestTimeout(f"{REQUEST_TIMEOUT_HEADER} must be greater than zero, got {value}")
+
+    # Clients may shorten the deadline but never hold a worker longer than allowed
+    return min(seconds, maximum)
+
+
+def is_database_unavailable(error: Exception) -> bool:
+    """No server or pooled connection could be obtained within the deadline"""
+
+    return isinstance(error, (ServerSelectionTimeoutError, WaitQueueTimeoutError))
+
+
+def is_deadline_exceeded(error: Exception) -> bool:
+    return isinstance(error, PyMongoError) and error.timeout
+
+
+def start_deadline():
+    try:
+        seconds = parse_request_timeout(
+            request.headers.get(REQUEST_TIMEOUT_HEADER),
+            default=current_app.config["REQUEST_TIMEOUT_SECONDS"],
+            maximum=current_app.config["REQUEST_MAX_TIMEOUT_SECONDS"]
+        )
+    except InvalidRequestTimeout as e:
+        return {"message": str(e)}, 400
+
+    # Every Mongo operation of the request shares what is left of the deadline
+    g.deadline = pymongo.timeout(seconds)
+    g.deadline.__enter__()
+
+
+def end_deadline(exception=None):
+    deadline = g.pop("deadline", None)
+
+    if deadline is not None:
+        deadline.__exit__(None, None, None)
+
+
+@contextlib.contextmanager
+def batch_deadline():
+    """Streamed bulk operations outlive the deadline of their request, so that
+    one is dropped and each of their batches gets a deadline of its own"""
+
+    end_deadline()
+
+    with pymongo.timeout(current_app.config["REQUEST_TIMEOUT_SECONDS"]):
+        yield
@@ -0,0 +1,65 @@
+from flask import g, has_request_context, request
+from pymongo.collection import Collection
+from pymongo.write_concern import WriteConcern
+
+WRITE_CONCERN_HEADER = "X-Write-Concern"
+
+WRITE_CONCERN_PROFILES = {
+    # Survives a primary failover, for user facing edits
+    "durable": WriteConcern(w="majority", j=True),
+    "acknowledged": WriteConcern(w=1),
+    # Acknowledged by the primary before reaching its journal, for bulk loads
+    "fast": WriteConcern(w=1, j=False),
+}
+
+OPERATIONS = ("single", "bulk", "import")
+
+
+class WriteProfiles:
+    """Picks the write concern of each write from the profile configured for
+    its operation type, unless the request opted into an allowed profile"""
+
+    def __init__(self):
+        self.profiles = {operation: "acknowledged" for operation in OPERATIONS}
+        self.allowed_overrides = ()
+
+    def init_app(self, app):
+        profiles = {
+            operation: app.config[f"WRITE_CONCERN_{operation.upper()}"] for operation in OPERATIONS
+        }
+        allowed_overrides = tuple(app.config["WRITE_CONCERN_ALLOWED_OVERRIDES"])
+
+        unknown_profiles = set(profiles.values()).union(allowed_overrides) - set(WRITE_CONCERN_PROFILES)
+        if unknown_profiles:
+            raise ValueError(f"Unknown write concern profiles: {', '.join(sorted(unknown_profiles))}")
+
+        self.profiles = profiles
+        self.allowed_overrides = allowed_overrides
+
+        app.before_request(self._read_override)
+
+    def profile(self, operation: str = "single") -> str:
+        override = g.get("write_concern_override") if has_request_context() else None
+
+        return override or self.profiles[operation]
+
+    def writes(self, collection: Collection, operation: str = "single") -> Collection:
+        return collection.with_options(
+            write_concern=WRITE_CONCERN_PROFILES[self.profile(operation)]
+        )
+
+    def _read_override(self):
+        override = request.headers.get(WRITE_CONCERN_HEADER)
+        g.write_concern_override = None
+
+        if not override:
+            return
+
+        if override not in self.allowed_overrides:
+            allowed = ", ".join(self.allowed_overrides) or "none"
+            return {"message": f"Write concern {override} is not allowed, allowed: {allowed}"}, 400
+
+        g.write_concern_override = override
+
+
+durability = WriteProfiles()
@@ -0,0 +1,71 @@
+from typing import List, NamedTuple, Sequence
+
+from starwars.application_layer.persistency.collections import Index
+
+ID_INDEX_NAME = "_id_"
+
+
+class IndexesDiff(NamedTuple):
+    to_create: List[Index]  # Declared but missing
+    to_replace: List[Index]  # Declared with the name of a live index with another spec
+    to_drop: List[str]  # Live but no longer declared
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.to_create or self.to_replace or self.to_drop)
+
+
+def diff_indexes(declared: Sequence[Index], live: dict) -> IndexesDiff:
+    """Compares declared indexes with the output of Collection.index_information()"""
+
+    undeclared = {name: info for name, info in live.items() if name != ID_INDEX_NAME}
+    to_create, to_replace = [], []
+
+    for index in declared:
+        info = undeclared.pop(index.index_name, None)
+
+        if info is None:
+            to_create.append(index)
+        elif not _matches(index, info):
+            to_replace.append(index)
+
+    return IndexesDiff(to_create=to_create, to_replace=to_replace, to_drop=list(undeclared))
+
+
+def _normalize_key(key) -> List[tuple]:
+    return [
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in key
+    ]
+
+
+def _matches(index: Index, info: dict) -> bool:
+    if index.is_text:
+        # Text indexes are reported as _fts/_ftsx keys, the fields live in weights
+        weights = index.weights or {
+            field: 1 for field, direction in index.key_list if direction == "text"
+        }
+
+        if info.get("weights") != weights:
+            return False
+
+    elif _normalize_key(info["key"]) != _normalize_key(index.key_list):
+        return False
+
+    if bool(info.get("unique")) != index.unique or bool(info.get("sparse")) != index.sparse:
+        return False
+
+    if info.get("expireAfterSeconds") != index.expire_after_seconds:
+        return False
+
+    if info.get("partialFilterExpression") != index.partial_filter_expression:
+        return False
+
+    # The server fills every collation option in, so only the declared ones are compared
+    collation = info.get("collation")
+    if index.collation is None:
+        return collation is None
+
+    return collation is not None and all(
+        collation.get(option) == value for option, value in index.collation.items()
+    )
@@ -0,0 +1,195 @@
+import copy
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+from flask import g, has_request_context
+from typing import Callable, Hashable, Optional
+
+from starwars.application_layer.persistency.circuit_breaker import (
+    CircuitOpen,
+    database_breaker,
+    is_backend_failure
+)
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+STALE_WARNING = '110 - "Response is Stale"'
+REVALIDATION_FAILED_WARNING = '111 - "Revalidation Failed"'
+
+
+class _Entry:
+    def __init__(self, value):
+        self.value = value
+        self.stored_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class ItemCache:
+    """Keeps the last good representation of recently read items. Fresh entries
+    are served directly and refreshed in the background near expiry, and expired
+    ones are still served while the database is failing"""
+
+    def __init__(self):
+        self.fresh_seconds = 0.0
+        self.refresh_ratio = 0.8
+        self.stale_if_error_seconds = 300.0
+        self.max_size = 10000
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.fresh_seconds = app.config["ITEM_CACHE_FRESH_SECONDS"]
+        self.stale_if_error_seconds = app.config["ITEM_CACHE_STALE_IF_ERROR_SECONDS"]
+        self.max_size = app.config["ITEM_CACHE_MAX_SIZE"]
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, resource: str, id: str):
+        with self._lock:
+            self._entries.pop((resource, id), None)
+            self._invalidations += 1
+
+    def get(self, resource: str, id: str, variant: Hashable, loader: Callable):
+        entry = self._entry(resource, id, variant)
+
+        # Clients resuming from a consistency token expect their own writes
+        if has_request_context() and g.get("consistency_token"):
+            entry = None
+
+        if entry is not None and entry.age < self.fresh_seconds:
+            if entry.age >= self.fresh_seconds * self.refresh_ratio:
+                self._refresh_in_background(resource, id, variant, loader)
+
+            return self._serve(entry)
+
+        if not database_breaker.allow():
+            if self._within_stale_window(entry):
+                return self._serve(entry, warning=STALE_WARNING)
+
+            raise CircuitOpen(database_breaker.retry_after())
+
+        invalidations = self._invalidations
+
+        try:
+            value = loader()
+        except Exception as e:
+            if not is_backend_failure(e):
+                database_breaker.release()
+                raise
+
+            database_breaker.record_failure()
+
+            if self._within_stale_window(entry):
+                logger.warning(
+                    "Serving stale item",
+                    extra={
+                        "props": {
+                            "service": "ItemCache",
+                            "resource": resource,
+                            "id": id,
+                            "age": entry.age,
+                            "error_message": str(e),
+                        }
+                    },
+                )
+
+                return self._serve(entry, warning=REVALIDATION_FAILED_WARNING)
+
+            raise
+
+        database_breaker.record_success()
+        self._store(resource, id, variant, value, invalidations)
+
+        return value
+
+    def _entry(self, resource: str, id: str, variant: Hashable) -> Optional[_Entry]:
+        with self._lock:
+            variants = self._entries.get((resource, id))
+
+            if variants is None:
+                return None
+
+            self._entries.move_to_end((resource, id))
+            return variants.get(variant)
+
+    def _store(self, resource: str, id: str, variant: Hashable, value, invalidations: int):
+        # Misses are left to the negative cache
+        if value is None or self.max_size <= 0:
+            return
+
+        with self._lock:
+            # A write landed while loading, the value may predate it
+            if invalidations != self._invalidations:
+                return
+
+            self._entries.setdefault((resource, id), {})[variant] = _Entry(copy.deepcopy(value))
+            self._entries.move_to_end((resource, id))
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _within_stale_window(self, entry: Optional[_Entry]) -> bool:
+        return entry is not None and entry.age < self.fresh_seconds + self.stale_if_error_seconds
+
+    def _serve(self, entry: _Entry, warning: Optional[str] = None):
+        if has_request_context():
+            g.item_cache_age = entry.age
+            g.item_cache_warning = warning
+
+        return copy.deepcopy(entry.value)
+
+    def _refresh_in_background(self, resource: str, id: str, variant: Hashable, loader: Callable):
+        key = (resource, id, variant)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+        def _refresh():
+            invalidations = self._invalidations
+
+            try:
+                if database_breaker.allow():
+                    value = loader()
+                    database_breaker.record_success()
+                    self._store(resource, id, variant, value, invalidations)
+
+            except Exception as e:
+                if is_backend_failure(e):
+                    database_breaker.record_failure()
+                else:
+                    database_breaker.release()
+
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_refresh, name="item-cache-refresh", daemon=True).start()
+
+
+def add_item_cache_headers(response):
+    age = g.pop("item_cache_age", None)
+    warning = g.pop("item_cache_warning", None)
+
+    if age is not None:
+        response.headers["Age"] = str(int(age))
+
+    if warning:
+        response.headers["Warning"] = warning
+
+    return response
+
+
+item_cache = ItemCache()
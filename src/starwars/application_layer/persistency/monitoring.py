@@ -0,0 +1,255 @@
+import json
+import logging
+import sys
+import threading
+
+from collections import Counter, deque
+from datetime import datetime, timezone
+from flask import current_app, g, has_request_context, request
+from pymongo import monitoring
+from typing import List, Optional
+
+from starwars.application_layer.persistency.query_plans import (
+    FILTERING_COMMANDS,
+    command_filter,
+    redact
+)
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+
+def repository_call_site() -> Optional[str]:
+    """Finds the outermost *Repository method in the current call stack, the
+    one called by the use case rather than its helpers"""
+
+    frame = sys._getframe(1)
+    call_site = None
+
+    while frame:
+        owner = frame.f_locals.get("cls", frame.f_locals.get("self"))
+        owner_name = owner.__name__ if isinstance(owner, type) else type(owner).__name__
+
+        if owner is not None and owner_name.endswith("Repository") and frame.f_code.co_name != "<lambda>":
+            call_site = f"{owner_name}.{frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return call_site
+
+
+def docs_returned(command_name: str, reply: dict) -> Optional[int]:
+    if "cursor" in reply:
+        cursor = reply["cursor"]
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+
+    if command_name == "findAndModify":
+        return int(reply.get("value") is not None)
+
+    if "n" in reply:
+        return reply["n"]
+
+    return None
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    def __init__(self):
+        self.threshold_ms = 100
+        self._started = {}
+        self._slow_queries = deque(maxlen=100)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.threshold_ms = app.config["SLOW_QUERY_THRESHOLD_MS"]
+
+        with self._lock:
+            self._slow_queries = deque(self._slow_queries, maxlen=app.config["SLOW_QUERY_BUFFER_SIZE"])
+
+    @property
+    def slow_queries(self) -> List[dict]:
+        with self._lock:
+            return list(self._slow_queries)
+
+    def started(self, event):
+        # Only a reference is kept, the shape is built for slow commands only
+        self._started[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        command = self._started.pop((event.connection_id, event.request_id), None)
+        self._record(event, command, reply=event.reply)
+
+    def failed(self, event):
+        command = self._started.pop((event.connection_id, event.request_id), None)
+        self._record(event, command, failure=event.failure)
+
+    def _record(self, event, command: Optional[dict], reply: Optional[dict] = None, failure=None):
+        duration_ms = event.duration_micros / 1000
+
+        if duration_ms < self.threshold_ms:
+            return
+
+        command = command or {}
+        query_filter = command_filter(event.command_name, command) if command else None
+        collection_field = "collection" if event.command_name == "getMore" else event.command_name
+
+        slow_query = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "command": event.command_name,
+            "collection": command.get(collection_field),
+            "duration_ms": round(duration_ms, 3),
+            "route": request.url_rule.rule if has_request_context() and request.url_rule else None,
+            "method": request.method if has_request_context() else None,
+            "repository": repository_call_site(),
+            "filter": redact(query_filter) if query_filter is not None else None,
+            "docs_returned": docs_returned(event.command_name, reply) if reply else None,
+            "failure": str(failure) if failure else None,
+        }
+
+        with self._lock:
+            self._slow_queries.append(slow_query)
+
+        logger.warning("Slow query", extra={"props": slow_query})
+
+
+def reset_db_stats():
+    g.db_calls = 0
+    g.db_time_ms = 0.0
+    g.db_shapes = Counter()
+
+
+def record_db_call(duration_ms: float, shape: Optional[str] = None):
+    """Accounts a database command to the request being served, if any"""
+
+    if not has_request_context():
+        return
+
+    g.db_calls = g.get("db_calls", 0) + 1
+    g.db_time_ms = g.get("db_time_ms", 0.0) + duration_ms
+
+    if shape is not None:
+        g.setdefault("db_shapes", Counter())[shape] += 1
+
+
+def add_db_stats_headers(response):
+    db_calls = g.get("db_calls", 0)
+    db_time_ms = g.get("db_time_ms", 0.0)
+
+    response.headers["X-DB-Calls"] = str(db_calls)
+    response.headers.add("Server-Timing", f'db;dur={db_time_ms:.1f};desc="{db_calls} calls"')
+
+    # The same filter shape issued over and over in one request is the N+1 signature
+    threshold = current_app.config["DB_REPEATED_QUERY_THRESHOLD"]
+    repeated = {
+        shape: count for shape, count in g.get("db_shapes", {}).items() if count >= threshold
+    }
+
+    if repeated:
+        logger.warning(
+            "Repeated queries in request",
+            extra={
+                "props": {
+                    "route": request.url_rule.rule if request.url_rule else None,
+                    "method": request.method,
+                    "db_calls": db_calls,
+                    "repeated": repeated,
+                }
+            },
+        )
+
+    return response
+
+
+class RequestStatsListener(monitoring.CommandListener):
+    def __init__(self):
+        self._shapes = {}
+
+    def started(self, event):
+        if not has_request_context():
+            return
+
+        shape = None
+        if event.command_name in FILTERING_COMMANDS:
+            shape = json.dumps(
+                [event.command_name, event.command.get(event.command_name),
+                 redact(command_filter(event.command_name, event.command))],
+                sort_keys=True,
+                default=str
+            )
+
+        self._shapes[(event.connection_id, event.request_id)] = shape
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        key = (event.connection_id, event.request_id)
+
+        if key in self._shapes:
+            record_db_call(event.duration_micros / 1000, self._shapes.pop(key))
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Keeps live connection pool counters for every server of this process"""
+
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pools(self) -> dict:
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._pools.items()}
+
+    @staticmethod
+    def _key(address) -> str:
+        return ":".join(str(part) for part in address)
+
+    def _update(self, address, **deltas):
+        with self._lock:
+            stats = self._pools.setdefault(self._key(address), Counter(
+                open=0, in_use=0, waiting=0, checked_out=0, check_out_failures=0,
+                check_out_timeouts=0, cleared=0
+            ))
+            stats.update(deltas)
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(self._key(event.address), None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        timed_out = int(event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT)
+        self._update(event.address, waiting=-1, check_out_failures=1, check_out_timeouts=timed_out)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, in_use=1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+
+slow_query_listener = SlowQueryListener()
+request_stats_listener = RequestStatsListener()
+pool_stats_listener = PoolStatsListener()
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class NegativeCache:
+    """Remembers ids recently looked up and not found, so repeated misses are
+    answered without a query. Bounded by size and by how long a miss is kept"""
+
+    def __init__(self):
+        self.ttl_seconds = 60.0
+        self.max_size = 10000
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config["NEGATIVE_CACHE_TTL_SECONDS"]
+        self.max_size = app.config["NEGATIVE_CACHE_MAX_SIZE"]
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def contains(self, resource: str, id: str) -> bool:
+        key = (resource, id)
+
+        with self._lock:
+            expires_at = self._entries.get(key)
+
+            if expires_at is None:
+                return False
+
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False
+
+            return True
+
+    def add(self, resource: str, id: str):
+        if self.max_size <= 0:
+            return
+
+        key = (resource, id)
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+
+            # Entries are kept in insertion order, so the oldest miss goes first
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, resource: str, id: str):
+        with self._lock:
+            self._entries.pop((resource, id), None)
+
+
+negative_cache = NegativeCache()
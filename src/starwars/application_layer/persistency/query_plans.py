@@ -0,0 +1,140 @@
+import json
+
+from bson import SON
+from pymongo import monitoring
+from typing import List, NamedTuple, Optional
+
+# Commands that select documents and therefore have a query plan
+FILTERING_COMMANDS = ("find", "update", "delete", "findAndModify", "count", "distinct")
+
+# Session, cluster and write options added by the driver that explain does not accept
+DRIVER_FIELDS = (
+    "lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "readConcern",
+    "writeConcern", "maxTimeMS"
+)
+
+COLLECTION_SCAN_STAGES = ("COLLSCAN",)
+
+
+def redact(value):
+    """Keeps the structure and operators of a filter, replacing the values"""
+
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact(item) for item in value]
+
+        return "?"
+
+    return "?"
+
+
+def command_filter(command_name: str, command: dict) -> Optional[dict]:
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter", command.get("query", {}))
+
+    if command_name == "findAndModify":
+        return command.get("query", {})
+
+    if command_name == "update":
+        return command["updates"][0]["q"]
+
+    if command_name == "delete":
+        return command["deletes"][0]["q"]
+
+    return None
+
+
+def query_shape(command_name: str, command: dict) -> dict:
+    return {
+        "command": command_name,
+        "collection": command[command_name],
+        "filter": redact(command_filter(command_name, command)),
+        "sort": command.get("sort"),
+    }
+
+
+class RecordedCommand(NamedTuple):
+    command_name: str
+    command: dict
+    shape: dict
+
+
+class QueryRecorder(monitoring.CommandListener):
+    """Records one sample command for every query shape issued while enabled"""
+
+    def __init__(self, collections: List[str]):
+        self.collections = collections
+        self.enabled = False
+        self._recorded = {}
+
+    @property
+    def recorded(self) -> List[RecordedCommand]:
+        return list(self._recorded.values())
+
+    def started(self, event):
+        if not self.enabled or event.command_name not in FILTERING_COMMANDS:
+            return
+
+        command = {
+            key: value for key, value in event.command.items() if key not in DRIVER_FIELDS
+        }
+
+        if command.get(event.command_name) not in self.collections:
+            return
+
+        shape = query_shape(event.command_name, command)
+        key = json.dumps(shape, sort_keys=True, default=str)
+
+        self._recorded.setdefault(key, RecordedCommand(event.command_name, command, shape))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class PlanReport(NamedTuple):
+    shape: dict
+    stages: List[str]
+    keys_examined: int
+    docs_examined: int
+    returned: int
+
+    @property
+    def is_index_backed(self) -> bool:
+        return not any(stage in COLLECTION_SCAN_STAGES for stage in self.stages)
+
+
+def plan_stages(plan: dict) -> List[str]:
+    # Slot based execution nests the classic plan under queryPlan
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+
+    stages = [plan["stage"]] if "stage" in plan else []
+
+    if "inputStage" in plan:
+        stages.extend(plan_stages(plan["inputStage"]))
+
+    for input_stage in plan.get("inputStages", []):
+        stages.extend(plan_stages(input_stage))
+
+    return stages
+
+
+def explain(db, recorded: RecordedCommand) -> PlanReport:
+    result = db.command(
+        SON([("explain", SON(recorded.command)), ("verbosity", "executionStats")])
+    )
+    stats = result.get("executionStats", {})
+
+    return PlanReport(
+        shape=recorded.shape,
+        stages=plan_stages(result["queryPlanner"]["winningPlan"]),
+        keys_examined=stats.get("totalKeysExamined", 0),
+        docs_examined=stats.get("totalDocsExamined", 0),
+        returned=stats.get("nReturned", 0),
+    )
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Iterable, List
+
+
+class ReferenceIds:
+    """Remembers ids recently seen to exist, so validating the references of a
+    write mostly skips the database. Local deletes drop an id at once, the ones
+    served by other processes are only seen after ttl, which is why reference
+    cleanup jobs are delayed by it"""
+
+    def __init__(self):
+        self.ttl_seconds = 30.0
+        self.max_size = 10000
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config["REFERENCE_IDS_TTL_SECONDS"]
+        self.max_size = app.config["REFERENCE_IDS_MAX_SIZE"]
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def missing(self, resource: str, ids: Iterable[str]) -> List[str]:
+        """Returns the ids not known to exist, in order and without repetitions"""
+
+        now = time.monotonic()
+        missing = []
+
+        with self._lock:
+            for id in dict.fromkeys(ids):
+                expires_at = self._entries.get((resource, id))
+
+                if expires_at is None or expires_at < now:
+                    missing.append(id)
+
+        return missing
+
+    def add(self, resource: str, ids: Iterable[str]):
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            for id in ids:
+                key = (resource, id)
+                self._entries.pop(key, None)
+                self._entries[key] = expires_at
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, resource: str, id: str):
+        with self._lock:
+            self._entries.pop((resource, id), None)
+
+
+reference_ids = ReferenceIds()
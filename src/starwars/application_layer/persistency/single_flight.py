@@ -0,0 +1,81 @@
+import copy
+import threading
+
+from collections import Counter
+from flask import g, has_request_context
+from typing import Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Lets concurrent identical lookups of this process share one in-flight
+    database call: the first caller runs it and the others wait for its result"""
+
+    def __init__(self):
+        self.enabled = True
+        self._calls = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config["SINGLE_FLIGHT_ENABLED"]
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def do(self, name: str, key: Hashable, fn: Callable):
+        # A client resuming from a consistency token must not join a read that
+        # may have started before its own write
+        if not self.enabled or (has_request_context() and g.get("consistency_token")):
+            return fn()
+
+        with self._lock:
+            counters = self._stats.setdefault(name, Counter(leaders=0, followers=0))
+            call = self._calls.get((name, key))
+
+            if call is None:
+                call = self._calls[(name, key)] = _Call()
+                counters["leaders"] += 1
+                leader = True
+            else:
+                call.followers += 1
+                counters["followers"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            call.result = result
+            return result
+        finally:
+            with self._lock:
+                del self._calls[(name, key)]
+
+                # Followers get their own copy, callers are free to mutate results
+                if call.followers and call.error is None:
+                    call.result = copy.deepcopy(call.result)
+
+            call.done.set()
+
+
+single_flight = SingleFlight()
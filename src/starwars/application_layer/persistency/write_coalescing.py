@@ -0,0 +1,89 @@
+import threading
+
+from collections import Counter
+from typing import Callable, Hashable, List
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class WriteCoalescer:
+    """Groups the single writes of this process that arrive within a short
+    window into one batch: the first writer waits for the window to close and
+    flushes everyone's items at once, each writer then gets its own result"""
+
+    def __init__(self):
+        self.enabled = False
+        self.window_seconds = 0.002
+        self.max_batch_size = 100
+        self._batches = {}
+        self._stats = Counter(batches=0, writes=0)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config["WRITE_COALESCING_ENABLED"]
+        self.window_seconds = app.config["WRITE_COALESCING_WINDOW_MS"] / 1000
+        self.max_batch_size = app.config["WRITE_COALESCING_MAX_BATCH_SIZE"]
+        self._stats = Counter(batches=0, writes=0)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def submit(self, key: Hashable, item, flush: Callable[[List], List]):
+        """Adds the item to the open batch of the key. flush gets the items of a
+        batch and returns one result per item, an exception instance standing
+        for the failure of that item alone"""
+
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+
+            if leader:
+                batch = self._batches[key] = _Batch()
+                self._stats["batches"] += 1
+
+            index = len(batch.items)
+            batch.items.append(item)
+            self._stats["writes"] += 1
+
+            # A full batch is closed right away, the next writer opens another one
+            if len(batch.items) >= self.max_batch_size:
+                del self._batches[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_seconds)
+
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+
+            try:
+                batch.results = flush(batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        result = batch.results[index]
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+write_coalescer = WriteCoalescer()
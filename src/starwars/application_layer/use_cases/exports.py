@@ -0,0 +1,20 @@
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from starwars.application_layer.persistency.deadlines import batch_deadline
+
+
+def export_in_batches(resources: Iterable, batch_size: int) -> Iterator[List[dict]]:
+    """Yields the resources as dicts batch_size at a time, each batch read under
+    a deadline of its own, so only one batch is held in memory"""
+
+    resources = iter(resources)
+
+    while True:
+        with batch_deadline():
+            batch = [resource.as_dict() for resource in islice(resources, batch_size)]
+
+        if not batch:
+            return
+
+        yield batch
@@ -1,6 +1,14 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
 from starwars.application_layer.adapters.films_repository import FilmsRepository
+from starwars.application_layer.persistency.item_cache import item_cache
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.use_cases.exports import export_in_batches
+from starwars.application_layer.use_cases.imports import import_in_batches
+from starwars.application_layer.use_cases.jobs import REMOVE_FILM_REFERENCES, JobsUseCase
+from starwars.domain_layer.models.changes import ChangeToken
 from starwars.domain_layer.models.films import Film
-from starwars.domain_layer.ports.films import DuplicatedFilm
+from starwars.domain_layer.ports.films import DuplicatedFilm, InvalidFilm
 from starwars.presentation_layer.mappings import FilmMapping
 
 
@@ -37,23 +45,145 @@ class FilmsUseCase:
                 using_service=FilmsRepository
             )
 
+            item_cache.invalidate("films", id)
+
             return film.as_dict()
         except DuplicatedFilm:
             raise FilmAlreadyRegistered(f"Film with title {data.title} already exists")
     
     @classmethod
     def remove_film(cls, id: str):
-        Film.remove_film(
+        removed = Film.remove_film(
             id=id,
             using_service=FilmsRepository
         )
+
+        item_cache.invalidate("films", id)
+
+        # References held by the planets are cleaned up off the request path, once
+        # no process may still accept the removed id as a valid reference
+        if removed:
+            JobsUseCase.enqueue(REMOVE_FILM_REFERENCES, {"film_id": id}, delay_seconds=reference_ids.ttl_seconds)
         
     @classmethod
-    def get_film_by_id(cls, id: str):
-        film = Film.get_film_by_id(
-            id,
-            using_service=FilmsRepository
+    def get_film_by_id(cls, id: str, fields: Optional[List[str]] = None):
+        def _load_film():
+            film = Film.get_film_by_id(
+                id,
+                using_service=FilmsRepository,
+                fields=fields
+            )
+
+            if film:
+                return film.as_dict()
+
+        return item_cache.get("films", id, tuple(fields or ()), _load_film)
+
+    @classmethod
+    def get_films_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+        found = {
+            film.id: film
+            for film in Film.get_films_by_ids(
+                ids,
+                using_service=FilmsRepository,
+                fields=fields
+            )
+        }
+
+        docs = []
+        for id in ids:
+            if id in found:
+                docs.append({"id": id, "found": True, "film": found[id].as_dict()})
+            else:
+                docs.append({"id": id, "found": False})
+
+        return {"docs": docs}
+
+    @classmethod
+    def get_film_by_title(cls, title: str, fields: Optional[List[str]] = None):
+        film = Film.get_film_by_title(
+            title,
+            using_service=FilmsRepository,
+            fields=fields
         )
 
         if film:
-            return film.as_dict()
\ No newline at end of file
+            return film.as_dict()
+
+    @classmethod
+    def upsert_film_by_title(cls, data: "FilmMapping"):
+        try:
+            film, created = Film.upsert_film_by_title(
+                title=data.title,
+                release_date=data.release_date,
+                director=data.director,
+                planets=data.planets,
+                using_service=FilmsRepository
+            )
+
+            item_cache.invalidate("films", film.id)
+
+            return film.as_dict(), created
+        except DuplicatedFilm:
+            raise FilmAlreadyRegistered(f"Film with title {data.title} already exists")
+
+    @classmethod
+    def export_films(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[List[dict]]:
+        films = Film.export_films(
+            batch_size=batch_size,
+            using_service=FilmsRepository,
+            fields=fields
+        )
+
+        return export_in_batches(films, batch_size)
+
+    @classmethod
+    def import_films(cls, rows: Iterable[Tuple[int, Any]], batch_size: int) -> Iterator[dict]:
+        return import_in_batches(
+            rows,
+            batch_size,
+            validate=Film.validate_film_data,
+            invalid=InvalidFilm,
+            insert=lambda films: Film.import_films(films=films, using_service=FilmsRepository)
+        )
+
+    @classmethod
+    def remove_planet_references(cls, planet_id: str, batch_size: int, progress: Callable) -> dict:
+        cleaned = 0
+
+        while True:
+            ids = Film.remove_planet_references(
+                planet_id=planet_id,
+                limit=batch_size,
+                using_service=FilmsRepository
+            )
+
+            if not ids:
+                break
+
+            for id in ids:
+                item_cache.invalidate("films", id)
+
+            cleaned += len(ids)
+            progress(done=cleaned)
+
+        return {"films": cleaned}
+
+    @classmethod
+    def get_films_changes(cls, since: Optional[str], limit: int):
+        token = ChangeToken.decode(since) if since else None
+
+        # One extra change tells whether there is another page to fetch
+        changes = Film.get_films_changes(
+            since=token,
+            limit=limit + 1,
+            using_service=FilmsRepository
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return {
+            "changes": [change.as_dict("film") for change in changes],
+            "next": changes[-1].token.encode() if changes else since,
+            "has_more": has_more
+        }
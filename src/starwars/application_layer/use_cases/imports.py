@@ -0,0 +1,58 @@
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Type
+
+from starwars.application_layer.persistency.deadlines import batch_deadline
+
+
+def import_in_batches(
+    rows: Iterable[Tuple[int, Any]],
+    batch_size: int,
+    validate: Callable[[Any], dict],
+    invalid: Type[Exception],
+    insert: Callable[[List[dict]], List]
+) -> Iterator[dict]:
+    """Validates and inserts (line number, payload) rows batch_size at a time,
+    yielding the outcome of each batch and then the totals. Only one batch is
+    held in memory; rows that could not be read arrive as exceptions"""
+
+    rows = iter(rows)
+    totals = {"lines": 0, "inserted": 0, "failed": 0}
+    number = 0
+
+    while True:
+        batch = list(islice(rows, batch_size))
+
+        if not batch:
+            break
+
+        number += 1
+        errors = []
+        valid = []
+
+        for line, payload in batch:
+            if isinstance(payload, Exception):
+                errors.append({"line": line, "message": str(payload)})
+                continue
+
+            try:
+                valid.append((line, validate(payload)))
+            except invalid as e:
+                errors.append({"line": line, "message": str(e)})
+
+        with batch_deadline():
+            results = insert([data for _, data in valid]) if valid else []
+
+        for (line, _), result in zip(valid, results):
+            if isinstance(result, Exception):
+                errors.append({"line": line, "message": str(result)})
+
+        errors.sort(key=lambda error: error["line"])
+        inserted = len(batch) - len(errors)
+
+        totals["lines"] += len(batch)
+        totals["inserted"] += inserted
+        totals["failed"] += len(errors)
+
+        yield {"batch": number, "lines": len(batch), "inserted": inserted, "errors": errors}
+
+    yield {"done": True, **totals}
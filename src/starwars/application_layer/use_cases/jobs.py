@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from starwars.application_layer.adapters.jobs_repository import JobsRepository
+from starwars.application_layer.jobs.runner import job_runner
+
+REMOVE_PLANET_REFERENCES = "films.remove_planet_references"
+REMOVE_FILM_REFERENCES = "planets.remove_film_references"
+
+
+class JobsUseCase:
+
+    @classmethod
+    def enqueue(cls, type: str, params: dict, delay_seconds: float = 0) -> str:
+        return JobsRepository.enqueue(
+            type, params, max_attempts=job_runner.max_attempts, delay_seconds=delay_seconds
+        )
+
+    @classmethod
+    def get_job(cls, id: str) -> Optional[dict]:
+        job = JobsRepository.get_job(id)
+
+        if job:
+            return {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in job.items()
+            }
@@ -1,6 +1,14 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
 from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+from starwars.application_layer.persistency.item_cache import item_cache
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.use_cases.exports import export_in_batches
+from starwars.application_layer.use_cases.imports import import_in_batches
+from starwars.application_layer.use_cases.jobs import REMOVE_PLANET_REFERENCES, JobsUseCase
+from starwars.domain_layer.models.changes import ChangeToken
 from starwars.domain_layer.models.planets import Planet
-from starwars.domain_layer.ports.planets import DuplicatedPlanet
+from starwars.domain_layer.ports.planets import DuplicatedPlanet, InvalidPlanet
 from starwars.presentation_layer.mappings import PlanetMapping
 
 
@@ -39,23 +47,146 @@ class PlanetsUseCase:
                 using_service=PlanetsRepository
             )
 
+            item_cache.invalidate("planets", id)
+
             return planet.as_dict()
         except DuplicatedPlanet:
             raise PlanetAlreadyRegistered(f"Planet with name {data.name} already exists")
     
     @classmethod
     def remove_planet(cls, id: str):
-        Planet.remove_planet(
+        removed = Planet.remove_planet(
             id=id,
             using_service=PlanetsRepository
         )
 
+        item_cache.invalidate("planets", id)
+
+        # References held by the films are cleaned up off the request path, once
+        # no process may still accept the removed id as a valid reference
+        if removed:
+            JobsUseCase.enqueue(REMOVE_PLANET_REFERENCES, {"planet_id": id}, delay_seconds=reference_ids.ttl_seconds)
+
     @classmethod
-    def get_planet_by_id(cls, id: str):
-        planet = Planet.get_planet_by_id(
-            id,
-            using_service=PlanetsRepository
+    def get_planet_by_id(cls, id: str, fields: Optional[List[str]] = None):
+        def _load_planet():
+            planet = Planet.get_planet_by_id(
+                id,
+                using_service=PlanetsRepository,
+                fields=fields
+            )
+
+            if planet:
+                return planet.as_dict()
+
+        return item_cache.get("planets", id, tuple(fields or ()), _load_planet)
+
+    @classmethod
+    def get_planets_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+        found = {
+            planet.id: planet
+            for planet in Planet.get_planets_by_ids(
+                ids,
+                using_service=PlanetsRepository,
+                fields=fields
+            )
+        }
+
+        docs = []
+        for id in ids:
+            if id in found:
+                docs.append({"id": id, "found": True, "planet": found[id].as_dict()})
+            else:
+                docs.append({"id": id, "found": False})
+
+        return {"docs": docs}
+
+    @classmethod
+    def get_planet_by_name(cls, name: str, fields: Optional[List[str]] = None):
+        planet = Planet.get_planet_by_name(
+            name,
+            using_service=PlanetsRepository,
+            fields=fields
         )
 
         if planet:
-            return planet.as_dict()
\ No newline at end of file
+            return planet.as_dict()
+
+    @classmethod
+    def upsert_planet_by_name(cls, data: "PlanetMapping"):
+        try:
+            planet, created = Planet.upsert_planet_by_name(
+                name=data.name,
+                climate=data.climate,
+                diameter=data.diameter,
+                population=data.population,
+                films=data.films,
+                using_service=PlanetsRepository
+            )
+
+            item_cache.invalidate("planets", planet.id)
+
+            return planet.as_dict(), created
+        except DuplicatedPlanet:
+            raise PlanetAlreadyRegistered(f"Planet with name {data.name} already exists")
+
+    @classmethod
+    def export_planets(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[List[dict]]:
+        planets = Planet.export_planets(
+            batch_size=batch_size,
+            using_service=PlanetsRepository,
+            fields=fields
+        )
+
+        return export_in_batches(planets, batch_size)
+
+    @classmethod
+    def import_planets(cls, rows: Iterable[Tuple[int, Any]], batch_size: int) -> Iterator[dict]:
+        return import_in_batches(
+            rows,
+            batch_size,
+            validate=Planet.validate_planet_data,
+            invalid=InvalidPlanet,
+            insert=lambda planets: Planet.import_planets(planets=planets, using_service=PlanetsRepository)
+        )
+
+    @classmethod
+    def remove_film_references(cls, film_id: str, batch_size: int, progress: Callable) -> dict:
+        cleaned = 0
+
+        while True:
+            ids = Planet.remove_film_references(
+                film_id=film_id,
+                limit=batch_size,
+                using_service=PlanetsRepository
+            )
+
+            if not ids:
+                break
+
+            for id in ids:
+                item_cache.invalidate("planets", id)
+
+            cleaned += len(ids)
+            progress(done=cleaned)
+
+        return {"planets": cleaned}
+
+    @classmethod
+    def get_planets_changes(cls, since: Optional[str], limit: int):
+        token = ChangeToken.decode(since) if since else None
+
+        # One extra change tells whether there is another page to fetch
+        changes = Planet.get_planets_changes(
+            since=token,
+            limit=limit + 1,
+            using_service=PlanetsRepository
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return {
+            "changes": [change.as_dict("planet") for change in changes],
+            "next": changes[-1].token.encode() if changes else since,
+            "has_more": has_more
+        }
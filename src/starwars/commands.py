@@ -1,7 +1,9 @@
+import click
 import logging
 
 from flask import current_app
 from flask.cli import with_appcontext
+from typing import List
 
 logger = logging.getLogger("api-starwars." + __name__)
 
@@ -10,6 +12,10 @@ class InvalidEnvironment(Exception):
     pass
 
 
+class UnindexedQueries(Exception):
+    pass
+
+
 def _configure_collections():
     from pymongo.errors import CollectionInvalid
 
@@ -42,16 +48,71 @@ def _configure_collections():
             )
             raise e
         
+        if not definition.indexes:
+            continue
+
+        try:
+            logger.info(f"Creating indexes on collection {definition.name}")
+
+            collection.create_indexes([index.as_model() for index in definition.indexes])
+        except Exception as e:
+            logger.exception(
+                f"Error creating indexes on collection {definition.name}. {type(e).__name__}: {e}"
+            )
+            raise e
+
+
+def _sync_indexes(dry_run: bool = False) -> List[tuple]:
+    from starwars.app import mongo_client
+    from starwars.application_layer.persistency.collections import (
+        collections_definitions
+    )
+    from starwars.application_layer.persistency.indexes import diff_indexes
+
+    prefix = "[dry run] " if dry_run else ""
+    actions = []
+
+    for definition in collections_definitions:
+        collection = mongo_client.db.get_collection(definition.name)
+        diff = diff_indexes(definition.indexes, collection.index_information())
+
+        if diff.is_empty:
+            logger.info(f"Indexes on collection {definition.name} are in sync")
+            continue
+
         try:
-            logger.info(f"Creating index on collection {definition.name}")
+            # Changed indexes keep their name, so the old version must go first
+            for index in diff.to_replace:
+                logger.info(f"{prefix}Dropping changed index {index.index_name} on collection {definition.name}")
+                actions.append(("drop", definition.name, index.index_name))
+
+                if not dry_run:
+                    collection.drop_index(index.index_name)
+
+            # Undeclared indexes are only dropped once their replacements are built
+            to_build = diff.to_replace + diff.to_create
+            for index in to_build:
+                logger.info(f"{prefix}Building index {index.index_name} on collection {definition.name}")
+                actions.append(("create", definition.name, index.index_name))
+
+            if to_build and not dry_run:
+                collection.create_indexes([index.as_model() for index in to_build])
+
+            for name in diff.to_drop:
+                logger.info(f"{prefix}Dropping undeclared index {name} on collection {definition.name}")
+                actions.append(("drop", definition.name, name))
+
+                if not dry_run:
+                    collection.drop_index(name)
 
-            collection.create_index(definition.index, unique=definition.unique_index)
         except Exception as e:
             logger.exception(
-                f"Error creating index on collection {definition.name}. {type(e).__name__}: {e}"
+                f"Error syncing indexes on collection {definition.name}. {type(e).__name__}: {e}"
             )
             raise e
 
+    return actions
+
 
 def _drop_collections():
     from starwars.app import mongo_client
@@ -72,6 +133,122 @@ def _drop_collections():
             raise e
 
 
+def _exercise_repositories(seed_size: int):
+    """Issues every query shape the repositories use against the current database.
+    The seed satisfies the collection validators: strings in every optional
+    field and ObjectId references"""
+
+    import bson
+
+    from starwars.application_layer.adapters.films_repository import FilmsRepository
+    from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+    from starwars.application_layer.persistency.reference_ids import reference_ids
+
+    film = {"release_date": "1977-05-25", "director": "George Lucas"}
+    planet = {"climate": "arid", "diameter": "10465", "population": "200000"}
+
+    film_ids = [
+        FilmsRepository.persist_film(title=f"Film {index}", planets=[], **film)
+        for index in range(seed_size)
+    ]
+    film_refs = [bson.ObjectId(id) for id in film_ids[:3]]
+    planet_ids = [
+        PlanetsRepository.persist_planet(name=f"Planet {index}", films=film_refs, **planet)
+        for index in range(seed_size)
+    ]
+    planet_refs = [bson.ObjectId(id) for id in planet_ids[:3]]
+
+    # Known ids skip the reference lookups, which must be explained too
+    reference_ids.clear()
+
+    FilmsRepository.import_films([{"title": "Film imported", "planets": planet_refs, **film}])
+    reference_ids.clear()
+    PlanetsRepository.import_planets([{"name": "Planet imported", "films": film_refs, **planet}])
+    reference_ids.clear()
+
+    FilmsRepository.update_film(id=film_ids[0], title="Film 0", planets=planet_refs, **film)
+    PlanetsRepository.update_planet(id=planet_ids[0], name="Planet 0", films=film_refs, **planet)
+
+    for suffix in ("0", "upserted"):
+        reference_ids.clear()
+        FilmsRepository.upsert_film_by_title(title=f"Film {suffix}", planets=planet_refs, **film)
+        PlanetsRepository.upsert_planet_by_name(name=f"Planet {suffix}", films=film_refs, **planet)
+
+    for fields in (None, ["title"]):
+        FilmsRepository.get_film_by_id(film_ids[1], fields=fields)
+        FilmsRepository.get_films_by_ids(film_ids[:5], fields=fields)
+        FilmsRepository.get_film_by_title("Film 1", fields=fields)
+
+    for fields in (None, ["name"]):
+        PlanetsRepository.get_planet_by_id(planet_ids[1], fields=fields)
+        PlanetsRepository.get_planets_by_ids(planet_ids[:5], fields=fields)
+        PlanetsRepository.get_planet_by_name("Planet 1", fields=fields)
+
+    FilmsRepository.remove_film(film_ids[-1])
+    PlanetsRepository.remove_planet(planet_ids[-1])
+    FilmsRepository.remove_planet_references(planet_ids[0], limit=10)
+    PlanetsRepository.remove_film_references(film_ids[0], limit=10)
+
+    list(FilmsRepository.export_films(batch_size=10))
+    list(PlanetsRepository.export_planets(batch_size=10, fields=["name"]))
+
+    for get_changes in (FilmsRepository.get_films_changes, PlanetsRepository.get_planets_changes):
+        changes = get_changes(since_edited=None, since_id=None, limit=10)
+        since = changes[len(changes) // 2]
+        get_changes(since_edited=since["edited"], since_id=since["id"], limit=10)
+
+
+def _check_query_plans(seed_size: int = 50) -> List:
+    from pymongo import MongoClient
+
+    from starwars.app import mongo_client
+    from starwars.application_layer.persistency.collections import (
+        collections_definitions
+    )
+    from starwars.application_layer.persistency.query_plans import QueryRecorder, explain
+
+    recorder = QueryRecorder([definition.name for definition in collections_definitions])
+    client = MongoClient(current_app.config["MONGO_URI"], event_listeners=[recorder])
+    database_name = f"{mongo_client.db.name}_query_plans"
+    original_db = mongo_client.db
+
+    logger.info(f"Checking query plans on scratch database {database_name}")
+
+    try:
+        client.drop_database(database_name)
+        mongo_client.db = client[database_name]
+
+        _configure_collections()
+
+        recorder.enabled = True
+        _exercise_repositories(seed_size)
+        recorder.enabled = False
+
+        reports = [explain(mongo_client.db, recorded) for recorded in recorder.recorded]
+    finally:
+        mongo_client.db = original_db
+        client.drop_database(database_name)
+        client.close()
+
+    for report in reports:
+        logger.info(
+            f"{'OK' if report.is_index_backed else 'COLLSCAN'} {report.shape}: "
+            f"plan {' <- '.join(report.stages)}, keys examined {report.keys_examined}, "
+            f"docs examined {report.docs_examined}, returned {report.returned}"
+        )
+
+    unindexed = [report for report in reports if not report.is_index_backed]
+
+    if unindexed:
+        raise UnindexedQueries(
+            f"{len(unindexed)} of {len(reports)} query shapes are not backed by an index"
+        )
+
+    logger.info(f"All {len(reports)} query shapes are backed by an index")
+
+    return reports
+
+
 @with_appcontext
 def drop_collections():
     if current_app.config["DEPLOY_ENV"] == "Production":
@@ -81,4 +258,42 @@ def drop_collections():
 
 @with_appcontext
 def configure_collections():
-    _configure_collections()
\ No newline at end of file
+    _configure_collections()
+
+
+@click.option("--dry-run", is_flag=True, help="Only report the changes, without applying them")
+@with_appcontext
+def sync_indexes(dry_run: bool):
+    _sync_indexes(dry_run=dry_run)
+
+
+@click.option("--seed-size", default=50, show_default=True, help="Documents seeded per collection")
+@with_appcontext
+def check_query_plans(seed_size: int):
+    if current_app.config["DEPLOY_ENV"] == "Production":
+        raise InvalidEnvironment("Query plans must be checked against a local database")
+    _check_query_plans(seed_size=seed_size)
+
+
+@click.option("--threads", default=1, show_default=True, help="Jobs run at once")
+@click.option("--burst", is_flag=True, help="Exit once no job is left to run")
+@with_appcontext
+def run_worker(threads: int, burst: bool):
+    import time
+
+    from starwars.application_layer.jobs.runner import job_runner, worker_name
+
+    if burst:
+        while job_runner.run_once(worker_name(0)):
+            pass
+
+        return
+
+    job_runner.start(threads=threads)
+    logger.info(f"Running jobs on {threads} threads")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        job_runner.stop()
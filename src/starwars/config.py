@@ -5,12 +5,153 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Settings applied to the MongoClient of every process, mapped to the driver options
+MONGO_CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    'MONGO_COMPRESSORS': 'compressors',
+}
+
 
 class BaseConfig(object):
     DEBUG = False
     TESTING = False
     LOGS_LEVEL = os.environ.get('LOGS_LEVEL', 'INFO')
     DEPLOY_ENV = os.environ.get('DEPLOY_ENV', 'Development')
+    BATCH_MAX_IDS = int(os.environ.get('BATCH_MAX_IDS', 100))
+    CHANGES_PAGE_SIZE = int(os.environ.get('CHANGES_PAGE_SIZE', 100))
+    CHANGES_MAX_PAGE_SIZE = int(os.environ.get('CHANGES_MAX_PAGE_SIZE', 1000))
+    # "mongo" relays events through a capped collection to every uwsgi process,
+    # "memory" only delivers them to subscribers of the publishing process
+    EVENTS_RELAY = os.environ.get('EVENTS_RELAY', 'mongo')
+    EVENTS_COLLECTION = os.environ.get('EVENTS_COLLECTION', 'events')
+    EVENTS_COLLECTION_SIZE = int(os.environ.get('EVENTS_COLLECTION_SIZE', 16 * 1024 * 1024))
+    EVENTS_MAX_QUEUED = int(os.environ.get('EVENTS_MAX_QUEUED', 100))
+    STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+    STREAM_MAX_SECONDS = float(os.environ.get('STREAM_MAX_SECONDS', 300))
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get('SLOW_QUERY_BUFFER_SIZE', 100))
+    DB_REPEATED_QUERY_THRESHOLD = int(os.environ.get('DB_REPEATED_QUERY_THRESHOLD', 5))
+    # uwsgi runs 4 single threaded processes, each one only needs a few connections
+    # for the request being served, the events relay and the SSE streams
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 10))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 10000))
+    # Comma separated list among zstd, snappy and zlib, empty disables compression
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')
+    # GET traffic read preference: primary, primaryPreferred, secondary,
+    # secondaryPreferred or nearest. Max staleness must be at least 90s, -1 disables it
+    READ_PREFERENCE = os.environ.get('READ_PREFERENCE', 'primary')
+    READ_MAX_STALENESS_SECONDS = int(os.environ.get('READ_MAX_STALENESS_SECONDS', -1))
+    # Ties each request to a causally consistent session and exchanges its
+    # cluster time with clients through the X-Consistency-Token header
+    CAUSAL_CONSISTENCY = os.environ.get('CAUSAL_CONSISTENCY', 'true').lower() == 'true'
+    # Write concern profile (durable, acknowledged or fast) of each operation type
+    WRITE_CONCERN_SINGLE = os.environ.get('WRITE_CONCERN_SINGLE', 'durable')
+    WRITE_CONCERN_BULK = os.environ.get('WRITE_CONCERN_BULK', 'fast')
+    WRITE_CONCERN_IMPORT = os.environ.get('WRITE_CONCERN_IMPORT', 'fast')
+    # Profiles a request may opt into through the X-Write-Concern header
+    WRITE_CONCERN_ALLOWED_OVERRIDES = [
+        profile for profile in os.environ.get('WRITE_CONCERN_ALLOWED_OVERRIDES', '').split(',') if profile
+    ]
+    # Deadline shared by the Mongo operations of a request, clients may ask
+    # for a shorter one through the X-Request-Timeout header
+    REQUEST_TIMEOUT_SECONDS = float(os.environ.get('REQUEST_TIMEOUT_SECONDS', 10))
+    REQUEST_MAX_TIMEOUT_SECONDS = float(os.environ.get('REQUEST_MAX_TIMEOUT_SECONDS', 30))
+    # Concurrent identical reads of a process share one database call
+    SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    # Opt-in group commit: creates arriving within the window are validated and
+    # inserted together. Only pays off when a process serves requests concurrently
+    WRITE_COALESCING_ENABLED = os.environ.get('WRITE_COALESCING_ENABLED', 'false').lower() == 'true'
+    WRITE_COALESCING_WINDOW_MS = float(os.environ.get('WRITE_COALESCING_WINDOW_MS', 2))
+    WRITE_COALESCING_MAX_BATCH_SIZE = int(os.environ.get('WRITE_COALESCING_MAX_BATCH_SIZE', 100))
+    # Ids looked up and not found are answered from memory for a while,
+    # a size of zero disables the cache
+    NEGATIVE_CACHE_TTL_SECONDS = float(os.environ.get('NEGATIVE_CACHE_TTL_SECONDS', 60))
+    NEGATIVE_CACHE_MAX_SIZE = int(os.environ.get('NEGATIVE_CACHE_MAX_SIZE', 10000))
+    # Ids of planets and films seen to exist lately, which write reference
+    # validation trusts without a query. Reference cleanup jobs of a removal
+    # wait for this long, other processes may still trust the removed id
+    REFERENCE_IDS_TTL_SECONDS = float(os.environ.get('REFERENCE_IDS_TTL_SECONDS', 30))
+    REFERENCE_IDS_MAX_SIZE = int(os.environ.get('REFERENCE_IDS_MAX_SIZE', 10000))
+    # The last good item reads are served stale for a while when the database
+    # is failing. A fresh window serves them from memory even when it is not,
+    # but writes only invalidate the process that served them, so other
+    # processes may answer with the previous version until it ends
+    ITEM_CACHE_FRESH_SECONDS = float(os.environ.get('ITEM_CACHE_FRESH_SECONDS', 0))
+    ITEM_CACHE_STALE_IF_ERROR_SECONDS = float(os.environ.get('ITEM_CACHE_STALE_IF_ERROR_SECONDS', 300))
+    ITEM_CACHE_MAX_SIZE = int(os.environ.get('ITEM_CACHE_MAX_SIZE', 10000))
+    # Consecutive database failures that open the circuit, and how long it stays open
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+    CIRCUIT_RESET_SECONDS = float(os.environ.get('CIRCUIT_RESET_SECONDS', 10))
+    # Idempotency keys reserved for longer than this by a request that never
+    # responded are taken over by the next retry
+    IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+    # Requests that waited in the proxy and uwsgi queues (X-Request-Start)
+    # longer than the budget are shed before being served. The budget starts
+    # at the max, is multiplied by the backoff after each request slower than
+    # the target latency and grows by the increase after each faster one,
+    # within the min and max. Writes get a share of it, so they are shed first
+    LOAD_SHED_ENABLED = os.environ.get('LOAD_SHED_ENABLED', 'true').lower() == 'true'
+    LOAD_SHED_WRITE_SHARE = float(os.environ.get('LOAD_SHED_WRITE_SHARE', 0.75))
+    LOAD_SHED_MIN_QUEUE_MS = float(os.environ.get('LOAD_SHED_MIN_QUEUE_MS', 50))
+    LOAD_SHED_MAX_QUEUE_MS = float(os.environ.get('LOAD_SHED_MAX_QUEUE_MS', 1000))
+    LOAD_SHED_TARGET_LATENCY_MS = float(os.environ.get('LOAD_SHED_TARGET_LATENCY_MS', 250))
+    LOAD_SHED_BACKOFF = float(os.environ.get('LOAD_SHED_BACKOFF', 0.9))
+    LOAD_SHED_INCREASE_MS = float(os.environ.get('LOAD_SHED_INCREASE_MS', 10))
+    # Token buckets per client (X-Api-Key or IP) on the planets and films
+    # endpoints, as <requests>/<seconds> per route group. "memory" keeps one
+    # per process, "mongo" shares them between uwsgi processes at the cost of
+    # a round trip to Mongo on every request
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_READ = os.environ.get('RATE_LIMIT_READ', '300/60')
+    RATE_LIMIT_WRITE = os.environ.get('RATE_LIMIT_WRITE', '60/60')
+    # Comma separated addresses or networks of the proxies whose X-Real-IP and
+    # X-Forwarded-For identify the client, the peer address is used otherwise
+    RATE_LIMIT_TRUSTED_PROXIES = os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '')
+    # "all" serves every endpoint, "interactive" refuses the bulk and stream
+    # lane ones (nginx routes them to the bulk and stream services), "bulk"
+    # and "stream" are those services and refuse each other's endpoints
+    EXECUTION_LANE = os.environ.get('EXECUTION_LANE', 'all')
+    # Bulk lane requests a process serves at once, the others get a 503
+    BULK_LANE_MAX_CONCURRENT = int(os.environ.get('BULK_LANE_MAX_CONCURRENT', 1))
+    # Event streams a process keeps open at once, the others get a 503. Each
+    # one holds a uwsgi thread for up to STREAM_MAX_SECONDS, so this must stay
+    # under the threads of the stream service; a single threaded process with
+    # the "all" lane gives a whole worker to every subscriber
+    STREAM_LANE_MAX_CONNECTIONS = int(os.environ.get('STREAM_LANE_MAX_CONNECTIONS', 1))
+    # NDJSON imports are read, validated and inserted this many lines at a time
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    IMPORT_MAX_LINE_BYTES = int(os.environ.get('IMPORT_MAX_LINE_BYTES', 65536))
+    # Exports fetch this many documents per cursor round trip and stream them
+    # as they arrive, gzipped with EXPORT_GZIP_LEVEL when the client accepts it
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    EXPORT_GZIP_LEVEL = int(os.environ.get('EXPORT_GZIP_LEVEL', 6))
+    # Threads running background jobs in each uwsgi process, 0 leaves them to
+    # `flask run-worker`. Idle workers poll every JOBS_POLL_SECONDS and a claimed
+    # job that reports no progress for JOBS_LEASE_SECONDS is run again elsewhere
+    JOBS_WORKER_THREADS = int(os.environ.get('JOBS_WORKER_THREADS', 1))
+    JOBS_POLL_SECONDS = float(os.environ.get('JOBS_POLL_SECONDS', 1))
+    JOBS_LEASE_SECONDS = float(os.environ.get('JOBS_LEASE_SECONDS', 60))
+    # Failed jobs are retried after JOBS_RETRY_DELAY_SECONDS, doubled on each attempt
+    JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+    JOBS_RETRY_DELAY_SECONDS = float(os.environ.get('JOBS_RETRY_DELAY_SECONDS', 5))
+    # Documents a job step handles before reporting progress
+    JOBS_BATCH_SIZE = int(os.environ.get('JOBS_BATCH_SIZE', 500))
+    # Admin endpoints require the X-Admin-Token header. Without a token they
+    # are refused, except in Testing and Development where they are open
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    ADMIN_OPEN_WITHOUT_TOKEN = False
 
 
 class TestingConfig(BaseConfig):
@@ -18,12 +159,22 @@ class TestingConfig(BaseConfig):
     TESTING = True
     LOGS_LEVEL = logging.CRITICAL
     MONGO_URI = "mongodb://server.test.com"
+    EVENTS_RELAY = "memory"
+    CAUSAL_CONSISTENCY = False
+    RATE_LIMIT_BACKEND = "memory"
+    JOBS_WORKER_THREADS = 0
+    LOAD_SHED_ENABLED = False
+    ADMIN_OPEN_WITHOUT_TOKEN = True
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
+    ADMIN_OPEN_WITHOUT_TOKEN = True
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/api_starwars')
 
 
 class ProductionConfig(BaseConfig):
     LOGS_LEVEL = os.environ.get('LOGS_LEVEL', 'INFO')
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 2))
+    # zlib ships with Python, zstd and snappy need the zstandard/python-snappy packages
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zlib')
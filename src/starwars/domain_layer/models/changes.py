@@ -0,0 +1,58 @@
+import base64
+import binascii
+import json
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+
+class InvalidChangeToken(Exception):
+    pass
+
+
+@dataclass
+class ChangeToken:
+    edited: datetime
+    id: str
+
+    def encode(self) -> str:
+        payload = json.dumps({"edited": self.edited.isoformat(), "id": self.id})
+
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "ChangeToken":
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+
+            return cls(
+                edited=datetime.fromisoformat(payload["edited"]),
+                id=payload["id"]
+            )
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidChangeToken(f"{token} is not a valid change token.")
+
+
+@dataclass
+class Change:
+    id: str
+    edited: datetime
+    deleted: bool
+    resource: Optional[Any]
+
+    @property
+    def token(self) -> ChangeToken:
+        return ChangeToken(edited=self.edited, id=self.id)
+
+    def as_dict(self, resource_name: str) -> dict:
+        data = {
+            "id": self.id,
+            "deleted": self.deleted,
+            "edited": self.edited.isoformat()
+        }
+
+        if not self.deleted:
+            data[resource_name] = self.resource.as_dict()
+
+        return data
@@ -1,7 +1,10 @@
-from dataclasses import dataclass
-from typing import List, Optional, Type
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple, Type
 
-from starwars.domain_layer.ports.films import FilmsService
+from starwars.domain_layer.models.changes import Change, ChangeToken
+from starwars.domain_layer.ports.films import FilmsService, InvalidFilm
+
+FILM_FIELDS = ("title", "release_date", "director", "planets", "created", "edited")
 
 
 @dataclass
@@ -13,6 +16,7 @@ class Film:
     planets: Optional[List[str]]
     created: Optional[str]
     edited: Optional[str]
+    loaded_fields: Optional[List[str]] = field(default=None, repr=False)
 
     @classmethod
     def create_film(
@@ -65,17 +69,19 @@ class Film:
     @classmethod
     def get_film(
         cls,
-        film: dict
+        film: dict,
+        fields: Optional[List[str]] = None
     ) -> "Film":
         if film:
             return cls(
                 id=film["id"],
-                title=film["title"],
+                title=film["title"] if not fields else film.get("title", None),
                 release_date=film.get("release_date", None),
                 director=film.get("director", None),
                 planets=film.get("planets", []),
                 created=film.get("created", None),
-                edited=film.get("edited", None)
+                edited=film.get("edited", None),
+                loaded_fields=fields
             )
         
         return None
@@ -84,27 +90,174 @@ class Film:
     def get_film_by_id(
         cls,
         id: str,
-        using_service: Type[FilmsService]
+        using_service: Type[FilmsService],
+        fields: Optional[List[str]] = None
+    ) -> Optional["Film"]:
+        cls.validate_fields(fields)
+
+        film = using_service.get_film_by_id(id=id, fields=fields)
+
+        return cls.get_film(film=film, fields=fields)
+
+    @classmethod
+    def get_films_by_ids(
+        cls,
+        ids: List[str],
+        using_service: Type[FilmsService],
+        fields: Optional[List[str]] = None
+    ) -> List["Film"]:
+        cls.validate_fields(fields)
+
+        films = using_service.get_films_by_ids(ids=ids, fields=fields)
+
+        return [cls.get_film(film=film, fields=fields) for film in films]
+
+    @classmethod
+    def get_film_by_title(
+        cls,
+        title: str,
+        using_service: Type[FilmsService],
+        fields: Optional[List[str]] = None
     ) -> Optional["Film"]:
-        film = using_service.get_film_by_id(id=id)
+        cls.validate_fields(fields)
 
-        return cls.get_film(film=film)
+        film = using_service.get_film_by_title(title=title, fields=fields)
+
+        return cls.get_film(film=film, fields=fields)
+
+    @classmethod
+    def upsert_film_by_title(
+        cls,
+        title: str,
+        release_date: Optional[str],
+        director: Optional[str],
+        planets: List[str],
+        using_service: Type[FilmsService]
+    ) -> Tuple["Film", bool]:
+        film_data = {
+            "title": title,
+            "release_date": release_date,
+            "director": director,
+            "planets": planets
+        }
+
+        film, created = using_service.upsert_film_by_title(**film_data)
+
+        return cls.get_film(film=film), created
+
+    @classmethod
+    def get_films_changes(
+        cls,
+        since: Optional[ChangeToken],
+        limit: int,
+        using_service: Type[FilmsService]
+    ) -> List[Change]:
+        documents = using_service.get_films_changes(
+            since_edited=since.edited if since else None,
+            since_id=since.id if since else None,
+            limit=limit
+        )
+
+        return [
+            Change(
+                id=document["id"],
+                edited=document["edited"],
+                deleted=document.get("deleted", False),
+                resource=None if document.get("deleted") else cls.get_film(film=document)
+            )
+            for document in documents
+        ]
+
+    @staticmethod
+    def validate_fields(fields: Optional[List[str]]) -> None:
+        # id is always returned, asking for it is allowed but changes nothing
+        unknown_fields = [
+            name for name in fields or [] if name != "id" and name not in FILM_FIELDS
+        ]
+
+        if unknown_fields:
+            raise InvalidFilm(f"Unknown film fields: {', '.join(unknown_fields)}")
 
     @classmethod
     def remove_film(
         cls,
         id: str,
         using_service: Type[FilmsService]
-    ) -> None:
-        using_service.remove_film(id=id)
+    ) -> bool:
+        return using_service.remove_film(id=id)
+
+    @classmethod
+    def export_films(
+        cls,
+        batch_size: int,
+        using_service: Type[FilmsService],
+        fields: Optional[List[str]] = None
+    ) -> Iterator["Film"]:
+        cls.validate_fields(fields)
+
+        films = using_service.export_films(batch_size=batch_size, fields=fields)
+
+        return (cls.get_film(film=film, fields=fields) for film in films)
+
+    @classmethod
+    def import_films(
+        cls,
+        films: List[dict],
+        using_service: Type[FilmsService]
+    ) -> List:
+        return using_service.import_films(films=films)
+
+    @staticmethod
+    def validate_film_data(data) -> dict:
+        """Checks a film read from an untrusted source, e.g. a line of an import"""
+
+        if not isinstance(data, dict):
+            raise InvalidFilm("A film must be a JSON object")
+
+        if not isinstance(data.get("title"), str) or not data["title"]:
+            raise InvalidFilm("A film must have a title")
+
+        for name in ("release_date", "director"):
+            if not isinstance(data.get(name), (str, type(None))):
+                raise InvalidFilm(f"Film {name} must be a string")
+
+        planets = data.get("planets") or []
+
+        if not isinstance(planets, list) or not all(isinstance(id, str) for id in planets):
+            raise InvalidFilm("Film planets must be a list of planet ids")
 
-    def as_dict(self) -> dict:
         return {
+            "title": data["title"],
+            "release_date": data.get("release_date"),
+            "director": data.get("director"),
+            "planets": planets
+        }
+
+    @classmethod
+    def remove_planet_references(
+        cls,
+        planet_id: str,
+        limit: int,
+        using_service: Type[FilmsService]
+    ) -> List[str]:
+        return using_service.remove_planet_references(planet_id=planet_id, limit=limit)
+
+    def as_dict(self) -> dict:
+        data = {
             "id": self.id,
             "title": self.title,
             "release_date": self.release_date,
             "director": self.director,
             "planets": self.planets,
-            "created": self.created.isoformat(),
-            "edited": self.edited.isoformat()
-        }
\ No newline at end of file
+            "created": self.created.isoformat() if self.created else None,
+            "edited": self.edited.isoformat() if self.edited else None
+        }
+
+        if not self.loaded_fields:
+            return data
+
+        # Partial documents only expose the projected fields
+        return {
+            key: value for key, value in data.items()
+            if key == "id" or key in self.loaded_fields
+        }
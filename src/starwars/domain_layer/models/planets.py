@@ -1,7 +1,10 @@
-from dataclasses import dataclass
-from typing import List, Optional, Type
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple, Type
 
-from starwars.domain_layer.ports.planets import PlanetsService
+from starwars.domain_layer.models.changes import Change, ChangeToken
+from starwars.domain_layer.ports.planets import InvalidPlanet, PlanetsService
+
+PLANET_FIELDS = ("name", "climate", "diameter", "population", "films", "created", "edited")
 
 
 @dataclass
@@ -14,6 +17,7 @@ class Planet():
     films: Optional[List[str]]
     created: Optional[str]
     edited: Optional[str]
+    loaded_fields: Optional[List[str]] = field(default=None, repr=False)
 
     @classmethod
     def create_planet(
@@ -70,18 +74,20 @@ class Planet():
     @classmethod
     def get_planet(
         cls,
-        planet: dict
+        planet: dict,
+        fields: Optional[List[str]] = None
     ) -> "Planet":
         if planet:
             return cls(
                 id=planet["id"],
-                name=planet["name"],
+                name=planet["name"] if not fields else planet.get("name", None),
                 climate=planet.get("climate", None),
                 diameter=planet.get("diameter", None),
                 population=planet.get("population", None),
                 films=planet.get("films", []),
                 created=planet.get("created", None),
-                edited=planet.get("edited", None)
+                edited=planet.get("edited", None),
+                loaded_fields=fields
             )
         
         return None
@@ -90,28 +96,178 @@ class Planet():
     def get_planet_by_id(
         cls,
         id: str,
-        using_service: Type[PlanetsService]
+        using_service: Type[PlanetsService],
+        fields: Optional[List[str]] = None
+    ) -> Optional["Planet"]:
+        cls.validate_fields(fields)
+
+        planet = using_service.get_planet_by_id(id=id, fields=fields)
+
+        return cls.get_planet(planet=planet, fields=fields)
+
+    @classmethod
+    def get_planets_by_ids(
+        cls,
+        ids: List[str],
+        using_service: Type[PlanetsService],
+        fields: Optional[List[str]] = None
+    ) -> List["Planet"]:
+        cls.validate_fields(fields)
+
+        planets = using_service.get_planets_by_ids(ids=ids, fields=fields)
+
+        return [cls.get_planet(planet=planet, fields=fields) for planet in planets]
+
+    @classmethod
+    def get_planet_by_name(
+        cls,
+        name: str,
+        using_service: Type[PlanetsService],
+        fields: Optional[List[str]] = None
     ) -> Optional["Planet"]:
-        planet = using_service.get_planet_by_id(id=id)
+        cls.validate_fields(fields)
+
+        planet = using_service.get_planet_by_name(name=name, fields=fields)
+
+        return cls.get_planet(planet=planet, fields=fields)
+
+    @classmethod
+    def upsert_planet_by_name(
+        cls,
+        name: str,
+        climate: Optional[str],
+        diameter: Optional[str],
+        population: Optional[str],
+        films: List[str],
+        using_service: Type[PlanetsService]
+    ) -> Tuple["Planet", bool]:
+        planet_data = {
+            "name": name,
+            "climate": climate,
+            "diameter": diameter,
+            "population": population,
+            "films": films
+        }
+
+        planet, created = using_service.upsert_planet_by_name(**planet_data)
+
+        return cls.get_planet(planet=planet), created
+
+    @classmethod
+    def get_planets_changes(
+        cls,
+        since: Optional[ChangeToken],
+        limit: int,
+        using_service: Type[PlanetsService]
+    ) -> List[Change]:
+        documents = using_service.get_planets_changes(
+            since_edited=since.edited if since else None,
+            since_id=since.id if since else None,
+            limit=limit
+        )
 
-        return cls.get_planet(planet=planet)
+        return [
+            Change(
+                id=document["id"],
+                edited=document["edited"],
+                deleted=document.get("deleted", False),
+                resource=None if document.get("deleted") else cls.get_planet(planet=document)
+            )
+            for document in documents
+        ]
+
+    @staticmethod
+    def validate_fields(fields: Optional[List[str]]) -> None:
+        # id is always returned, asking for it is allowed but changes nothing
+        unknown_fields = [
+            name for name in fields or [] if name != "id" and name not in PLANET_FIELDS
+        ]
+
+        if unknown_fields:
+            raise InvalidPlanet(f"Unknown planet fields: {', '.join(unknown_fields)}")
     
     @classmethod
     def remove_planet(
         cls,
         id: str,
         using_service: Type[PlanetsService]
-    ) -> None:
-        using_service.remove_planet(id=id)
+    ) -> bool:
+        return using_service.remove_planet(id=id)
+
+    @classmethod
+    def export_planets(
+        cls,
+        batch_size: int,
+        using_service: Type[PlanetsService],
+        fields: Optional[List[str]] = None
+    ) -> Iterator["Planet"]:
+        cls.validate_fields(fields)
+
+        planets = using_service.export_planets(batch_size=batch_size, fields=fields)
+
+        return (cls.get_planet(planet=planet, fields=fields) for planet in planets)
+
+    @classmethod
+    def import_planets(
+        cls,
+        planets: List[dict],
+        using_service: Type[PlanetsService]
+    ) -> List:
+        return using_service.import_planets(planets=planets)
+
+    @staticmethod
+    def validate_planet_data(data) -> dict:
+        """Checks a planet read from an untrusted source, e.g. a line of an import"""
+
+        if not isinstance(data, dict):
+            raise InvalidPlanet("A planet must be a JSON object")
+
+        if not isinstance(data.get("name"), str) or not data["name"]:
+            raise InvalidPlanet("A planet must have a name")
+
+        for name in ("climate", "diameter", "population"):
+            if not isinstance(data.get(name), (str, type(None))):
+                raise InvalidPlanet(f"Planet {name} must be a string")
+
+        films = data.get("films") or []
+
+        if not isinstance(films, list) or not all(isinstance(id, str) for id in films):
+            raise InvalidPlanet("Planet films must be a list of film ids")
+
+        return {
+            "name": data["name"],
+            "climate": data.get("climate"),
+            "diameter": data.get("diameter"),
+            "population": data.get("population"),
+            "films": films
+        }
+
+    @classmethod
+    def remove_film_references(
+        cls,
+        film_id: str,
+        limit: int,
+        using_service: Type[PlanetsService]
+    ) -> List[str]:
+        return using_service.remove_film_references(film_id=film_id, limit=limit)
     
     def as_dict(self) -> dict:
-        return {
+        data = {
             "id": self.id,
             "name": self.name,
             "climate": self.climate,
             "diameter": self.diameter,
             "population": self.population,
             "films": self.films,
-            "created": self.created.isoformat(),
-            "edited": self.edited.isoformat()
+            "created": self.created.isoformat() if self.created else None,
+            "edited": self.edited.isoformat() if self.edited else None
+        }
+
+        if not self.loaded_fields:
+            return data
+
+        # Partial documents only expose the projected fields
+        return {
+            key: value for key, value in data.items()
+            if key == "id" or key in self.loaded_fields
         }
@@ -1,5 +1,6 @@
 from abc import ABC
-from typing import List
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
 
 class DuplicatedFilm(Exception):
@@ -33,9 +34,48 @@ class FilmsService(ABC):
         raise NotImplementedError
     
     @classmethod
-    def get_film_by_id(cls, id: str):
+    def get_film_by_id(cls, id: str, fields: Optional[List[str]] = None):
+        raise NotImplementedError
+
+    @classmethod
+    def get_films_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
         raise NotImplementedError
     
     @classmethod
     def remove_film(cls, id: str):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @classmethod
+    def get_film_by_title(cls, title: str, fields: Optional[List[str]] = None):
+        raise NotImplementedError
+
+    @classmethod
+    def upsert_film_by_title(
+        cls,
+        title: str,
+        release_date: str,
+        director: str,
+        planets: List[str]
+    ) -> Tuple[dict, bool]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_films_changes(
+        cls,
+        since_edited: Optional[datetime],
+        since_id: Optional[str],
+        limit: int
+    ):
+        raise NotImplementedError
+
+    @classmethod
+    def export_films(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[dict]:
+        raise NotImplementedError
+
+    @classmethod
+    def import_films(cls, films: List[dict]) -> List:
+        raise NotImplementedError
+
+    @classmethod
+    def remove_planet_references(cls, planet_id: str, limit: int) -> List[str]:
+        raise NotImplementedError
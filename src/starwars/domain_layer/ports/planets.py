@@ -1,5 +1,6 @@
 from abc import ABC
-from typing import List
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
 class DuplicatedPlanet(Exception):
     pass
@@ -34,9 +35,49 @@ class PlanetsService(ABC):
         raise NotImplementedError
 
     @classmethod
-    def get_planet_by_id(cls, id: str):
+    def get_planet_by_id(cls, id: str, fields: Optional[List[str]] = None):
+        raise NotImplementedError
+
+    @classmethod
+    def get_planets_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
         raise NotImplementedError
     
     @classmethod
     def remove_planet(cls, id: str):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @classmethod
+    def get_planet_by_name(cls, name: str, fields: Optional[List[str]] = None):
+        raise NotImplementedError
+
+    @classmethod
+    def upsert_planet_by_name(
+        cls,
+        name: str,
+        climate: str,
+        diameter: str,
+        population: str,
+        films: List[str]
+    ) -> Tuple[dict, bool]:
+        raise NotImplementedError
+
+    @classmethod
+    def get_planets_changes(
+        cls,
+        since_edited: Optional[datetime],
+        since_id: Optional[str],
+        limit: int
+    ):
+        raise NotImplementedError
+
+    @classmethod
+    def export_planets(cls, batch_size: int, fields: Optional[List[str]] = None) -> Iterator[dict]:
+        raise NotImplementedError
+
+    @classmethod
+    def import_planets(cls, planets: List[dict]) -> List:
+        raise NotImplementedError
+
+    @classmethod
+    def remove_film_references(cls, film_id: str, limit: int) -> List[str]:
+        raise NotImplementedError
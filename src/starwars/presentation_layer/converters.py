@@ -0,0 +1,8 @@
+from werkzeug.routing import BaseConverter
+
+
+class ObjectIdConverter(BaseConverter):
+    """Only matches 24 hex digit ids, anything else is a 404 from routing
+    before a view or the database is reached"""
+
+    regex = "[0-9a-fA-F]{24}"
@@ -0,0 +1,31 @@
+import math
+
+from werkzeug.exceptions import NotFound
+
+from starwars.application_layer.persistency.circuit_breaker import CircuitOpen
+from starwars.application_layer.persistency.deadlines import (
+    is_database_unavailable,
+    is_deadline_exceeded
+)
+
+
+def error_response(error: Exception):
+    """Maps unexpected errors raised while serving a request to a response"""
+
+    if isinstance(error, CircuitOpen):
+        return {"message": str(error)}, 503, {"Retry-After": str(max(math.ceil(error.retry_after), 1))}
+
+    if is_database_unavailable(error):
+        return {"message": "Database unavailable, try again later"}, 503, {"Retry-After": "1"}
+
+    if is_deadline_exceeded(error):
+        return {"message": "Request deadline exceeded"}, 504
+
+    return {"message": str(error)}, 400
+
+
+def not_found_response(error: NotFound):
+    """Routing misses, e.g. ids the objectid converter rejects, answer in JSON
+    like the rest of the API instead of Werkzeug's HTML page"""
+
+    return {"message": error.description}, 404
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import logging
+import zlib
+
+from typing import Iterable, Iterator, List, Optional
+
+from flask import Response, request, stream_with_context
+
+from starwars.presentation_layer.ndjson import NDJSON_MIMETYPE
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+NDJSON = "ndjson"
+CSV = "csv"
+EXPORT_FORMATS = {NDJSON: NDJSON_MIMETYPE, CSV: "text/csv"}
+
+
+class InvalidExportFormat(Exception):
+    pass
+
+
+def parse_export_format(value: Optional[str]) -> str:
+    if value is None:
+        return NDJSON
+
+    if value not in EXPORT_FORMATS:
+        raise InvalidExportFormat(f"format must be one of {', '.join(EXPORT_FORMATS)}, got {value}")
+
+    return value
+
+
+def _ndjson_chunks(batches: Iterable[List[dict]]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(json.dumps(item) + "\n" for item in batch)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+
+    # References go in a single cell, e.g. the films of a planet
+    if isinstance(value, list):
+        return ",".join(value)
+
+    return value
+
+
+def _csv_chunks(batches: Iterable[List[dict]], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+
+    for batch in batches:
+        for item in batch:
+            writer.writerow([_csv_value(item.get(column)) for column in columns])
+
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Empty collections still get their header
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    # A sync flush per batch sends every batch as soon as it is read, at the
+    # cost of a few bytes, instead of waiting for the compressor buffer to fill
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+
+def export_response(
+    batches: Iterable[List[dict]],
+    columns: List[str],
+    format: str,
+    filename: str,
+    gzip_level: int,
+    request_path: str
+) -> Response:
+    """Streams batches of resources as NDJSON or CSV while they are read, gzipped
+    when the client accepts it. Once the status is sent a failure can only cut
+    the transfer short, which clients see as an incomplete body"""
+
+    if format == CSV:
+        chunks = (chunk.encode() for chunk in _csv_chunks(batches, columns))
+    else:
+        chunks = (chunk.encode() for chunk in _ndjson_chunks(batches))
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+
+    if request.accept_encodings["gzip"]:
+        chunks = _gzip_chunks(chunks, gzip_level)
+        headers["Content-Encoding"] = "gzip"
+
+    def _generate():
+        try:
+            yield from chunks
+
+        except Exception as e:
+            logger.exception(
+                "Export interrupted",
+                extra={
+                    "props": {
+                        "request": request_path,
+                        "format": format,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            raise e
+
+    return Response(
+        stream_with_context(_generate()),
+        mimetype=EXPORT_FORMATS[format],
+        headers=headers
+    )
@@ -0,0 +1,86 @@
+import functools
+import hashlib
+import logging
+
+from flask import current_app, request
+
+from starwars.application_layer.adapters.idempotency_repository import IdempotencyRepository
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def _body_and_status(result) -> tuple:
+    if not isinstance(result, tuple):
+        return result, 200
+
+    return result[0], result[1]
+
+
+def idempotent(view):
+    """Stores the first response to a request carrying an Idempotency-Key and
+    replays it for the retries, so they never reach the use case again"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+
+        if not key:
+            return view(*args, **kwargs)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return {
+                "message": f"{IDEMPOTENCY_KEY_HEADER} must have at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            }, 400
+
+        # Keys are scoped by endpoint, the same key may be reused on another one
+        scoped_key = f"{request.method} {request.path} {key}"
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+        record = IdempotencyRepository.reserve(
+            scoped_key, fingerprint, lock_seconds=current_app.config["IDEMPOTENCY_LOCK_SECONDS"]
+        )
+
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                return {"message": f"{IDEMPOTENCY_KEY_HEADER} {key} was used with another payload"}, 422
+
+            if record["response"] is None:
+                return {"message": f"A request with {IDEMPOTENCY_KEY_HEADER} {key} is in progress"}, 409, {
+                    "Retry-After": "1"
+                }
+
+            logger.info(
+                "Replaying idempotent response",
+                extra={
+                    "props": {
+                        "request": request.path,
+                        "method": request.method,
+                        "key": key,
+                    }
+                },
+            )
+
+            response = record["response"]
+            return response["body"], response["status"], {IDEMPOTENCY_REPLAYED_HEADER: "true"}
+
+        try:
+            result = view(*args, **kwargs)
+        except Exception:
+            IdempotencyRepository.release(scoped_key)
+            raise
+
+        body, status = _body_and_status(result)
+
+        # Server errors are not final, the retry must be processed again
+        if status >= 500:
+            IdempotencyRepository.release(scoped_key)
+        else:
+            IdempotencyRepository.complete(scoped_key, status, body)
+
+        return result
+
+    return wrapper
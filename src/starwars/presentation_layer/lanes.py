@@ -0,0 +1,84 @@
+import functools
+import threading
+
+from flask import Response
+
+ALL = "all"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+STREAM = "stream"
+LANES = (ALL, INTERACTIVE, BULK, STREAM)
+
+
+class ExecutionLanes:
+    """Keeps heavy endpoints (imports, exports, cascades) and long lived ones
+    (event streams) off the workers that serve interactive reads. The "bulk"
+    and "stream" deployments run them on their own uwsgi processes and Mongo
+    pool, the others refuse them, and every process only serves a bounded
+    number of them at once"""
+
+    def __init__(self):
+        self.lane = ALL
+        self.bulk_max_concurrent = 1
+        self.stream_max_connections = 1
+        self._bulk_slots = threading.BoundedSemaphore(self.bulk_max_concurrent)
+        self._stream_slots = threading.BoundedSemaphore(self.stream_max_connections)
+
+    def init_app(self, app):
+        if app.config["EXECUTION_LANE"] not in LANES:
+            raise ValueError(f"Unknown execution lane {app.config['EXECUTION_LANE']}")
+
+        self.lane = app.config["EXECUTION_LANE"]
+        self.bulk_max_concurrent = app.config["BULK_LANE_MAX_CONCURRENT"]
+        self.stream_max_connections = app.config["STREAM_LANE_MAX_CONNECTIONS"]
+        self._bulk_slots = threading.BoundedSemaphore(self.bulk_max_concurrent)
+        self._stream_slots = threading.BoundedSemaphore(self.stream_max_connections)
+
+    def bulk(self, view):
+        return self._serve_on(
+            BULK,
+            lambda: self._bulk_slots,
+            "Bulk operations are not served by this instance",
+            "Bulk lane busy, try again later",
+            view
+        )
+
+    def stream(self, view):
+        return self._serve_on(
+            STREAM,
+            lambda: self._stream_slots,
+            "Event streams are not served by this instance",
+            "Too many event streams open, try again later",
+            view
+        )
+
+    def _serve_on(self, lane: str, slots, refused_message: str, busy_message: str, view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if self.lane not in (ALL, lane):
+                return {"message": refused_message}, 503, {"Retry-After": "1"}
+
+            # Looked up per request, init_app replaces the semaphores
+            lane_slots = slots()
+
+            if not lane_slots.acquire(blocking=False):
+                return {"message": busy_message}, 503, {"Retry-After": "1"}
+
+            try:
+                result = view(*args, **kwargs)
+            except BaseException:
+                lane_slots.release()
+                raise
+
+            # Streamed responses hold the slot until the body is fully sent
+            if isinstance(result, Response):
+                result.call_on_close(lane_slots.release)
+            else:
+                lane_slots.release()
+
+            return result
+
+        return wrapper
+
+
+lanes = ExecutionLanes()
@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+import time
+
+from collections import Counter
+from typing import Optional
+
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+REQUEST_START_HEADER = "HTTP_X_REQUEST_START"
+
+CRITICAL = "critical"
+READ = "read"
+WRITE = "write"
+
+# Long lived and bulk responses are bounded by their own lanes instead
+EXEMPT_PREFIXES = ("/api/stream",)
+EXEMPT_SUFFIXES = ("/import", "/export")
+CRITICAL_PATHS = ("/health-status",)
+
+
+def request_priority(environ: dict) -> Optional[str]:
+    path = environ.get("PATH_INFO", "")
+
+    if path.startswith(EXEMPT_PREFIXES) or path.endswith(EXEMPT_SUFFIXES):
+        return None
+
+    if path in CRITICAL_PATHS:
+        return CRITICAL
+
+    return READ if environ.get("REQUEST_METHOD") in ("GET", "HEAD", "OPTIONS") else WRITE
+
+
+def queued_seconds(environ: dict) -> Optional[float]:
+    """Time spent between the proxy and the app, from nginx's X-Request-Start: t=<msec>"""
+
+    value = environ.get(REQUEST_START_HEADER)
+
+    if not value:
+        return None
+
+    try:
+        started = float(value[2:] if value.startswith("t=") else value)
+    except ValueError:
+        return None
+
+    return max(time.time() - started, 0.0)
+
+
+class AdaptiveLoadShedder:
+    """Wraps the WSGI app and sheds requests that waited in the proxy and uwsgi
+    queues past a budget, before any work is spent on them. The wait is read
+    from nginx's X-Request-Start, so it covers every process of the instance
+    alike. The budget adapts to the latency of the requests served (AIMD): it
+    is cut by the backoff factor whenever one takes longer than the target and
+    grows back by a fixed step while they don't. Writes only get a share of
+    the budget, so they are shed before reads, and health checks are always
+    admitted"""
+
+    def __init__(self):
+        self.enabled = False
+        self.write_share = 0.75
+        self.min_queue_seconds = 0.05
+        self.max_queue_seconds = 1.0
+        self.queue_budget = 1.0
+        self.target_latency = 0.25
+        self.backoff = 0.9
+        self.increase_seconds = 0.01
+        self.shed = Counter()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config["LOAD_SHED_ENABLED"]
+        self.write_share = app.config["LOAD_SHED_WRITE_SHARE"]
+        self.min_queue_seconds = app.config["LOAD_SHED_MIN_QUEUE_MS"] / 1000
+        self.max_queue_seconds = app.config["LOAD_SHED_MAX_QUEUE_MS"] / 1000
+        self.queue_budget = self.max_queue_seconds
+        self.target_latency = app.config["LOAD_SHED_TARGET_LATENCY_MS"] / 1000
+        self.backoff = app.config["LOAD_SHED_BACKOFF"]
+        self.increase_seconds = app.config["LOAD_SHED_INCREASE_MS"] / 1000
+        self.shed.clear()
+
+        if self.enabled:
+            wsgi_app = app.wsgi_app
+            app.wsgi_app = lambda environ, start_response: self(wsgi_app, environ, start_response)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_budget_ms": round(self.queue_budget * 1000, 3),
+                "min_queue_ms": self.min_queue_seconds * 1000,
+                "max_queue_ms": self.max_queue_seconds * 1000,
+                "target_latency_ms": self.target_latency * 1000,
+                "shed": dict(self.shed),
+            }
+
+    def __call__(self, wsgi_app, environ, start_response):
+        priority = request_priority(environ)
+
+        if priority is None or priority == CRITICAL:
+            return wsgi_app(environ, start_response)
+
+        reason = self._admit(priority, queued_seconds(environ))
+
+        if reason:
+            return self._reject(priority, reason, environ, start_response)
+
+        started = time.monotonic()
+
+        def _observe():
+            self.observe(time.monotonic() - started)
+
+        try:
+            return ClosingIterator(wsgi_app(environ, start_response), [_observe])
+        except Exception:
+            _observe()
+            raise
+
+    def observe(self, latency: float):
+        """Adapts the queue budget to the latency of a served request"""
+
+        with self._lock:
+            if latency > self.target_latency:
+                self.queue_budget = max(self.queue_budget * self.backoff, self.min_queue_seconds)
+            else:
+                self.queue_budget = min(self.queue_budget + self.increase_seconds, self.max_queue_seconds)
+
+    def _admit(self, priority: str, queued: Optional[float]) -> Optional[str]:
+        # Requests that waited in the listen queue past the budget are stale already
+        with self._lock:
+            max_queue = self.queue_budget * (self.write_share if priority == WRITE else 1)
+
+        if queued is not None and queued > max_queue:
+            return "queue"
+
+        return None
+
+    def _reject(self, priority: str, reason: str, environ, start_response):
+        with self._lock:
+            self.shed[f"{priority}_{reason}"] += 1
+
+        logger.warning(
+            "Shedding request",
+            extra={
+                "props": {
+                    "request": environ.get("PATH_INFO"),
+                    "method": environ.get("REQUEST_METHOD"),
+                    "reason": reason,
+                    "queue_budget_ms": round(self.queue_budget * 1000, 3),
+                }
+            },
+        )
+
+        body = json.dumps({"message": "Service overloaded, try again later"}).encode()
+        start_response("503 SERVICE UNAVAILABLE", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", "1"),
+        ])
+
+        return [body]
+
+
+load_shedder = AdaptiveLoadShedder()
@@ -1,10 +1,27 @@
 from typing import List, Optional
 
 
+class InvalidPayload(Exception):
+    pass
+
+
 class PayloadMapping:
     def __init__(self, *, payload):
         self.payload = payload
 
+    @classmethod
+    def with_natural_key(cls, payload, key: str, value: str) -> "PayloadMapping":
+        """Maps a payload whose natural key comes from the URL, which always
+        wins over the one in the payload"""
+
+        if payload is None:
+            payload = {}
+
+        if not isinstance(payload, dict):
+            raise InvalidPayload("Request body must be a JSON object")
+
+        return cls(payload={**payload, key: value})
+
 
 class FilmMapping(PayloadMapping):
     @property
@@ -45,3 +62,26 @@ class PlanetMapping(PayloadMapping):
     @property
     def films(self) -> Optional[List[str]]:
         return self.payload.get("films", [])
+
+
+class BatchMapping(PayloadMapping):
+    @property
+    def ids(self) -> List[str]:
+        return self._string_list("ids") or []
+
+    @property
+    def fields(self) -> Optional[List[str]]:
+        return self._string_list("fields")
+
+    def _string_list(self, name: str) -> Optional[List[str]]:
+        if not isinstance(self.payload, dict):
+            raise InvalidPayload("Request body must be a JSON object")
+
+        value = self.payload.get(name, None)
+
+        if value is not None and (
+            not isinstance(value, list) or not all(isinstance(item, str) for item in value)
+        ):
+            raise InvalidPayload(f"{name} must be a list of strings")
+
+        return value
@@ -0,0 +1,72 @@
+import json
+import logging
+
+from typing import Any, BinaryIO, Iterable, Iterator, Tuple
+
+from flask import Response, stream_with_context
+
+from starwars.presentation_layer.errors import error_response
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+class InvalidLine(Exception):
+    pass
+
+
+def read_ndjson(stream: BinaryIO, max_line_bytes: int) -> Iterator[Tuple[int, Any]]:
+    """Yields (line number, payload) for each non blank line of an NDJSON body,
+    reading one line at a time. Lines that are not JSON or longer than
+    max_line_bytes come as InvalidLine, the long ones without being buffered"""
+
+    number = 0
+
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+
+        if not line:
+            return
+
+        number += 1
+
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes + 1)
+
+            yield number, InvalidLine(f"Line is longer than {max_line_bytes} bytes")
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, InvalidLine("Line is not valid JSON")
+
+
+def ndjson_response(items: Iterable[dict], request_path: str) -> Response:
+    """Streams items as NDJSON while they are produced. Once the status is sent
+    a failure can only be reported in the body, as a last item with done false"""
+
+    def _generate():
+        try:
+            for item in items:
+                yield json.dumps(item) + "\n"
+
+        except Exception as e:
+            logger.exception(
+                "Streamed response interrupted",
+                extra={
+                    "props": {
+                        "request": request_path,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            yield json.dumps({"done": False, **error_response(e)[0]}) + "\n"
+
+    return Response(stream_with_context(_generate()), mimetype=NDJSON_MIMETYPE)
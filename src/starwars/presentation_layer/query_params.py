@@ -0,0 +1,27 @@
+from typing import List, Optional
+
+
+def parse_list(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    return parse_list(value) or None
+
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    if not value:
+        return default
+
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"limit must be an integer, got {value}")
+
+    if limit < 1:
+        raise ValueError("limit must be greater than zero")
+
+    return min(limit, maximum)
@@ -0,0 +1,181 @@
+import hashlib
+import ipaddress
+import logging
+import math
+import threading
+import time
+
+from typing import List
+
+from flask import g, request
+
+from starwars.application_layer.adapters.rate_limits_repository import RateLimitsRepository
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+API_KEY_HEADER = "X-Api-Key"
+
+READ = "read"
+WRITE = "write"
+GROUPS = (READ, WRITE)
+
+# Batch lookups are reads sent as POST to carry the ids in the body
+READ_PATH_SUFFIXES = ("/_mget",)
+
+
+def parse_rate(value: str) -> tuple:
+    """Parses "<requests>/<seconds>" into the bucket capacity and refill period"""
+
+    try:
+        capacity, period = value.split("/")
+        capacity, period = int(capacity), float(period)
+    except ValueError:
+        raise ValueError(f"{value} is not a valid rate limit, expected <requests>/<seconds>")
+
+    if capacity < 1 or period <= 0:
+        raise ValueError(f"{value} is not a valid rate limit, expected <requests>/<seconds>")
+
+    return capacity, period
+
+
+def parse_trusted_proxies(value: str) -> List:
+    """Parses a comma separated list of proxy addresses or networks"""
+
+    try:
+        return [
+            ipaddress.ip_network(proxy.strip(), strict=False)
+            for proxy in value.split(",") if proxy.strip()
+        ]
+    except ValueError:
+        raise ValueError(f"{value} is not a valid list of trusted proxies, expected addresses or networks")
+
+
+def _is_trusted_proxy(address: str, trusted_proxies: List) -> bool:
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+
+    return any(address in network for network in trusted_proxies)
+
+
+def client_id(trusted_proxies: List) -> str:
+    api_key = request.headers.get(API_KEY_HEADER)
+
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+    peer = request.remote_addr or ""
+
+    # Clients can send these headers too, they only count when set by a proxy
+    # we trust, which overwrites X-Real-IP and appends the peer to X-Forwarded-For
+    if _is_trusted_proxy(peer, trusted_proxies):
+        forwarded_for = request.headers.get("X-Forwarded-For", "").split(",")[-1].strip()
+
+        return "ip:" + (request.headers.get("X-Real-IP") or forwarded_for or peer)
+
+    return "ip:" + peer
+
+
+def route_group() -> str:
+    if request.method in ("GET", "HEAD", "OPTIONS") or request.path.endswith(READ_PATH_SUFFIXES):
+        return READ
+
+    return WRITE
+
+
+class MemoryBuckets:
+    """Local stand-in for the shared buckets, each process limits on its own"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_per_second: float, now: float) -> tuple:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(now - updated, 0) * refill_per_second)
+            allowed = tokens >= 1
+
+            if allowed:
+                tokens -= 1
+
+            self._buckets[key] = (tokens, now)
+
+        return allowed, tokens
+
+
+class MongoBuckets:
+    """Buckets shared by every uwsgi process through the rate_limits collection"""
+
+    @staticmethod
+    def take(key: str, capacity: int, refill_per_second: float, now: float) -> tuple:
+        return RateLimitsRepository.take(key, capacity, refill_per_second, now)
+
+
+class RateLimiter:
+    """Token bucket per client (API key or IP) and route group, answering 429
+    once the client spent its bucket and RateLimit-* headers on every response"""
+
+    def __init__(self):
+        self.enabled = False
+        self.limits = {}
+        self.trusted_proxies = []
+        self._buckets = MemoryBuckets()
+
+    def init_app(self, app):
+        self.enabled = app.config["RATE_LIMIT_ENABLED"]
+        self.limits = {group: parse_rate(app.config[f"RATE_LIMIT_{group.upper()}"]) for group in GROUPS}
+        self.trusted_proxies = parse_trusted_proxies(app.config["RATE_LIMIT_TRUSTED_PROXIES"])
+        self._buckets = MongoBuckets() if app.config["RATE_LIMIT_BACKEND"] == "mongo" else MemoryBuckets()
+
+    def check(self):
+        if not self.enabled:
+            return
+
+        group = route_group()
+        capacity, period = self.limits[group]
+        refill_per_second = capacity / period
+
+        try:
+            allowed, tokens = self._buckets.take(
+                f"{group}:{client_id(self.trusted_proxies)}", capacity, refill_per_second, time.time()
+            )
+
+        except Exception as e:
+            # An unavailable bucket store must not take the API down with it
+            logger.exception(
+                "Error checking rate limit",
+                extra={
+                    "props": {
+                        "request": request.path,
+                        "method": request.method,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return
+
+        g.rate_limit = (capacity, period, tokens, refill_per_second)
+
+        if not allowed:
+            retry_after = max(math.ceil((1 - tokens) / refill_per_second), 1)
+
+            return {"message": "Rate limit exceeded, try again later"}, 429, {"Retry-After": str(retry_after)}
+
+
+def add_rate_limit_headers(response):
+    rate_limit = g.pop("rate_limit", None)
+
+    if rate_limit is not None:
+        capacity, period, tokens, refill_per_second = rate_limit
+        response.headers["RateLimit-Limit"] = str(capacity)
+        response.headers["RateLimit-Remaining"] = str(math.floor(tokens))
+        response.headers["RateLimit-Reset"] = str(math.ceil((capacity - tokens) / refill_per_second))
+        response.headers["RateLimit-Policy"] = f"{capacity};w={period:g}"
+
+    return response
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,108 @@
+import hmac
+
+from flask import Blueprint, current_app, request
+from flask_restx import Api, Resource
+
+from starwars.application_layer.persistency.monitoring import (
+    pool_stats_listener,
+    slow_query_listener
+)
+from starwars.application_layer.persistency.single_flight import single_flight
+from starwars.application_layer.persistency.write_coalescing import write_coalescer
+from starwars.config import MONGO_CLIENT_OPTIONS
+from starwars.presentation_layer.load_shedding import load_shedder
+
+VERSION = "1.0"
+DOC = "API Star Wars Admin"
+
+bp_admin = Blueprint("admin", __name__, url_prefix="/api/admin")
+
+api = Api(
+    bp_admin,
+    version=VERSION,
+    title=DOC,
+    description=DOC,
+    doc="/docs/swagger"
+)
+
+ns = api.namespace("", description=DOC)
+
+
+@bp_admin.before_request
+def _check_admin_token():
+    token = current_app.config["ADMIN_TOKEN"]
+
+    if not token:
+        if current_app.config["ADMIN_OPEN_WITHOUT_TOKEN"]:
+            return None
+
+        return {"message": "Admin endpoints are disabled, ADMIN_TOKEN is not configured"}, 403
+
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return {"message": "Invalid admin token"}, 401
+
+
+@ns.route("/slow-queries")
+class SlowQueriesResource(Resource):
+    @ns.response(200, "OK")
+    @ns.response(401, "UNAUTHORIZED")
+    @ns.response(403, "FORBIDDEN")
+    def get(self):
+        slow_queries = slow_query_listener.slow_queries
+
+        return {
+            "threshold_ms": slow_query_listener.threshold_ms,
+            "slow_queries": list(reversed(slow_queries)),
+        }, 200
+
+
+@ns.route("/mongo-pool")
+class MongoPoolResource(Resource):
+    @ns.response(200, "OK")
+    @ns.response(401, "UNAUTHORIZED")
+    @ns.response(403, "FORBIDDEN")
+    def get(self):
+        return {
+            "settings": {
+                option: current_app.config[setting]
+                for setting, option in MONGO_CLIENT_OPTIONS.items()
+            },
+            "pools": pool_stats_listener.pools,
+        }, 200
+
+
+@ns.route("/single-flight")
+class SingleFlightResource(Resource):
+    @ns.response(200, "OK")
+    @ns.response(401, "UNAUTHORIZED")
+    @ns.response(403, "FORBIDDEN")
+    def get(self):
+        stats = single_flight.stats
+
+        return {
+            "enabled": single_flight.enabled,
+            "lookups": stats,
+            "saved_calls": sum(counters["followers"] for counters in stats.values()),
+        }, 200
+
+
+@ns.route("/write-coalescing")
+class WriteCoalescingResource(Resource):
+    @ns.response(200, "OK")
+    @ns.response(401, "UNAUTHORIZED")
+    @ns.response(403, "FORBIDDEN")
+    def get(self):
+        return {
+            "enabled": write_coalescer.enabled,
+            "window_ms": write_coalescer.window_seconds * 1000,
+            **write_coalescer.stats,
+        }, 200
+
+
+@ns.route("/load-shedding")
+class LoadSheddingResource(Resource):
+    @ns.response(200, "OK")
+    @ns.response(401, "UNAUTHORIZED")
+    @ns.response(403, "FORBIDDEN")
+    def get(self):
+        return {"enabled": load_shedder.enabled, **load_shedder.stats}, 200
@@ -1,12 +1,27 @@
 import logging
 
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 from flask_restx import Api, Resource
 
 from starwars.application_layer.use_cases.films import FilmAlreadyRegistered, FilmsUseCase
-from starwars.presentation_layer.mappings import FilmMapping
+from starwars.domain_layer.models.films import FILM_FIELDS
+from starwars.presentation_layer.errors import error_response
+from starwars.presentation_layer.exports import EXPORT_FORMATS, export_response, parse_export_format
+from starwars.presentation_layer.idempotency import idempotent
+from starwars.presentation_layer.lanes import lanes
+from starwars.presentation_layer.mappings import BatchMapping, InvalidPayload, FilmMapping
+from starwars.presentation_layer.ndjson import NDJSON_MIMETYPE, ndjson_response, read_ndjson
+from starwars.presentation_layer.query_params import parse_fields, parse_limit, parse_list
+from starwars.presentation_layer.rate_limiting import add_rate_limit_headers, rate_limiter
 from starwars.presentation_layer.views.schemas import (
+    batch_request_model,
     generic_error_message_model,
+    import_error_model,
+    import_progress_model,
+    films_batch_item_model,
+    films_batch_response_model,
+    films_change_model,
+    films_changes_response_model,
     films_request_model,
     films_response_model
 )
@@ -17,6 +32,8 @@ VERSION = "1.0"
 DOC = "API Star Wars Films"
 
 bp_films = Blueprint("films", __name__, url_prefix="/api/films")
+bp_films.before_request(rate_limiter.check)
+bp_films.after_request(add_rate_limit_headers)
 
 api = Api(
     bp_films,
@@ -31,6 +48,43 @@ ns = api.namespace("", description=DOC)
 ns.add_model(generic_error_message_model.name, generic_error_message_model)
 ns.add_model(films_request_model.name, films_request_model)
 ns.add_model(films_response_model.name, films_response_model)
+ns.add_model(batch_request_model.name, batch_request_model)
+ns.add_model(films_batch_item_model.name, films_batch_item_model)
+ns.add_model(films_batch_response_model.name, films_batch_response_model)
+ns.add_model(films_change_model.name, films_change_model)
+ns.add_model(films_changes_response_model.name, films_changes_response_model)
+ns.add_model(import_error_model.name, import_error_model)
+ns.add_model(import_progress_model.name, import_progress_model)
+
+
+def _get_films_by_ids(ids, fields, request_path: str, method: str):
+    max_ids = current_app.config["BATCH_MAX_IDS"]
+
+    if not ids:
+        return {"message": "At least one film id must be informed"}, 400
+
+    if len(ids) > max_ids:
+        return {"message": f"At most {max_ids} film ids can be fetched at once"}, 400
+
+    try:
+        result = FilmsUseCase.get_films_by_ids(ids=ids, fields=fields)
+
+    except Exception as e:
+        logger.exception(
+            "Failed to get films by ids",
+            extra={
+                "props": {
+                    "request": request_path,
+                    "method": method,
+                    "ids": ids,
+                    "error_message": str(e),
+                }
+            },
+        )
+
+        return error_response(e)
+
+    return result, 200
 
 
 @ns.route("")
@@ -39,6 +93,9 @@ class FilmResource(Resource):
     @ns.response(201, "CREATED", films_response_model)
     @ns.response(400, "BAD REQUEST", generic_error_message_model)
     @ns.response(409, "CONFLICT", generic_error_message_model)
+    @ns.response(422, "UNPROCESSABLE ENTITY", generic_error_message_model)
+    @ns.param("Idempotency-Key", "Replays the stored response when the request is retried with the same key", _in="header")
+    @idempotent
     def post(self):
         mapping = FilmMapping(payload=request.json)
 
@@ -73,19 +130,155 @@ class FilmResource(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return result, 201
 
+    @ns.param("ids", "Comma separated list of film ids to fetch in a single query")
+    @ns.param("fields", "Comma separated list of fields to return, e.g. title,director")
+    @ns.response(200, "OK", films_batch_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def get(self):
+        return _get_films_by_ids(
+            ids=parse_list(request.args.get("ids")),
+            fields=parse_fields(request.args.get("fields")),
+            request_path="/api/films",
+            method="GET"
+        )
+
+
+@ns.route("/_mget")
+class FilmBatchResource(Resource):
+    @ns.expect(batch_request_model)
+    @ns.response(200, "OK", films_batch_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def post(self):
+        mapping = BatchMapping(payload=request.json)
+
+        try:
+            ids, fields = mapping.ids, mapping.fields
+        except InvalidPayload as e:
+            return {"message": str(e)}, 400
+
+        return _get_films_by_ids(
+            ids=ids,
+            fields=fields,
+            request_path="/api/films/_mget",
+            method="POST"
+        )
+
+
+@ns.route("/changes")
+class FilmChangesResource(Resource):
+    @ns.param("since", "Resume token returned as next by the previous call, omit to start from the beginning")
+    @ns.param("limit", "Maximum number of changes to return")
+    @ns.response(200, "OK", films_changes_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def get(self):
+        since = request.args.get("since")
+
+        try:
+            limit = parse_limit(
+                request.args.get("limit"),
+                default=current_app.config["CHANGES_PAGE_SIZE"],
+                maximum=current_app.config["CHANGES_MAX_PAGE_SIZE"]
+            )
+
+            result = FilmsUseCase.get_films_changes(since=since, limit=limit)
+
+        except Exception as e:
+            logger.exception(
+                "Failed to get films changes",
+                extra={
+                    "props": {
+                        "request": "/api/films/changes",
+                        "method": "GET",
+                        "since": since,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        return result, 200
+
+
+@ns.route("/import")
+class FilmImportResource(Resource):
+    @ns.doc(
+        description="Creates the films of an NDJSON body, one film per line, in batches",
+        consumes=[NDJSON_MIMETYPE],
+        produces=[NDJSON_MIMETYPE]
+    )
+    @ns.response(200, "OK, one progress line per batch and the totals last", import_progress_model)
+    @ns.response(503, "SERVICE UNAVAILABLE", generic_error_message_model)
+    @lanes.bulk
+    def post(self):
+        rows = read_ndjson(request.stream, max_line_bytes=current_app.config["IMPORT_MAX_LINE_BYTES"])
+        progress = FilmsUseCase.import_films(rows=rows, batch_size=current_app.config["IMPORT_BATCH_SIZE"])
+
+        return ndjson_response(progress, request_path="/api/films/import")
+
+
+@ns.route("/export")
+class FilmExportResource(Resource):
+    @ns.doc(
+        description="Streams every film, gzipped when the client accepts it",
+        produces=list(EXPORT_FORMATS.values())
+    )
+    @ns.param("format", "One of ndjson (default) or csv")
+    @ns.param("fields", "Comma separated list of fields to export, e.g. name,climate")
+    @ns.response(200, "OK")
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(503, "SERVICE UNAVAILABLE", generic_error_message_model)
+    @lanes.bulk
+    def get(self):
+        fields = parse_fields(request.args.get("fields"))
+
+        try:
+            export_format = parse_export_format(request.args.get("format"))
+            batches = FilmsUseCase.export_films(
+                batch_size=current_app.config["EXPORT_BATCH_SIZE"],
+                fields=fields
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Failed to export films",
+                extra={
+                    "props": {
+                        "request": "/api/films/export",
+                        "method": "GET",
+                        "fields": fields,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
 
-@ns.route("/<string:id>")
+        return export_response(
+            batches,
+            columns=["id", *(field for field in fields or FILM_FIELDS if field != "id")],
+            format=export_format,
+            filename="films",
+            gzip_level=current_app.config["EXPORT_GZIP_LEVEL"],
+            request_path="/api/films/export"
+        )
+
+
+@ns.route("/<objectid:id>")
 class FilmByIdResourceItem(Resource):
     @ns.response(200, "OK", films_response_model)
     @ns.response(400, "BAD REQUEST", generic_error_message_model)
     @ns.response(404, "NOT FOUND", generic_error_message_model)
+    @ns.param("fields", "Comma separated list of fields to return, e.g. title,director")
     def get(self, id: str):
+        fields = parse_fields(request.args.get("fields"))
+
         try:
-            planet = FilmsUseCase().get_film_by_id(id=id)
+            planet = FilmsUseCase().get_film_by_id(id=id, fields=fields)
 
         except Exception as e:
             logger.exception(
@@ -100,7 +293,7 @@ class FilmByIdResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
         
         if not planet:
             logger.warning(
@@ -160,7 +353,7 @@ class FilmByIdResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return result, 200
 
@@ -183,6 +376,96 @@ class FilmByIdResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return None, 204
+
+
+@ns.route("/by-title/<string:title>")
+class FilmByTitleResourceItem(Resource):
+    @ns.response(200, "OK", films_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(404, "NOT FOUND", generic_error_message_model)
+    @ns.param("fields", "Comma separated list of fields to return, e.g. title,director")
+    def get(self, title: str):
+        fields = parse_fields(request.args.get("fields"))
+
+        try:
+            film = FilmsUseCase.get_film_by_title(title=title, fields=fields)
+
+        except Exception as e:
+            logger.exception(
+                "Failed to get film by title",
+                extra={
+                    "props": {
+                        "request": f"/api/films/by-title/{title}",
+                        "method": "GET",
+                        "title": title,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        if not film:
+            logger.warning(
+                f"Film with title {title} was not found",
+                extra={
+                    "props": {
+                        "request": f"/api/films/by-title/{title}",
+                        "method": "GET",
+                        "title": title,
+                    }
+                },
+            )
+
+            return {"message": f"Film with title {title} was not found"}, 404
+
+        return film, 200
+
+    @ns.expect(films_request_model)
+    @ns.response(200, "OK", films_response_model)
+    @ns.response(201, "CREATED", films_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(409, "CONFLICT", generic_error_message_model)
+    def put(self, title: str):
+        try:
+            mapping = FilmMapping.with_natural_key(request.json, "title", title)
+        except InvalidPayload as e:
+            return {"message": str(e)}, 400
+
+        try:
+            result, created = FilmsUseCase.upsert_film_by_title(data=mapping)
+
+        except FilmAlreadyRegistered as e:
+            logger.exception(
+                "Failed to upsert film - title already in use",
+                extra={
+                    "props": {
+                        "request": f"/api/films/by-title/{title}",
+                        "method": "PUT",
+                        "title": title,
+                        "error_message": str(e),
+                    }
+                }
+            )
+
+            return {"message": str(e)}, 409
+
+        except Exception as e:
+            logger.exception(
+                "Failed to upsert film",
+                extra={
+                    "props": {
+                        "request": f"/api/films/by-title/{title}",
+                        "method": "PUT",
+                        "title": title,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        return result, 201 if created else 200
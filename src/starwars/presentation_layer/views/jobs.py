@@ -0,0 +1,60 @@
+import logging
+
+from flask import Blueprint
+from flask_restx import Api, Resource
+
+from starwars.application_layer.use_cases.jobs import JobsUseCase
+from starwars.presentation_layer.errors import error_response
+from starwars.presentation_layer.views.schemas import (
+    generic_error_message_model,
+    jobs_response_model
+)
+
+logger = logging.getLogger("api-starwars." + __name__)
+
+VERSION = "1.0"
+DOC = "API Star Wars Jobs"
+
+bp_jobs = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+api = Api(
+    bp_jobs,
+    version=VERSION,
+    title=DOC,
+    description=DOC,
+    doc="/docs/swagger"
+)
+
+ns = api.namespace("", description=DOC)
+
+ns.add_model(generic_error_message_model.name, generic_error_message_model)
+ns.add_model(jobs_response_model.name, jobs_response_model)
+
+
+@ns.route("/<objectid:id>")
+class JobResourceItem(Resource):
+    @ns.response(200, "OK", jobs_response_model)
+    @ns.response(404, "NOT FOUND", generic_error_message_model)
+    def get(self, id: str):
+        try:
+            job = JobsUseCase.get_job(id)
+
+        except Exception as e:
+            logger.exception(
+                "Failed to get job by id",
+                extra={
+                    "props": {
+                        "request": f"/api/jobs/{id}",
+                        "method": "GET",
+                        "id": id,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        if not job:
+            return {"message": f"Job with id {id} was not found"}, 404
+
+        return job, 200
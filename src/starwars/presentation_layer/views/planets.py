@@ -1,12 +1,27 @@
 import logging
 
-from flask import Blueprint, request
+from flask import Blueprint, current_app, request
 from flask_restx import Api, Resource
 
 from starwars.application_layer.use_cases.planets import PlanetAlreadyRegistered, PlanetsUseCase
-from starwars.presentation_layer.mappings import PlanetMapping
+from starwars.domain_layer.models.planets import PLANET_FIELDS
+from starwars.presentation_layer.errors import error_response
+from starwars.presentation_layer.exports import EXPORT_FORMATS, export_response, parse_export_format
+from starwars.presentation_layer.idempotency import idempotent
+from starwars.presentation_layer.lanes import lanes
+from starwars.presentation_layer.mappings import BatchMapping, InvalidPayload, PlanetMapping
+from starwars.presentation_layer.ndjson import NDJSON_MIMETYPE, ndjson_response, read_ndjson
+from starwars.presentation_layer.query_params import parse_fields, parse_limit, parse_list
+from starwars.presentation_layer.rate_limiting import add_rate_limit_headers, rate_limiter
 from starwars.presentation_layer.views.schemas import (
+    batch_request_model,
     generic_error_message_model,
+    import_error_model,
+    import_progress_model,
+    planets_batch_item_model,
+    planets_batch_response_model,
+    planets_change_model,
+    planets_changes_response_model,
     planets_request_model,
     planets_response_model
 )
@@ -17,6 +32,8 @@ VERSION = "1.0"
 DOC = "API Star Wars Planets"
 
 bp_planets = Blueprint("planets", __name__, url_prefix="/api/planets")
+bp_planets.before_request(rate_limiter.check)
+bp_planets.after_request(add_rate_limit_headers)
 
 api = Api(
     bp_planets,
@@ -31,6 +48,43 @@ ns = api.namespace("", description=DOC)
 ns.add_model(generic_error_message_model.name, generic_error_message_model)
 ns.add_model(planets_request_model.name, planets_request_model)
 ns.add_model(planets_response_model.name, planets_response_model)
+ns.add_model(batch_request_model.name, batch_request_model)
+ns.add_model(planets_batch_item_model.name, planets_batch_item_model)
+ns.add_model(planets_batch_response_model.name, planets_batch_response_model)
+ns.add_model(planets_change_model.name, planets_change_model)
+ns.add_model(planets_changes_response_model.name, planets_changes_response_model)
+ns.add_model(import_error_model.name, import_error_model)
+ns.add_model(import_progress_model.name, import_progress_model)
+
+
+def _get_planets_by_ids(ids, fields, request_path: str, method: str):
+    max_ids = current_app.config["BATCH_MAX_IDS"]
+
+    if not ids:
+        return {"message": "At least one planet id must be informed"}, 400
+
+    if len(ids) > max_ids:
+        return {"message": f"At most {max_ids} planet ids can be fetched at once"}, 400
+
+    try:
+        result = PlanetsUseCase.get_planets_by_ids(ids=ids, fields=fields)
+
+    except Exception as e:
+        logger.exception(
+            "Failed to get planets by ids",
+            extra={
+                "props": {
+                    "request": request_path,
+                    "method": method,
+                    "ids": ids,
+                    "error_message": str(e),
+                }
+            },
+        )
+
+        return error_response(e)
+
+    return result, 200
 
 
 @ns.route("")
@@ -39,6 +93,9 @@ class PlanetResource(Resource):
     @ns.response(201, "CREATED", planets_response_model)
     @ns.response(400, "BAD REQUEST", generic_error_message_model)
     @ns.response(409, "CONFLICT", generic_error_message_model)
+    @ns.response(422, "UNPROCESSABLE ENTITY", generic_error_message_model)
+    @ns.param("Idempotency-Key", "Replays the stored response when the request is retried with the same key", _in="header")
+    @idempotent
     def post(self):
         mapping = PlanetMapping(payload=request.json)
 
@@ -71,19 +128,155 @@ class PlanetResource(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return result, 201
 
+    @ns.param("ids", "Comma separated list of planet ids to fetch in a single query")
+    @ns.param("fields", "Comma separated list of fields to return, e.g. name,climate")
+    @ns.response(200, "OK", planets_batch_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def get(self):
+        return _get_planets_by_ids(
+            ids=parse_list(request.args.get("ids")),
+            fields=parse_fields(request.args.get("fields")),
+            request_path="/api/planets",
+            method="GET"
+        )
+
+
+@ns.route("/_mget")
+class PlanetBatchResource(Resource):
+    @ns.expect(batch_request_model)
+    @ns.response(200, "OK", planets_batch_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def post(self):
+        mapping = BatchMapping(payload=request.json)
 
-@ns.route("/<string:id>")
+        try:
+            ids, fields = mapping.ids, mapping.fields
+        except InvalidPayload as e:
+            return {"message": str(e)}, 400
+
+        return _get_planets_by_ids(
+            ids=ids,
+            fields=fields,
+            request_path="/api/planets/_mget",
+            method="POST"
+        )
+
+
+@ns.route("/changes")
+class PlanetChangesResource(Resource):
+    @ns.param("since", "Resume token returned as next by the previous call, omit to start from the beginning")
+    @ns.param("limit", "Maximum number of changes to return")
+    @ns.response(200, "OK", planets_changes_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    def get(self):
+        since = request.args.get("since")
+
+        try:
+            limit = parse_limit(
+                request.args.get("limit"),
+                default=current_app.config["CHANGES_PAGE_SIZE"],
+                maximum=current_app.config["CHANGES_MAX_PAGE_SIZE"]
+            )
+
+            result = PlanetsUseCase.get_planets_changes(since=since, limit=limit)
+
+        except Exception as e:
+            logger.exception(
+                "Failed to get planets changes",
+                extra={
+                    "props": {
+                        "request": "/api/planets/changes",
+                        "method": "GET",
+                        "since": since,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        return result, 200
+
+
+@ns.route("/import")
+class PlanetImportResource(Resource):
+    @ns.doc(
+        description="Creates the planets of an NDJSON body, one planet per line, in batches",
+        consumes=[NDJSON_MIMETYPE],
+        produces=[NDJSON_MIMETYPE]
+    )
+    @ns.response(200, "OK, one progress line per batch and the totals last", import_progress_model)
+    @ns.response(503, "SERVICE UNAVAILABLE", generic_error_message_model)
+    @lanes.bulk
+    def post(self):
+        rows = read_ndjson(request.stream, max_line_bytes=current_app.config["IMPORT_MAX_LINE_BYTES"])
+        progress = PlanetsUseCase.import_planets(rows=rows, batch_size=current_app.config["IMPORT_BATCH_SIZE"])
+
+        return ndjson_response(progress, request_path="/api/planets/import")
+
+
+@ns.route("/export")
+class PlanetExportResource(Resource):
+    @ns.doc(
+        description="Streams every planet, gzipped when the client accepts it",
+        produces=list(EXPORT_FORMATS.values())
+    )
+    @ns.param("format", "One of ndjson (default) or csv")
+    @ns.param("fields", "Comma separated list of fields to export, e.g. name,climate")
+    @ns.response(200, "OK")
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(503, "SERVICE UNAVAILABLE", generic_error_message_model)
+    @lanes.bulk
+    def get(self):
+        fields = parse_fields(request.args.get("fields"))
+
+        try:
+            export_format = parse_export_format(request.args.get("format"))
+            batches = PlanetsUseCase.export_planets(
+                batch_size=current_app.config["EXPORT_BATCH_SIZE"],
+                fields=fields
+            )
+
+        except Exception as e:
+            logger.exception(
+                "Failed to export planets",
+                extra={
+                    "props": {
+                        "request": "/api/planets/export",
+                        "method": "GET",
+                        "fields": fields,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        return export_response(
+            batches,
+            columns=["id", *(field for field in fields or PLANET_FIELDS if field != "id")],
+            format=export_format,
+            filename="planets",
+            gzip_level=current_app.config["EXPORT_GZIP_LEVEL"],
+            request_path="/api/planets/export"
+        )
+
+
+@ns.route("/<objectid:id>")
 class PlanetResourceItem(Resource):
     @ns.response(200, "OK", planets_response_model)
     @ns.response(400, "BAD REQUEST", generic_error_message_model)
     @ns.response(404, "NOT FOUND", generic_error_message_model)
+    @ns.param("fields", "Comma separated list of fields to return, e.g. name,climate")
     def get(self, id: str):
+        fields = parse_fields(request.args.get("fields"))
+
         try:
-            planet = PlanetsUseCase().get_planet_by_id(id=id)
+            planet = PlanetsUseCase().get_planet_by_id(id=id, fields=fields)
 
         except Exception as e:
             logger.exception(
@@ -98,7 +291,7 @@ class PlanetResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
         
         if not planet:
             logger.warning(
@@ -158,7 +351,7 @@ class PlanetResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return result, 200
 
@@ -181,6 +374,96 @@ class PlanetResourceItem(Resource):
                 },
             )
 
-            return {"message": str(e)}, 400
+            return error_response(e)
 
         return None, 204
+
+
+@ns.route("/by-name/<string:name>")
+class PlanetByNameResourceItem(Resource):
+    @ns.response(200, "OK", planets_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(404, "NOT FOUND", generic_error_message_model)
+    @ns.param("fields", "Comma separated list of fields to return, e.g. name,climate")
+    def get(self, name: str):
+        fields = parse_fields(request.args.get("fields"))
+
+        try:
+            planet = PlanetsUseCase.get_planet_by_name(name=name, fields=fields)
+
+        except Exception as e:
+            logger.exception(
+                "Failed to get planet by name",
+                extra={
+                    "props": {
+                        "request": f"/api/planets/by-name/{name}",
+                        "method": "GET",
+                        "name": name,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        if not planet:
+            logger.warning(
+                f"Planet with name {name} was not found",
+                extra={
+                    "props": {
+                        "request": f"/api/planets/by-name/{name}",
+                        "method": "GET",
+                        "name": name,
+                    }
+                },
+            )
+
+            return {"message": f"Planet with name {name} was not found"}, 404
+
+        return planet, 200
+
+    @ns.expect(planets_request_model)
+    @ns.response(200, "OK", planets_response_model)
+    @ns.response(201, "CREATED", planets_response_model)
+    @ns.response(400, "BAD REQUEST", generic_error_message_model)
+    @ns.response(409, "CONFLICT", generic_error_message_model)
+    def put(self, name: str):
+        try:
+            mapping = PlanetMapping.with_natural_key(request.json, "name", name)
+        except InvalidPayload as e:
+            return {"message": str(e)}, 400
+
+        try:
+            result, created = PlanetsUseCase.upsert_planet_by_name(data=mapping)
+
+        except PlanetAlreadyRegistered as e:
+            logger.exception(
+                "Failed to upsert planet - name already in use",
+                extra={
+                    "props": {
+                        "request": f"/api/planets/by-name/{name}",
+                        "method": "PUT",
+                        "name": name,
+                        "error_message": str(e),
+                    }
+                }
+            )
+
+            return {"message": str(e)}, 409
+
+        except Exception as e:
+            logger.exception(
+                "Failed to upsert planet",
+                extra={
+                    "props": {
+                        "request": f"/api/planets/by-name/{name}",
+                        "method": "PUT",
+                        "name": name,
+                        "error_message": str(e),
+                    }
+                },
+            )
+
+            return error_response(e)
+
+        return result, 201 if created else 200
@@ -140,4 +140,225 @@ planets_response_model = Model(
             example="2014-12-12T11:24:39.858000Z",
         )
     }
-)
\ No newline at end of file
+)
+
+
+batch_request_model = Model(
+    "batch_request",
+    {
+        "ids": fields.List(fields.String(
+            description="An array of resource ids to fetch",
+            example="6728162d5b59f05a5a28562b",
+        ), required=True),
+        "fields": fields.List(fields.String(
+            description="An optional array of fields to return for each resource",
+            example="name",
+        ))
+    }
+)
+
+
+films_batch_item_model = Model(
+    "films_batch_item",
+    {
+        "id": fields.String(
+            description="The requested film id",
+            example="67281161d0af9e1cf7e4cd8f",
+        ),
+        "found": fields.Boolean(
+            description="Whether a film with this id exists",
+        ),
+        "film": fields.Nested(films_response_model, allow_null=True),
+    }
+)
+
+
+films_batch_response_model = Model(
+    "films_batch_response",
+    {
+        "docs": fields.List(fields.Nested(films_batch_item_model)),
+    }
+)
+
+
+planets_batch_item_model = Model(
+    "planets_batch_item",
+    {
+        "id": fields.String(
+            description="The requested planet id",
+            example="6728162d5b59f05a5a28562b",
+        ),
+        "found": fields.Boolean(
+            description="Whether a planet with this id exists",
+        ),
+        "planet": fields.Nested(planets_response_model, allow_null=True),
+    }
+)
+
+
+planets_batch_response_model = Model(
+    "planets_batch_response",
+    {
+        "docs": fields.List(fields.Nested(planets_batch_item_model)),
+    }
+)
+
+
+films_change_model = Model(
+    "films_change",
+    {
+        "id": fields.String(
+            description="The identifier of the changed film",
+            example="67281161d0af9e1cf7e4cd8f",
+        ),
+        "deleted": fields.Boolean(
+            description="Whether this change is a tombstone for a removed film",
+        ),
+        "edited": fields.String(
+            description="the ISO 8601 date format of the time of this change",
+            example="2014-12-12T11:24:39.858000",
+        ),
+        "film": fields.Nested(films_response_model, allow_null=True),
+    }
+)
+
+
+films_changes_response_model = Model(
+    "films_changes_response",
+    {
+        "changes": fields.List(fields.Nested(films_change_model)),
+        "next": NullableString(
+            description="Resume token to send back as since to get the following changes",
+        ),
+        "has_more": fields.Boolean(
+            description="Whether more changes are already available after this page",
+        ),
+    }
+)
+
+
+planets_change_model = Model(
+    "planets_change",
+    {
+        "id": fields.String(
+            description="The identifier of the changed planet",
+            example="6728162d5b59f05a5a28562b",
+        ),
+        "deleted": fields.Boolean(
+            description="Whether this change is a tombstone for a removed planet",
+        ),
+        "edited": fields.String(
+            description="the ISO 8601 date format of the time of this change",
+            example="2014-12-12T11:24:39.858000",
+        ),
+        "planet": fields.Nested(planets_response_model, allow_null=True),
+    }
+)
+
+
+planets_changes_response_model = Model(
+    "planets_changes_response",
+    {
+        "changes": fields.List(fields.Nested(planets_change_model)),
+        "next": NullableString(
+            description="Resume token to send back as since to get the following changes",
+        ),
+        "has_more": fields.Boolean(
+            description="Whether more changes are already available after this page",
+        ),
+    }
+)
+
+
+import_error_model = Model(
+    "import_error",
+    {
+        "line": fields.Integer(
+            description="The line of the NDJSON body that was not imported",
+            example=7,
+        ),
+        "message": fields.String(
+            description="Why the line was not imported",
+            example="One or more films do not exist",
+        ),
+    }
+)
+
+
+import_progress_model = Model(
+    "import_progress",
+    {
+        "batch": fields.Integer(
+            description="The number of this batch, absent from the last line",
+            example=1,
+        ),
+        "lines": fields.Integer(
+            description="The non blank lines read, in this batch or in total on the last line",
+            example=500,
+        ),
+        "inserted": fields.Integer(
+            description="The lines inserted, in this batch or in total on the last line",
+            example=498,
+        ),
+        "errors": fields.List(fields.Nested(import_error_model)),
+        "failed": fields.Integer(
+            description="The lines not inserted in total, only on the last line",
+            example=2,
+        ),
+        "done": fields.Boolean(
+            description="Only on the last line, false when the import was interrupted",
+        ),
+        "message": fields.String(
+            description="Why the import was interrupted",
+        ),
+    }
+)
+
+
+jobs_response_model = Model(
+    "jobs_response",
+    {
+        "id": fields.String(
+            description="The identifier of this job",
+            example="6728162d5b59f05a5a28562b",
+        ),
+        "type": fields.String(
+            description="What this job does",
+            example="films.remove_planet_references",
+        ),
+        "params": fields.Raw(
+            description="The parameters of this job",
+        ),
+        "status": fields.String(
+            description="One of queued, running, succeeded or failed",
+            example="running",
+        ),
+        "attempts": fields.Integer(
+            description="How many times this job was started",
+        ),
+        "max_attempts": fields.Integer(
+            description="How many times this job may be started before failing for good",
+        ),
+        "progress": fields.Raw(
+            description="The last progress reported by this job, e.g. the documents done",
+        ),
+        "result": fields.Raw(
+            description="What this job returned once succeeded",
+        ),
+        "error": NullableString(
+            description="The error of the last failed attempt",
+        ),
+        "run_after": fields.String(
+            description="the ISO 8601 date format of the time this job may run from",
+        ),
+        "created": fields.String(
+            description="the ISO 8601 date format of the time this job was enqueued",
+        ),
+        "updated": fields.String(
+            description="the ISO 8601 date format of the last change of this job",
+        ),
+        "finished": NullableString(
+            description="the ISO 8601 date format of the time this job succeeded or failed for good",
+        ),
+    }
+)
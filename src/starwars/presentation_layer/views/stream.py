@@ -0,0 +1,84 @@
+import json
+import time
+
+from flask import Blueprint, Response, current_app, request, stream_with_context
+from flask_restx import Api, Resource
+
+from starwars.application_layer.events.broadcaster import Subscription, broadcaster
+from starwars.presentation_layer.lanes import lanes
+from starwars.presentation_layer.query_params import parse_list
+
+VERSION = "1.0"
+DOC = "API Star Wars Stream"
+
+RESOURCES = ("planets", "films")
+
+bp_stream = Blueprint("stream", __name__, url_prefix="/api/stream")
+
+api = Api(
+    bp_stream,
+    version=VERSION,
+    title=DOC,
+    description=DOC,
+    doc="/docs/swagger"
+)
+
+ns = api.namespace("", description=DOC)
+
+
+def _event_stream(
+    subscription: Subscription,
+    resources: tuple,
+    heartbeat_seconds: float,
+    max_seconds: float
+):
+    deadline = time.monotonic() + max_seconds
+
+    # Clients reconnect on their own once the stream is closed
+    yield "retry: 3000\n\n"
+
+    while time.monotonic() < deadline and not subscription.closed:
+        event = subscription.get(timeout=heartbeat_seconds)
+
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+
+        if event["resource"] not in resources:
+            continue
+
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@ns.route("")
+class StreamResource(Resource):
+    @ns.param("resources", "Comma separated list of resources to follow, defaults to planets,films")
+    @ns.response(200, "OK")
+    @ns.response(400, "BAD REQUEST")
+    @ns.response(503, "SERVICE UNAVAILABLE")
+    @lanes.stream
+    def get(self):
+        resources = tuple(parse_list(request.args.get("resources"))) or RESOURCES
+        unknown_resources = [name for name in resources if name not in RESOURCES]
+
+        if unknown_resources:
+            return {"message": f"Unknown resources: {', '.join(unknown_resources)}"}, 400
+
+        subscription = broadcaster.subscribe()
+
+        response = Response(
+            stream_with_context(_event_stream(
+                subscription,
+                resources=resources,
+                heartbeat_seconds=current_app.config["STREAM_HEARTBEAT_SECONDS"],
+                max_seconds=current_app.config["STREAM_MAX_SECONDS"]
+            )),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            }
+        )
+        response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+
+        return response
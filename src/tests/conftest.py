@@ -1,5 +1,9 @@
+import contextlib
+import threading
+import time
+
 from datetime import date
-from typing import List
+from typing import List, Optional
 from unittest import mock
 
 import pytest
@@ -19,7 +23,7 @@ def client():
 
         for definition in collections_definitions:
             collection = mongo_client.db.create_collection(name=definition.name)
-            collection.create_index(definition.index, unique=definition.unique_index)
+            collection.create_indexes([index.as_model() for index in definition.indexes])
 
     app = create_app("Testing")
     app.config["TESTING"] = True
@@ -35,6 +39,83 @@ def client():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def reset_in_process_caches():
+    """Process wide caches must not leak results from one test into another"""
+
+    from starwars.application_layer.persistency.circuit_breaker import database_breaker
+    from starwars.application_layer.persistency.item_cache import item_cache
+    from starwars.application_layer.persistency.negative_cache import negative_cache
+    from starwars.application_layer.persistency.reference_ids import reference_ids
+
+    yield
+
+    item_cache.clear()
+    negative_cache.clear()
+    reference_ids.clear()
+    database_breaker.reset()
+
+
+# mongomock does not publish command events, so its operations are counted directly
+MONGOMOCK_OPERATIONS = (
+    "insert_one", "insert_many", "find", "find_one", "find_one_and_update",
+    "find_one_and_replace", "find_one_and_delete", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "count_documents", "distinct",
+    "aggregate", "bulk_write",
+)
+
+
+@pytest.fixture()
+def query_budget():
+    """Fails the test when the block issues more database calls than allowed
+
+        with query_budget(2) as calls:
+            response = client.post(...)
+    """
+
+    from mongomock.collection import Collection
+    from starwars.application_layer.persistency.monitoring import record_db_call
+
+    calls = []
+    nesting = threading.local()
+
+    def _counted(operation):
+        original = getattr(Collection, operation)
+
+        def wrapper(collection, *args, **kwargs):
+            depth = getattr(nesting, "depth", 0)
+            nesting.depth = depth + 1
+            start = time.perf_counter()
+
+            try:
+                return original(collection, *args, **kwargs)
+            finally:
+                nesting.depth = depth
+
+                # Operations built on top of others (find_one on find) count once
+                if depth == 0:
+                    calls.append(f"{collection.name}.{operation}")
+                    record_db_call((time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    @contextlib.contextmanager
+    def _query_budget(max_calls: int):
+        calls.clear()
+
+        with contextlib.ExitStack() as stack:
+            for operation in MONGOMOCK_OPERATIONS:
+                stack.enter_context(mock.patch.object(Collection, operation, _counted(operation)))
+
+            yield calls
+
+        assert len(calls) <= max_calls, (
+            f"Expected at most {max_calls} database calls, got {len(calls)}: {calls}"
+        )
+
+    return _query_budget
+
+
 @pytest.fixture()
 def fake_films_service_class(film_info):
     from starwars.domain_layer.ports.films import FilmsService
@@ -63,10 +144,33 @@ def fake_films_service_class(film_info):
             return None
         
         @classmethod
-        def get_film_by_id(cls, id: str):
+        def get_film_by_id(cls, id: str, fields: Optional[List[str]] = None):
             if id == film_info["id"]:
                 return film_info
         
+        @classmethod
+        def get_films_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+            return [film_info] if film_info["id"] in ids else []
+
+        @classmethod
+        def get_film_by_title(cls, title: str, fields: Optional[List[str]] = None):
+            if title == film_info["title"]:
+                return film_info
+
+        @classmethod
+        def upsert_film_by_title(
+            cls,
+            title: str,
+            release_date: str,
+            director: str,
+            planets: List[str]
+        ):
+            return film_info, False
+
+        @classmethod
+        def get_films_changes(cls, since_edited, since_id, limit: int):
+            return [film_info]
+
         @classmethod
         def remove_film(cls, id: str):
             return None
@@ -104,10 +208,34 @@ def fake_planets_service_class(planet_info):
             return None
 
         @classmethod
-        def get_planet_by_id(cls, id: str):
+        def get_planet_by_id(cls, id: str, fields: Optional[List[str]] = None):
             if id == planet_info["id"]:
                 return planet_info
         
+        @classmethod
+        def get_planets_by_ids(cls, ids: List[str], fields: Optional[List[str]] = None):
+            return [planet_info] if planet_info["id"] in ids else []
+
+        @classmethod
+        def get_planet_by_name(cls, name: str, fields: Optional[List[str]] = None):
+            if name == planet_info["name"]:
+                return planet_info
+
+        @classmethod
+        def upsert_planet_by_name(
+            cls,
+            name: str,
+            climate: str,
+            diameter: str,
+            population: str,
+            films: List[str]
+        ):
+            return planet_info, False
+
+        @classmethod
+        def get_planets_changes(cls, since_edited, since_id, limit: int):
+            return [planet_info]
+
         @classmethod
         def remove_planet(cls, id: str):
             return None
@@ -1,8 +1,13 @@
 import bson
 import pytest
 
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
 from starwars.app import mongo_client
+from starwars.application_layer.events.broadcaster import broadcaster
 from starwars.application_layer.adapters.films_repository import FilmsRepository
+from starwars.application_layer.adapters.planets_repository import PlanetsRepository
 from starwars.domain_layer.ports.films import DuplicatedFilm, InvalidFilm
 
 
@@ -188,4 +193,218 @@ def test_remove_film(film_info, client):
     inserted_film = mongo_client.db.films.find_one({"_id": bson.ObjectId(inserted_id)})
 
     assert inserted_film is None
-    assert removed_film is None
+    assert removed_film is True
+
+
+def test_get_film_by_id_must_return_only_projected_fields(film_info, client):
+    film_data = {
+        "title": film_info["title"],
+        "release_date": film_info["release_date"],
+        "director": film_info["director"],
+        "planets": []
+    }
+
+    inserted_id = FilmsRepository.persist_film(**film_data)
+
+    inserted_film = FilmsRepository.get_film_by_id(inserted_id, fields=["title", "director"])
+    assert inserted_film == {
+        "id": inserted_id,
+        "title": film_info["title"],
+        "director": film_info["director"]
+    }
+
+
+def test_get_films_by_ids_must_return_existing_films_in_a_single_query(film_info, client):
+    inserted_ids = [
+        FilmsRepository.persist_film(title=title, release_date=None, director=None, planets=[])
+        for title in ("Title 1", "Title 2", "Title 3")
+    ]
+
+    films = FilmsRepository.get_films_by_ids(
+        [inserted_ids[2], film_info["id"], "123", inserted_ids[0]], fields=["title"]
+    )
+
+    assert sorted(films, key=lambda film: film["title"]) == [
+        {"id": inserted_ids[0], "title": "Title 1"},
+        {"id": inserted_ids[2], "title": "Title 3"},
+    ]
+
+
+def test_get_films_by_ids_must_return_empty_list_when_no_id_is_valid(client):
+    assert FilmsRepository.get_films_by_ids(["123", "abc"]) == []
+
+
+def test_get_film_by_title_must_return_inserted_film(film_info, client):
+    inserted_id = FilmsRepository.persist_film(
+        title=film_info["title"],
+        release_date=film_info["release_date"],
+        director=film_info["director"],
+        planets=[]
+    )
+
+    film = FilmsRepository.get_film_by_title(film_info["title"], fields=["director"])
+
+    assert film == {"id": inserted_id, "director": film_info["director"]}
+
+
+def test_get_film_by_title_must_return_none_when_film_does_not_found(film_info, client):
+    assert FilmsRepository.get_film_by_title(film_info["title"]) is None
+
+
+def test_upsert_film_by_title_must_insert_then_update_the_same_document(film_info, client):
+    film_data = {
+        "title": film_info["title"],
+        "release_date": film_info["release_date"],
+        "director": film_info["director"],
+        "planets": []
+    }
+
+    inserted, created = FilmsRepository.upsert_film_by_title(**film_data)
+    inserted_film = mongo_client.db.films.find_one({"title": film_info["title"]})
+
+    assert created is True
+    assert inserted["id"] == str(inserted_film["_id"])
+    assert inserted["director"] == film_info["director"]
+
+    updated, created = FilmsRepository.upsert_film_by_title(**{**film_data, "director": "Irvin Kershner"})
+    updated_film = mongo_client.db.films.find_one({"title": film_info["title"]})
+
+    assert created is False
+    assert updated["id"] == inserted["id"]
+    assert updated["director"] == "Irvin Kershner"
+    assert updated["created"] == inserted["created"]
+
+    assert mongo_client.db.films.count_documents({}) == 1
+    assert updated_film["_id"] == inserted_film["_id"]
+    assert updated_film["created"] == inserted_film["created"]
+    assert updated_film["director"] == "Irvin Kershner"
+
+
+def test_upsert_film_by_title_must_raises_exception_when_one_or_more_planets_do_not_exist(film_info, client):
+    with pytest.raises(
+        InvalidFilm, match="One or more planets do not exist"
+    ):
+        FilmsRepository.upsert_film_by_title(
+            title=film_info["title"],
+            release_date=film_info["release_date"],
+            director=film_info["director"],
+            planets=film_info["planets"]
+        )
+
+    assert mongo_client.db.films.count_documents({}) == 0
+
+
+def test_get_films_changes_must_return_documents_and_tombstones_ordered_by_edited(client):
+    inserted_ids = [
+        FilmsRepository.persist_film(title=title, release_date=None, director=None, planets=[])
+        for title in ("Title 1", "Title 2", "Title 3")
+    ]
+    FilmsRepository.remove_film(inserted_ids[1])
+
+    # Writes in the same millisecond would tie on edited, so pin the timestamps
+    edited = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    mongo_client.db.films.update_one(
+        {"_id": bson.ObjectId(inserted_ids[0])}, {"$set": {"edited": edited + timedelta(seconds=3)}}
+    )
+    mongo_client.db.films.update_one(
+        {"_id": bson.ObjectId(inserted_ids[2])}, {"$set": {"edited": edited + timedelta(seconds=1)}}
+    )
+    mongo_client.db.films_tombstones.update_one(
+        {"_id": bson.ObjectId(inserted_ids[1])}, {"$set": {"edited": edited + timedelta(seconds=5)}}
+    )
+
+    changes = FilmsRepository.get_films_changes(since_edited=None, since_id=None, limit=10)
+
+    assert [(change["id"], change.get("deleted", False)) for change in changes] == [
+        (inserted_ids[2], False),
+        (inserted_ids[0], False),
+        (inserted_ids[1], True),
+    ]
+
+    resumed = FilmsRepository.get_films_changes(
+        since_edited=changes[0]["edited"], since_id=changes[0]["id"], limit=1
+    )
+
+    assert [change["id"] for change in resumed] == [inserted_ids[0]]
+
+
+@mock.patch.object(broadcaster, "publish")
+def test_film_writes_must_publish_events(publish_mock, film_info, client):
+    film_data = {
+        "title": film_info["title"],
+        "release_date": film_info["release_date"],
+        "director": film_info["director"],
+        "planets": []
+    }
+
+    inserted_id = FilmsRepository.persist_film(**film_data)
+    FilmsRepository.update_film(id=inserted_id, **film_data)
+    FilmsRepository.upsert_film_by_title(**film_data)
+    FilmsRepository.remove_film(inserted_id)
+
+    assert publish_mock.call_args_list == [
+        mock.call("created", "films", inserted_id),
+        mock.call("updated", "films", inserted_id),
+        mock.call("updated", "films", inserted_id),
+        mock.call("deleted", "films", inserted_id),
+    ]
+
+
+def test_persist_film_must_skip_the_lookup_of_planets_known_to_exist(film_info, query_budget, client):
+    planet_id = PlanetsRepository.persist_planet(
+        name="Tatooine", climate=None, diameter=None, population=None, films=[]
+    )
+
+    with query_budget(1) as calls:
+        FilmsRepository.persist_film(
+            title=film_info["title"],
+            release_date=film_info["release_date"],
+            director=film_info["director"],
+            planets=[planet_id]
+        )
+
+    assert calls == ["films.insert_one"]
+
+
+def test_persist_film_must_reject_a_planet_removed_by_this_process(film_info, client):
+    planet_id = PlanetsRepository.persist_planet(
+        name="Tatooine", climate=None, diameter=None, population=None, films=[]
+    )
+    PlanetsRepository.remove_planet(planet_id)
+
+    with pytest.raises(InvalidFilm, match="One or more planets do not exist"):
+        FilmsRepository.persist_film(
+            title=film_info["title"],
+            release_date=film_info["release_date"],
+            director=film_info["director"],
+            planets=[planet_id]
+        )
+
+
+def test_persist_film_must_reject_repeated_planets_known_to_exist(film_info, client):
+    planet_id = PlanetsRepository.persist_planet(
+        name="Tatooine", climate=None, diameter=None, population=None, films=[]
+    )
+
+    with pytest.raises(InvalidFilm, match="One or more planets do not exist"):
+        FilmsRepository.persist_film(
+            title=film_info["title"],
+            release_date=film_info["release_date"],
+            director=film_info["director"],
+            planets=[planet_id, planet_id]
+        )
+
+
+def test_import_films_must_reject_repeated_planets_known_to_exist(film_info, client):
+    planet_id = PlanetsRepository.persist_planet(
+        name="Tatooine", climate=None, diameter=None, population=None, films=[]
+    )
+
+    results = FilmsRepository.import_films([
+        {"title": film_info["title"], "planets": [planet_id, planet_id]},
+        {"title": "The Empire Strikes Back", "planets": [planet_id]},
+    ])
+
+    assert isinstance(results[0], InvalidFilm)
+    assert not isinstance(results[1], Exception)
+    assert mongo_client.db.films.count_documents({}) == 1
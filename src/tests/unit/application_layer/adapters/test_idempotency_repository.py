@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+from starwars.app import mongo_client
+from starwars.application_layer.adapters.idempotency_repository import IdempotencyRepository
+
+KEY = "POST /api/planets 2f1b6c1e"
+
+
+def test_reserve_must_return_none_for_a_new_key_and_the_record_afterwards(client):
+    assert IdempotencyRepository.reserve(KEY, "fingerprint", lock_seconds=60) is None
+
+    record = IdempotencyRepository.reserve(KEY, "fingerprint", lock_seconds=60)
+
+    assert record["fingerprint"] == "fingerprint"
+    assert record["response"] is None
+
+
+def test_reserve_must_take_over_abandoned_reservation(client):
+    IdempotencyRepository.reserve(KEY, "fingerprint", lock_seconds=60)
+    mongo_client.db.idempotency_keys.update_one(
+        {"_id": KEY},
+        {"$set": {"created": datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5)}}
+    )
+
+    assert IdempotencyRepository.reserve(KEY, "fingerprint", lock_seconds=60) is None
+
+
+def test_complete_must_store_response_and_release_only_pending_keys(client):
+    IdempotencyRepository.reserve(KEY, "fingerprint", lock_seconds=60)
+    IdempotencyRepository.complete(KEY, 201, {"id": "6727627bb5d077fbd23c3c59"})
+    IdempotencyRepository.release(KEY)
+
+    record = mongo_client.db.idempotency_keys.find_one({"_id": KEY})
+
+    assert record["response"] == {"status": 201, "body": {"id": "6727627bb5d077fbd23c3c59"}}
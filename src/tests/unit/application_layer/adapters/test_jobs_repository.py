@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from starwars.app import mongo_client
+from starwars.application_layer.adapters.jobs_repository import JobsRepository
+
+
+def test_claim_must_lease_the_oldest_queued_job(client):
+    first_id = JobsRepository.enqueue("first", {}, max_attempts=3)
+    JobsRepository.enqueue("second", {}, max_attempts=3)
+
+    job = JobsRepository.claim("worker-1", lease_seconds=60)
+
+    assert str(job["_id"]) == first_id
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["worker"] == "worker-1"
+    assert JobsRepository.claim("worker-2", lease_seconds=60)["type"] == "second"
+    assert JobsRepository.claim("worker-3", lease_seconds=60) is None
+
+
+def test_claim_must_take_over_jobs_whose_lease_expired(client):
+    id = JobsRepository.enqueue("cleanup", {}, max_attempts=3)
+    JobsRepository.claim("worker-1", lease_seconds=60)
+    mongo_client.db.jobs.update_one(
+        {}, {"$set": {"locked_until": datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)}}
+    )
+
+    job = JobsRepository.claim("worker-2", lease_seconds=60)
+
+    assert str(job["_id"]) == id
+    assert job["attempts"] == 2
+    assert not JobsRepository.report_progress(id, "worker-1", {"done": 1}, lease_seconds=60)
+    assert JobsRepository.report_progress(id, "worker-2", {"done": 1}, lease_seconds=60)
+
+
+def test_claim_must_fail_jobs_whose_lease_expired_on_their_last_attempt(client):
+    id = JobsRepository.enqueue("crashing", {}, max_attempts=2)
+    expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+
+    for worker in ("worker-1", "worker-2"):
+        JobsRepository.claim(worker, lease_seconds=60)
+        mongo_client.db.jobs.update_one({}, {"$set": {"locked_until": expired}})
+
+    assert JobsRepository.claim("worker-3", lease_seconds=60) is None
+
+    job = JobsRepository.get_job(id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == "Job lease expired"
+    assert "finished" in job
+
+
+def test_fail_must_queue_the_job_again_until_there_is_no_retry_left(client):
+    id = JobsRepository.enqueue("cleanup", {}, max_attempts=3)
+    JobsRepository.claim("worker-1", lease_seconds=60)
+
+    JobsRepository.fail(id, "worker-1", "boom", retry_after_seconds=0)
+    job = JobsRepository.claim("worker-1", lease_seconds=60)
+    JobsRepository.fail(id, "worker-1", "boom again", retry_after_seconds=None)
+
+    assert job["error"] == "boom"
+    assert JobsRepository.get_job(id)["status"] == "failed"
+    assert JobsRepository.get_job(id)["error"] == "boom again"
+
+
+def test_complete_must_store_result_and_get_job_hide_the_lease(client):
+    id = JobsRepository.enqueue("cleanup", {"planet_id": "6726b6b6ecec0bd07cb1fef5"}, max_attempts=3)
+    JobsRepository.claim("worker-1", lease_seconds=60)
+
+    JobsRepository.complete(id, "worker-1", {"films": 2})
+    job = JobsRepository.get_job(id)
+
+    assert job["id"] == id
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"films": 2}
+    assert "finished" in job
+    assert "worker" not in job and "locked_until" not in job
@@ -1,8 +1,13 @@
 import bson
 import pytest
 
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
 from starwars.app import mongo_client
+from starwars.application_layer.events.broadcaster import broadcaster
 from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+from starwars.application_layer.persistency.negative_cache import negative_cache
 from starwars.domain_layer.ports.planets import DuplicatedPlanet, InvalidPlanet
 
 
@@ -205,4 +210,202 @@ def test_remove_planet(planet_info, client):
     inserted_planet = mongo_client.db.planets.find_one({"_id": bson.ObjectId(inserted_id)})
 
     assert inserted_planet is None
-    assert removed_planet is None
+    assert removed_planet is True
+
+
+def test_get_planet_by_id_must_return_only_projected_fields(planet_info, client):
+    planet_data = {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"],
+        "diameter": planet_info["diameter"],
+        "population": planet_info["population"],
+        "films": []
+    }
+
+    inserted_id = PlanetsRepository.persist_planet(**planet_data)
+
+    inserted_planet = PlanetsRepository.get_planet_by_id(inserted_id, fields=["name", "climate"])
+    assert inserted_planet == {
+        "id": inserted_id,
+        "name": planet_info["name"],
+        "climate": planet_info["climate"]
+    }
+
+
+def test_get_planets_by_ids_must_return_existing_planets_in_a_single_query(planet_info, client):
+    inserted_ids = [
+        PlanetsRepository.persist_planet(name=name, climate=None, diameter=None, population=None, films=[])
+        for name in ("Planet1", "Planet2", "Planet3")
+    ]
+
+    planets = PlanetsRepository.get_planets_by_ids(
+        [inserted_ids[2], planet_info["id"], "123", inserted_ids[0]], fields=["name"]
+    )
+
+    assert sorted(planets, key=lambda planet: planet["name"]) == [
+        {"id": inserted_ids[0], "name": "Planet1"},
+        {"id": inserted_ids[2], "name": "Planet3"},
+    ]
+
+
+def test_get_planets_by_ids_must_return_empty_list_when_no_id_is_valid(client):
+    assert PlanetsRepository.get_planets_by_ids(["123", "abc"]) == []
+
+
+def test_get_planet_by_name_must_return_inserted_planet(planet_info, client):
+    inserted_id = PlanetsRepository.persist_planet(
+        name=planet_info["name"],
+        climate=planet_info["climate"],
+        diameter=planet_info["diameter"],
+        population=planet_info["population"],
+        films=[]
+    )
+
+    planet = PlanetsRepository.get_planet_by_name(planet_info["name"], fields=["climate"])
+
+    assert planet == {"id": inserted_id, "climate": planet_info["climate"]}
+
+
+def test_get_planet_by_name_must_return_none_when_planet_does_not_found(planet_info, client):
+    assert PlanetsRepository.get_planet_by_name(planet_info["name"]) is None
+
+
+def test_upsert_planet_by_name_must_insert_then_update_the_same_document(planet_info, client):
+    planet_data = {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"],
+        "diameter": planet_info["diameter"],
+        "population": planet_info["population"],
+        "films": []
+    }
+
+    inserted, created = PlanetsRepository.upsert_planet_by_name(**planet_data)
+    inserted_planet = mongo_client.db.planets.find_one({"name": planet_info["name"]})
+
+    assert created is True
+    assert inserted["id"] == str(inserted_planet["_id"])
+    assert inserted["climate"] == planet_info["climate"]
+
+    updated, created = PlanetsRepository.upsert_planet_by_name(**{**planet_data, "climate": "temperate"})
+    updated_planet = mongo_client.db.planets.find_one({"name": planet_info["name"]})
+
+    assert created is False
+    assert updated["id"] == inserted["id"]
+    assert updated["climate"] == "temperate"
+    assert updated["created"] == inserted["created"]
+
+    assert mongo_client.db.planets.count_documents({}) == 1
+    assert updated_planet["_id"] == inserted_planet["_id"]
+    assert updated_planet["created"] == inserted_planet["created"]
+    assert updated_planet["climate"] == "temperate"
+
+
+def test_upsert_planet_by_name_must_raises_exception_when_one_or_more_films_do_not_exist(planet_info, client):
+    with pytest.raises(
+        InvalidPlanet, match="One or more films do not exist"
+    ):
+        PlanetsRepository.upsert_planet_by_name(
+            name=planet_info["name"],
+            climate=planet_info["climate"],
+            diameter=planet_info["diameter"],
+            population=planet_info["population"],
+            films=planet_info["films"]
+        )
+
+    assert mongo_client.db.planets.count_documents({}) == 0
+
+
+def test_get_planets_changes_must_return_documents_and_tombstones_ordered_by_edited(client):
+    inserted_ids = [
+        PlanetsRepository.persist_planet(name=name, climate=None, diameter=None, population=None, films=[])
+        for name in ("Planet1", "Planet2", "Planet3")
+    ]
+    PlanetsRepository.remove_planet(inserted_ids[1])
+
+    # Writes in the same millisecond would tie on edited, so pin the timestamps
+    edited = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    mongo_client.db.planets.update_one(
+        {"_id": bson.ObjectId(inserted_ids[0])}, {"$set": {"edited": edited + timedelta(seconds=3)}}
+    )
+    mongo_client.db.planets.update_one(
+        {"_id": bson.ObjectId(inserted_ids[2])}, {"$set": {"edited": edited + timedelta(seconds=1)}}
+    )
+    mongo_client.db.planets_tombstones.update_one(
+        {"_id": bson.ObjectId(inserted_ids[1])}, {"$set": {"edited": edited + timedelta(seconds=5)}}
+    )
+
+    changes = PlanetsRepository.get_planets_changes(since_edited=None, since_id=None, limit=10)
+
+    assert [(change["id"], change.get("deleted", False)) for change in changes] == [
+        (inserted_ids[2], False),
+        (inserted_ids[0], False),
+        (inserted_ids[1], True),
+    ]
+
+    resumed = PlanetsRepository.get_planets_changes(
+        since_edited=changes[0]["edited"], since_id=changes[0]["id"], limit=1
+    )
+
+    assert [change["id"] for change in resumed] == [inserted_ids[0]]
+
+
+@mock.patch.object(broadcaster, "publish")
+def test_planet_writes_must_publish_events(publish_mock, planet_info, client):
+    planet_data = {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"],
+        "diameter": planet_info["diameter"],
+        "population": planet_info["population"],
+        "films": []
+    }
+
+    inserted_id = PlanetsRepository.persist_planet(**planet_data)
+    PlanetsRepository.update_planet(id=inserted_id, **planet_data)
+    PlanetsRepository.upsert_planet_by_name(**planet_data)
+    PlanetsRepository.remove_planet(inserted_id)
+
+    assert publish_mock.call_args_list == [
+        mock.call("created", "planets", inserted_id),
+        mock.call("updated", "planets", inserted_id),
+        mock.call("updated", "planets", inserted_id),
+        mock.call("deleted", "planets", inserted_id),
+    ]
+
+
+def test_get_planet_by_id_must_answer_repeated_misses_from_negative_cache(planet_info, query_budget, client):
+    PlanetsRepository.get_planet_by_id(planet_info["id"])
+
+    with query_budget(0):
+        assert PlanetsRepository.get_planet_by_id(planet_info["id"]) is None
+
+    mongo_client.db.planets.insert_one({"_id": bson.ObjectId(planet_info["id"]), "name": "Hoth"})
+    negative_cache.discard("planets", planet_info["id"])
+
+    assert PlanetsRepository.get_planet_by_id(planet_info["id"])["name"] == "Hoth"
+
+
+def test_remove_planet_must_remember_removed_id_as_missing(client):
+    planet_id = PlanetsRepository.persist_planet(
+        name="Hoth", climate="frozen", diameter="7200", population="unknown", films=[]
+    )
+
+    assert not negative_cache.contains("planets", planet_id)
+
+    PlanetsRepository.remove_planet(planet_id)
+
+    assert negative_cache.contains("planets", planet_id)
+
+
+def test_upsert_planet_by_name_must_reject_repeated_films(planet_info, client):
+    film_id = str(mongo_client.db.films.insert_one({"title": "A New Hope"}).inserted_id)
+
+    with pytest.raises(InvalidPlanet, match="One or more films do not exist"):
+        PlanetsRepository.upsert_planet_by_name(
+            name=planet_info["name"],
+            climate=planet_info["climate"],
+            diameter=planet_info["diameter"],
+            population=planet_info["population"],
+            films=[film_id, film_id]
+        )
+
+    assert mongo_client.db.planets.count_documents({}) == 0
@@ -0,0 +1,61 @@
+import pytest
+import time
+
+from mongomock.collection import Collection
+from unittest import mock
+
+from starwars.app import mongo_client
+from starwars.application_layer.adapters.rate_limits_repository import RateLimitsRepository
+
+KEY = "read:ip:10.0.0.1"
+# Buckets expire through a TTL index, which mongomock enforces
+NOW = time.time()
+
+
+@pytest.fixture
+def pipeline_updates():
+    """mongomock only takes documents as updates, this runs update pipelines
+    through its aggregation engine instead"""
+
+    original = Collection.find_one_and_update
+
+    def find_one_and_update(collection, filter, update, upsert=False, return_document=False, **kwargs):
+        if not isinstance(update, list):
+            return original(collection, filter, update, upsert=upsert, return_document=return_document, **kwargs)
+
+        existing = collection.find_one(filter)
+
+        if existing is None and not upsert:
+            return None
+
+        scratch = collection.database["pipeline_updates"]
+        scratch.delete_many({})
+        scratch.insert_one(existing or dict(filter))
+        updated = next(scratch.aggregate(update))
+        collection.replace_one({"_id": updated["_id"]}, updated, upsert=True)
+
+        return updated if return_document else existing
+
+    with mock.patch.object(Collection, "find_one_and_update", find_one_and_update):
+        yield
+
+
+def test_take_must_run_out_of_tokens_and_refill_over_time(pipeline_updates, client):
+    assert [RateLimitsRepository.take(KEY, 2, 0.5, now=NOW)[0] for _ in range(3)] == [True, True, False]
+
+    # One token back after 2 seconds at 0.5 per second
+    assert RateLimitsRepository.take(KEY, 2, 0.5, now=NOW + 2) == (True, 0.0)
+    assert RateLimitsRepository.take(KEY, 2, 0.5, now=NOW + 2)[0] is False
+
+    # Never refilled past the capacity
+    assert RateLimitsRepository.take(KEY, 2, 0.5, now=NOW + 900) == (True, 1.0)
+
+
+def test_take_must_store_the_types_required_by_the_collection_validator(pipeline_updates, client):
+    RateLimitsRepository.take(KEY, 5, 1, now=NOW)
+
+    bucket = mongo_client.db.rate_limits.find_one({"_id": KEY})
+
+    assert type(bucket["tokens"]) is float
+    assert type(bucket["updated"]) is float
+    assert bucket["expires"].timestamp() == pytest.approx(NOW + 5)
@@ -0,0 +1,74 @@
+from pymongo.errors import CollectionInvalid
+from unittest import mock
+
+from starwars.application_layer.events.broadcaster import Broadcaster, MongoEventRelay
+
+
+def test_publish_must_deliver_event_to_every_subscriber():
+    broadcaster = Broadcaster()
+    subscriptions = [broadcaster.subscribe(), broadcaster.subscribe()]
+
+    broadcaster.publish("created", "planets", "6727627bb5d077fbd23c3c59")
+
+    for subscription in subscriptions:
+        event = subscription.get(timeout=0)
+        assert event["type"] == "created"
+        assert event["resource"] == "planets"
+        assert event["id"] == "6727627bb5d077fbd23c3c59"
+
+
+def test_unsubscribe_must_stop_delivering_events():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe()
+    broadcaster.unsubscribe(subscription)
+
+    broadcaster.publish("deleted", "films", "6726b6b6ecec0bd07cb1fef5")
+
+    assert subscription.get(timeout=0) is None
+    assert broadcaster.subscribers_count == 0
+
+
+def test_deliver_must_disconnect_subscribers_that_do_not_keep_up():
+    broadcaster = Broadcaster()
+    broadcaster.max_queued_events = 1
+    subscription = broadcaster.subscribe()
+
+    broadcaster.publish("created", "planets", "1")
+    broadcaster.publish("created", "planets", "2")
+
+    assert subscription.closed is True
+    assert broadcaster.subscribers_count == 0
+
+
+def test_publish_must_not_raise_when_relay_fails():
+    broadcaster = Broadcaster()
+    broadcaster._relay = mock.Mock()
+    broadcaster._relay.publish.side_effect = Exception("Relay down")
+
+    broadcaster.publish("updated", "planets", "1")
+
+
+@mock.patch("starwars.application_layer.events.broadcaster.mongo_client")
+def test_publish_before_any_subscriber_must_create_capped_collection_first(mongo_client_mock):
+    relay = MongoEventRelay(broadcaster=Broadcaster(), collection_name="events", size=1024)
+
+    relay.publish({"type": "created"})
+    relay.publish({"type": "updated"})
+
+    db = mongo_client_mock.db
+    db.create_collection.assert_called_once_with("events", capped=True, size=1024)
+    assert db.mock_calls.index(mock.call.create_collection("events", capped=True, size=1024)) < \
+        db.mock_calls.index(mock.call.__getitem__("events"))
+    assert db["events"].insert_one.call_count == 2
+
+
+@mock.patch("starwars.application_layer.events.broadcaster.mongo_client")
+def test_publish_must_convert_an_uncapped_events_collection(mongo_client_mock):
+    db = mongo_client_mock.db
+    db.create_collection.side_effect = CollectionInvalid("collection events already exists")
+    db["events"].options.return_value = {}
+    relay = MongoEventRelay(broadcaster=Broadcaster(), collection_name="events", size=1024)
+
+    relay.publish({"type": "created"})
+
+    db.command.assert_called_once_with("convertToCapped", "events", size=1024)
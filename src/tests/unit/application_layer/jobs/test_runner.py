@@ -0,0 +1,117 @@
+import pytest
+
+from unittest import mock
+
+from starwars.app import mongo_client
+from starwars.application_layer.adapters.films_repository import FilmsRepository
+from starwars.application_layer.adapters.jobs_repository import JobsRepository
+from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+from starwars.application_layer.jobs.runner import JobRunner, job_runner
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.use_cases.jobs import JobsUseCase
+from starwars.application_layer.use_cases.planets import PlanetsUseCase
+
+WORKER = "worker-1"
+
+
+@pytest.fixture
+def runner(client):
+    runner = JobRunner()
+    runner.init_app(client.application)
+
+    return runner
+
+
+def test_workers_must_start_on_the_first_request_without_uwsgi(client):
+    job_runner.threads = 2
+
+    with mock.patch.object(job_runner, "start") as start_mock:
+        client.get("/health-status")
+        client.get("/health-status")
+
+    start_mock.assert_called_once_with()
+    job_runner.stop()
+
+
+def test_run_once_must_return_false_without_runnable_jobs(runner):
+    assert runner.run_once(WORKER) is False
+
+
+def test_run_once_must_store_progress_and_result(runner):
+    @runner.handler("count")
+    def count(params, progress):
+        progress(done=params["to"])
+        return {"counted": params["to"]}
+
+    id = JobsUseCase.enqueue("count", {"to": 3})
+
+    assert runner.run_once(WORKER) is True
+
+    job = JobsUseCase.get_job(id)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"done": 3}
+    assert job["result"] == {"counted": 3}
+
+
+def test_failed_jobs_must_be_retried_with_growing_delay_until_max_attempts(runner):
+    runner.retry_delay_seconds = 0
+
+    @runner.handler("flaky")
+    def flaky(params, progress):
+        raise ValueError("boom")
+
+    id = JobsRepository.enqueue("flaky", {}, max_attempts=2)
+
+    runner.run_once(WORKER)
+    assert JobsUseCase.get_job(id)["status"] == "queued"
+
+    runner.run_once(WORKER)
+    job = JobsUseCase.get_job(id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == "boom"
+
+
+def test_jobs_of_unknown_type_must_fail_for_good(runner):
+    id = JobsUseCase.enqueue("unknown", {})
+
+    runner.run_once(WORKER)
+
+    assert JobsUseCase.get_job(id)["status"] == "failed"
+
+
+def test_job_whose_lease_was_lost_must_be_left_to_its_new_owner(runner):
+    @runner.handler("stolen")
+    def stolen(params, progress):
+        mongo_client.db.jobs.update_one({}, {"$set": {"worker": "worker-2"}})
+        progress(done=1)
+
+    id = JobsUseCase.enqueue("stolen", {})
+
+    runner.run_once(WORKER)
+
+    assert JobsUseCase.get_job(id)["status"] == "running"
+
+
+def test_removing_a_planet_must_clean_its_references_from_films_in_a_job(client, monkeypatch):
+    # The cleanup job is otherwise delayed while other processes may trust the id
+    monkeypatch.setattr(reference_ids, "ttl_seconds", 0)
+
+    planet_id = PlanetsRepository.persist_planet(
+        name="Tatooine", climate=None, diameter=None, population=None, films=[]
+    )
+    other_planet_id = PlanetsRepository.persist_planet(
+        name="Alderaan", climate=None, diameter=None, population=None, films=[]
+    )
+    for title in ("A New Hope", "Return of the Jedi"):
+        FilmsRepository.persist_film(
+            title=title, release_date=None, director=None, planets=[planet_id, other_planet_id]
+        )
+
+    PlanetsUseCase.remove_planet(planet_id)
+    job_runner.run_once(WORKER)
+
+    job = mongo_client.db.jobs.find_one()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"films": 2}
+    assert [film["planets"] for film in mongo_client.db.films.find()] == [[other_planet_id]] * 2
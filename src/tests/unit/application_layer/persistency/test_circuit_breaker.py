@@ -0,0 +1,56 @@
+from unittest import mock
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from starwars.application_layer.persistency.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    is_backend_failure
+)
+
+MONOTONIC = "starwars.application_layer.persistency.circuit_breaker.time.monotonic"
+
+
+def test_circuit_must_open_after_consecutive_failures_and_allow_one_trial_after_reset():
+    breaker = CircuitBreaker()
+    breaker.failure_threshold = 2
+    breaker.reset_seconds = 10
+
+    with mock.patch(MONOTONIC) as monotonic:
+        monotonic.return_value = 100
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.retry_after() == 10
+
+        monotonic.return_value = 111
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+
+def test_failed_trial_must_open_the_circuit_again():
+    breaker = CircuitBreaker()
+    breaker.failure_threshold = 1
+    breaker.reset_seconds = 0
+
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_only_database_failures_must_count():
+    assert is_backend_failure(AutoReconnect("primary stepped down"))
+    assert not is_backend_failure(OperationFailure("bad query"))
+    assert not is_backend_failure(ValueError("invalid id"))
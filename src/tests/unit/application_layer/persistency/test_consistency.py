@@ -0,0 +1,125 @@
+from unittest import mock
+
+import pytest
+
+from bson import Int64, Timestamp
+from flask import Flask
+from pymongo.read_preferences import SecondaryPreferred
+
+from starwars.application_layer.persistency.consistency import (
+    CONSISTENCY_TOKEN_HEADER,
+    InvalidConsistencyToken,
+    ReadRouting,
+    build_read_preference,
+    decode_token,
+    encode_token
+)
+
+CLUSTER_TIME = {
+    "clusterTime": Timestamp(1730592000, 3),
+    "signature": {"hash": b"\x00" * 20, "keyId": Int64(0)},
+}
+OPERATION_TIME = Timestamp(1730592000, 2)
+
+
+class FakeReplicaSetSession:
+    """Stands in for a session on a replica set member, which advances the
+    cluster and operation times on every command"""
+
+    def __init__(self):
+        self.cluster_time = None
+        self.operation_time = None
+        self.ended = False
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        self.operation_time = operation_time
+
+    def end_session(self):
+        self.ended = True
+
+
+@pytest.fixture()
+def routed_app():
+    app = Flask(__name__)
+    app.config.update(
+        READ_PREFERENCE="secondaryPreferred",
+        READ_MAX_STALENESS_SECONDS=120,
+        CAUSAL_CONSISTENCY=True
+    )
+    routing = ReadRouting()
+    routing.init_app(app)
+
+    @app.route("/write", methods=["POST"])
+    def write():
+        routing.session().advance_operation_time(OPERATION_TIME)
+        routing.session().advance_cluster_time(CLUSTER_TIME)
+        return {}
+
+    @app.route("/read")
+    def read():
+        session = routing.session()
+        return {"operation_time": session.operation_time.time if session.operation_time else None}
+
+    return app, routing
+
+
+def test_token_must_round_trip_cluster_and_operation_times():
+    token = encode_token(CLUSTER_TIME, OPERATION_TIME)
+
+    assert decode_token(token) == (CLUSTER_TIME, OPERATION_TIME)
+
+
+def test_decode_token_must_raise_invalid_consistency_token():
+    with pytest.raises(InvalidConsistencyToken):
+        decode_token("not-a-token")
+
+
+def test_build_read_preference_must_apply_max_staleness():
+    read_preference = build_read_preference("secondaryPreferred", 120)
+
+    assert read_preference == SecondaryPreferred(max_staleness=120)
+
+    with pytest.raises(ValueError):
+        build_read_preference("secondaryOnly", -1)
+
+
+def test_reads_must_use_configured_read_preference(routed_app):
+    from mongomock import MongoClient
+
+    _, routing = routed_app
+    collection = routing.reads(MongoClient().db.planets)
+
+    assert collection.read_preference == SecondaryPreferred(max_staleness=120)
+
+
+def test_reads_after_own_write_must_resume_from_returned_token(routed_app):
+    app, _ = routed_app
+    sessions = []
+
+    def _start_session(causal_consistency):
+        sessions.append(FakeReplicaSetSession())
+        return sessions[-1]
+
+    with mock.patch("starwars.application_layer.persistency.consistency.mongo_client") as mock_client:
+        mock_client.cx.start_session.side_effect = _start_session
+        client = app.test_client()
+
+        write_response = client.post("/write")
+        token = write_response.headers[CONSISTENCY_TOKEN_HEADER]
+
+        read_response = client.get("/read", headers={CONSISTENCY_TOKEN_HEADER: token})
+
+    assert read_response.json == {"operation_time": OPERATION_TIME.time}
+    assert sessions[1].cluster_time == CLUSTER_TIME
+    assert all(session.ended for session in sessions)
+
+
+def test_invalid_token_must_return_400(routed_app):
+    app, _ = routed_app
+
+    response = app.test_client().get("/read", headers={CONSISTENCY_TOKEN_HEADER: "bad"})
+
+    assert response.status_code == 400
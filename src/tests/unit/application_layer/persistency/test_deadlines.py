@@ -0,0 +1,41 @@
+import pytest
+
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout, OperationFailure, ServerSelectionTimeoutError
+
+from starwars.application_layer.persistency.deadlines import (
+    InvalidRequestTimeout,
+    end_deadline,
+    is_database_unavailable,
+    is_deadline_exceeded,
+    parse_request_timeout,
+    start_deadline
+)
+
+
+def test_parse_request_timeout_must_default_and_cap_the_deadline():
+    assert parse_request_timeout(None, default=10, maximum=30) == 10
+    assert parse_request_timeout("2.5", default=10, maximum=30) == 2.5
+    assert parse_request_timeout("120", default=10, maximum=30) == 30
+
+
+@pytest.mark.parametrize("value", ["soon", "0", "-1"])
+def test_parse_request_timeout_must_raise_invalid_request_timeout(value):
+    with pytest.raises(InvalidRequestTimeout):
+        parse_request_timeout(value, default=10, maximum=30)
+
+
+def test_deadline_must_apply_to_mongo_operations_of_the_request(client):
+    with client.application.test_request_context(headers={"X-Request-Timeout": "2"}):
+        assert start_deadline() is None
+        assert 0 < _csot.remaining() <= 2
+
+        end_deadline()
+
+    assert _csot.get_timeout() is None
+
+
+def test_timeout_errors_must_be_told_apart():
+    assert is_database_unavailable(ServerSelectionTimeoutError("no primary"))
+    assert is_deadline_exceeded(ExecutionTimeout("operation exceeded time limit", 50))
+    assert not is_deadline_exceeded(OperationFailure("bad query"))
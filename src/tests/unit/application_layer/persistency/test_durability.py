@@ -0,0 +1,65 @@
+import pytest
+
+from flask import Flask
+from mongomock import MongoClient
+from pymongo.write_concern import WriteConcern
+
+from starwars.application_layer.persistency.durability import (
+    WRITE_CONCERN_HEADER,
+    WriteProfiles
+)
+
+
+@pytest.fixture()
+def profiles_app():
+    app = Flask(__name__)
+    app.config.update(
+        WRITE_CONCERN_SINGLE="durable",
+        WRITE_CONCERN_BULK="fast",
+        WRITE_CONCERN_IMPORT="fast",
+        WRITE_CONCERN_ALLOWED_OVERRIDES=["acknowledged"]
+    )
+    profiles = WriteProfiles()
+    profiles.init_app(app)
+
+    @app.route("/write", methods=["POST"])
+    def write():
+        return {"profile": profiles.profile()}
+
+    return app, profiles
+
+
+def test_writes_must_use_the_profile_of_the_operation(profiles_app):
+    _, profiles = profiles_app
+    collection = MongoClient().db.planets
+
+    assert profiles.writes(collection).write_concern == WriteConcern(w="majority", j=True)
+    assert profiles.writes(collection, "bulk").write_concern == WriteConcern(w=1, j=False)
+
+
+def test_request_must_opt_into_allowed_profile_only(profiles_app):
+    app, _ = profiles_app
+    client = app.test_client()
+
+    assert client.post("/write").json == {"profile": "durable"}
+    assert client.post(
+        "/write", headers={WRITE_CONCERN_HEADER: "acknowledged"}
+    ).json == {"profile": "acknowledged"}
+
+    response = client.post("/write", headers={WRITE_CONCERN_HEADER: "fast"})
+
+    assert response.status_code == 400
+    assert response.json == {"message": "Write concern fast is not allowed, allowed: acknowledged"}
+
+
+def test_init_app_must_reject_unknown_profiles():
+    app = Flask(__name__)
+    app.config.update(
+        WRITE_CONCERN_SINGLE="unsafe",
+        WRITE_CONCERN_BULK="fast",
+        WRITE_CONCERN_IMPORT="fast",
+        WRITE_CONCERN_ALLOWED_OVERRIDES=[]
+    )
+
+    with pytest.raises(ValueError):
+        WriteProfiles().init_app(app)
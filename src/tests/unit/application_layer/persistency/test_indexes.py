@@ -0,0 +1,49 @@
+from starwars.application_layer.persistency.collections import Index
+from starwars.application_layer.persistency.indexes import diff_indexes
+
+
+def test_index_must_generate_mongodb_default_name():
+    assert Index("name").index_name == "name_1"
+    assert Index([("edited", 1), ("_id", -1)]).index_name == "edited_1__id_-1"
+    assert Index("name", name="custom").index_name == "custom"
+
+
+def test_diff_indexes_must_be_empty_when_live_indexes_match_declared_ones():
+    declared = [
+        Index("name", unique=True),
+        Index("edited", expire_after_seconds=60),
+        Index([("title", "text")]),
+        Index("director", collation={"locale": "en", "strength": 2}),
+    ]
+    live = {
+        "_id_": {"key": [("_id", 1)], "v": 2},
+        "name_1": {"key": [("name", 1.0)], "unique": True, "v": 2},
+        "edited_1": {"key": [("edited", 1)], "expireAfterSeconds": 60, "v": 2},
+        "title_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"title": 1}, "v": 2},
+        "director_1": {
+            "key": [("director", 1)],
+            "collation": {"locale": "en", "strength": 2, "caseLevel": False},
+            "v": 2,
+        },
+    }
+
+    assert diff_indexes(declared, live).is_empty
+
+
+def test_diff_indexes_must_report_missing_changed_and_undeclared_indexes():
+    declared = [
+        Index("name", unique=True),
+        Index("edited", expire_after_seconds=60),
+        Index("films", partial_filter_expression={"films.0": {"$exists": True}}),
+    ]
+    live = {
+        "_id_": {"key": [("_id", 1)], "v": 2},
+        "edited_1": {"key": [("edited", 1)], "expireAfterSeconds": 120, "v": 2},
+        "climate_1": {"key": [("climate", 1)], "v": 2},
+    }
+
+    diff = diff_indexes(declared, live)
+
+    assert [index.index_name for index in diff.to_create] == ["name_1", "films_1"]
+    assert [index.index_name for index in diff.to_replace] == ["edited_1"]
+    assert diff.to_drop == ["climate_1"]
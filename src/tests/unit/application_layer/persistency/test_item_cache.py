@@ -0,0 +1,107 @@
+import time
+
+from unittest import mock
+
+import pytest
+
+from pymongo.errors import AutoReconnect
+
+from starwars.application_layer.persistency.circuit_breaker import CircuitOpen, database_breaker
+from starwars.application_layer.persistency.item_cache import (
+    REVALIDATION_FAILED_WARNING,
+    STALE_WARNING,
+    ItemCache
+)
+
+ID = "6727627bb5d077fbd23c3c59"
+MONOTONIC = "starwars.application_layer.persistency.item_cache.time.monotonic"
+
+
+@pytest.fixture()
+def cache():
+    item_cache = ItemCache()
+    item_cache.fresh_seconds = 10
+    item_cache.stale_if_error_seconds = 60
+
+    return item_cache
+
+
+def _failing_loader():
+    raise AutoReconnect("primary stepped down")
+
+
+def test_fresh_entries_must_be_served_without_loading(cache, client):
+    loader = mock.Mock(return_value={"name": "Tatooine"})
+
+    with client.application.test_request_context():
+        cache.get("planets", ID, (), loader)
+        result = cache.get("planets", ID, (), loader)
+        response = client.application.process_response(client.application.response_class())
+
+    assert result == {"name": "Tatooine"}
+    assert loader.call_count == 1
+    assert response.headers["Age"] == "0"
+
+
+def test_expired_entry_must_be_served_stale_when_database_fails(cache, client):
+    with mock.patch(MONOTONIC) as monotonic:
+        monotonic.return_value = 100
+        cache.get("planets", ID, (), lambda: {"name": "Tatooine"})
+
+        monotonic.return_value = 130
+
+        with client.application.test_request_context():
+            result = cache.get("planets", ID, (), _failing_loader)
+            response = client.application.process_response(client.application.response_class())
+
+    assert result == {"name": "Tatooine"}
+    assert response.headers["Warning"] == REVALIDATION_FAILED_WARNING
+    assert response.headers["Age"] == "30"
+
+
+@mock.patch.object(database_breaker, "failure_threshold", 1)
+def test_open_circuit_must_serve_stale_or_fail_fast(cache, client):
+    with mock.patch(MONOTONIC) as monotonic:
+        monotonic.return_value = 100
+        cache.get("planets", ID, (), lambda: {"name": "Tatooine"})
+
+        monotonic.return_value = 130
+        cache.get("planets", ID, (), _failing_loader)
+
+        loader = mock.Mock()
+
+        with client.application.test_request_context():
+            assert cache.get("planets", ID, (), loader) == {"name": "Tatooine"}
+            response = client.application.process_response(client.application.response_class())
+
+        with pytest.raises(CircuitOpen):
+            cache.get("films", ID, (), loader)
+
+    loader.assert_not_called()
+    assert response.headers["Warning"] == STALE_WARNING
+
+
+def test_entries_near_expiry_must_be_refreshed_in_background(cache):
+    cache.get("planets", ID, (), lambda: {"name": "Tatooine"})
+    cache._entries[("planets", ID)][()].stored_at -= 9
+
+    result = cache.get("planets", ID, (), lambda: {"name": "Tatooine II"})
+
+    deadline = time.monotonic() + 2
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert result == {"name": "Tatooine"}
+    assert cache.get("planets", ID, (), mock.Mock()) == {"name": "Tatooine II"}
+
+
+def test_write_during_load_must_not_cache_the_loaded_value(cache):
+    def _loader():
+        cache.invalidate("planets", ID)
+        return {"name": "Tatooine"}
+
+    cache.get("planets", ID, (), _loader)
+    loader = mock.Mock(return_value={"name": "Tatooine II"})
+
+    assert cache.get("planets", ID, (), loader) == {"name": "Tatooine II"}
+    loader.assert_called_once()
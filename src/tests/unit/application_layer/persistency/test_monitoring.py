@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from flask import Response
+
+from starwars.application_layer.persistency.monitoring import (
+    PoolStatsListener,
+    RequestStatsListener,
+    SlowQueryListener,
+    add_db_stats_headers,
+    docs_returned,
+    reset_db_stats
+)
+
+FIND_COMMAND = {"find": "planets", "filter": {"name": "Tatooine"}, "limit": 1}
+FIND_REPLY = {"cursor": {"firstBatch": [{"_id": "6727627bb5d077fbd23c3c59"}], "id": 0}}
+
+
+def _run_command(listener, duration_micros, command=FIND_COMMAND, reply=FIND_REPLY):
+    listener.started(SimpleNamespace(
+        command_name="find", command=command, connection_id=("localhost", 27017), request_id=1
+    ))
+    listener.succeeded(SimpleNamespace(
+        command_name="find",
+        reply=reply,
+        duration_micros=duration_micros,
+        connection_id=("localhost", 27017),
+        request_id=1
+    ))
+
+
+class FakePlanetsRepository:
+    @classmethod
+    def get_planet_by_name(cls, listener, duration_micros):
+        _run_command(listener, duration_micros)
+
+
+def test_listener_must_record_only_commands_above_threshold():
+    listener = SlowQueryListener()
+    listener.threshold_ms = 50
+
+    _run_command(listener, duration_micros=10_000)
+    _run_command(listener, duration_micros=80_000)
+
+    assert len(listener.slow_queries) == 1
+
+    slow_query = listener.slow_queries[0]
+    assert slow_query["command"] == "find"
+    assert slow_query["collection"] == "planets"
+    assert slow_query["duration_ms"] == 80
+    assert slow_query["filter"] == {"name": "?"}
+    assert slow_query["docs_returned"] == 1
+    assert slow_query["route"] is None
+
+
+def test_listener_must_attribute_slow_query_to_repository_method():
+    listener = SlowQueryListener()
+    listener.threshold_ms = 0
+
+    FakePlanetsRepository.get_planet_by_name(listener, duration_micros=1_000)
+
+    assert listener.slow_queries[0]["repository"] == "FakePlanetsRepository.get_planet_by_name"
+
+
+def test_listener_must_keep_only_the_last_slow_queries(client):
+    client.application.config["SLOW_QUERY_BUFFER_SIZE"] = 2
+    listener = SlowQueryListener()
+    listener.init_app(client.application)
+    listener.threshold_ms = 0
+
+    for duration_micros in (1_000, 2_000, 3_000):
+        _run_command(listener, duration_micros)
+
+    assert [query["duration_ms"] for query in listener.slow_queries] == [2, 3]
+
+
+def test_docs_returned_must_read_cursor_batches_and_counts():
+    assert docs_returned("getMore", {"cursor": {"nextBatch": [{}, {}]}}) == 2
+    assert docs_returned("findAndModify", {"value": None}) == 0
+    assert docs_returned("delete", {"n": 3}) == 3
+    assert docs_returned("ping", {"ok": 1}) is None
+
+
+def test_request_stats_must_report_calls_and_warn_on_repeated_shapes(client):
+    client.application.config["DB_REPEATED_QUERY_THRESHOLD"] = 3
+    listener = RequestStatsListener()
+
+    with client.application.test_request_context("/api/planets"):
+        reset_db_stats()
+
+        for _ in range(3):
+            _run_command(listener, duration_micros=2_000)
+
+        with mock.patch(
+            "starwars.application_layer.persistency.monitoring.logger"
+        ) as mock_logger:
+            response = add_db_stats_headers(Response())
+
+    assert response.headers["X-DB-Calls"] == "3"
+    assert response.headers["Server-Timing"] == 'db;dur=6.0;desc="3 calls"'
+    assert mock_logger.warning.call_args.args == ("Repeated queries in request",)
+
+
+def test_pool_stats_must_track_connections_and_check_outs():
+    listener = PoolStatsListener()
+    address = ("localhost", 27017)
+    event = SimpleNamespace(address=address, reason="timeout")
+
+    listener.pool_created(event)
+    listener.connection_created(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(event)
+
+    assert listener.pools["localhost:27017"] == {
+        "open": 1, "in_use": 1, "waiting": 0, "checked_out": 1,
+        "check_out_failures": 1, "check_out_timeouts": 1, "cleared": 0
+    }
+
+    listener.connection_checked_in(event)
+    listener.pool_closed(event)
+
+    assert listener.pools == {}
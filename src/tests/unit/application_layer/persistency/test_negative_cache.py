@@ -0,0 +1,40 @@
+from unittest import mock
+
+from starwars.application_layer.persistency.negative_cache import NegativeCache
+
+ID = "6726b6b6ecec0bd07cb1fef5"
+
+
+def test_negative_cache_must_remember_misses_until_they_expire():
+    cache = NegativeCache()
+    cache.ttl_seconds = 60
+
+    with mock.patch("starwars.application_layer.persistency.negative_cache.time.monotonic") as monotonic:
+        monotonic.return_value = 1000
+        cache.add("planets", ID)
+
+        assert cache.contains("planets", ID)
+        assert not cache.contains("films", ID)
+
+        monotonic.return_value = 1061
+
+        assert not cache.contains("planets", ID)
+
+
+def test_negative_cache_must_evict_oldest_miss_when_full():
+    cache = NegativeCache()
+    cache.max_size = 2
+
+    for id in ("a", "b", "c"):
+        cache.add("planets", id)
+
+    assert not cache.contains("planets", "a")
+    assert cache.contains("planets", "c")
+
+
+def test_discard_must_forget_a_miss():
+    cache = NegativeCache()
+    cache.add("planets", ID)
+    cache.discard("planets", ID)
+
+    assert not cache.contains("planets", ID)
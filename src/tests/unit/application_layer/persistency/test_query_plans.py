@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from starwars.application_layer.persistency.query_plans import (
+    PlanReport,
+    QueryRecorder,
+    explain,
+    plan_stages,
+    redact
+)
+
+
+def _started_event(command_name, command):
+    return SimpleNamespace(command_name=command_name, command=command)
+
+
+def test_redact_must_keep_operators_and_replace_values():
+    query = {
+        "$or": [
+            {"edited": {"$gt": "2024-11-03"}},
+            {"edited": "2024-11-03", "_id": {"$in": ["a", "b"]}},
+        ]
+    }
+
+    assert redact(query) == {
+        "$or": [
+            {"edited": {"$gt": "?"}},
+            {"edited": "?", "_id": {"$in": "?"}},
+        ]
+    }
+
+
+def test_query_recorder_must_record_one_command_per_shape_of_known_collections():
+    recorder = QueryRecorder(["planets"])
+    recorder.enabled = True
+
+    recorder.started(_started_event("find", {"find": "planets", "filter": {"_id": 1}, "lsid": {}, "$db": "db"}))
+    recorder.started(_started_event("find", {"find": "planets", "filter": {"_id": 2}, "lsid": {}, "$db": "db"}))
+    recorder.started(_started_event("insert", {"insert": "planets", "documents": []}))
+    recorder.started(_started_event("find", {"find": "system.views", "filter": {}}))
+    recorder.started(_started_event(
+        "update", {"update": "planets", "updates": [{"q": {"name": "Tatooine"}, "u": {}}]}
+    ))
+
+    assert [recorded.shape for recorded in recorder.recorded] == [
+        {"command": "find", "collection": "planets", "filter": {"_id": "?"}, "sort": None},
+        {"command": "update", "collection": "planets", "filter": {"name": "?"}, "sort": None},
+    ]
+    assert recorder.recorded[0].command == {"find": "planets", "filter": {"_id": 1}}
+
+
+def test_query_recorder_must_strip_options_that_explain_rejects():
+    recorder = QueryRecorder(["planets"])
+    recorder.enabled = True
+
+    recorder.started(_started_event("update", {
+        "update": "planets",
+        "updates": [{"q": {"_id": 1}, "u": {}}],
+        "writeConcern": {"w": "majority"},
+        "maxTimeMS": 500,
+    }))
+
+    assert recorder.recorded[0].command == {"update": "planets", "updates": [{"q": {"_id": 1}, "u": {}}]}
+
+
+def test_query_recorder_must_ignore_commands_while_disabled():
+    recorder = QueryRecorder(["planets"])
+
+    recorder.started(_started_event("find", {"find": "planets", "filter": {}}))
+
+    assert recorder.recorded == []
+
+
+def test_plan_stages_must_walk_classic_and_slot_based_plans():
+    classic_plan = {
+        "stage": "LIMIT",
+        "inputStage": {
+            "stage": "SORT_MERGE",
+            "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}],
+        },
+    }
+
+    assert plan_stages(classic_plan) == ["LIMIT", "SORT_MERGE", "IXSCAN", "COLLSCAN"]
+    assert plan_stages({"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}) == [
+        "FETCH", "IXSCAN"
+    ]
+
+
+def test_explain_must_report_collection_scans():
+    db = mock.Mock()
+    db.command.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}},
+        "executionStats": {"totalKeysExamined": 0, "totalDocsExamined": 50, "nReturned": 1},
+    }
+    recorder = QueryRecorder(["planets"])
+    recorder.enabled = True
+    recorder.started(_started_event("find", {"find": "planets", "filter": {"climate": "arid"}}))
+
+    report = explain(db, recorder.recorded[0])
+
+    assert report == PlanReport(
+        shape={"command": "find", "collection": "planets", "filter": {"climate": "?"}, "sort": None},
+        stages=["COLLSCAN"],
+        keys_examined=0,
+        docs_examined=50,
+        returned=1,
+    )
+    assert report.is_index_backed is False
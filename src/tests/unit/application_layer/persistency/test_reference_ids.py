@@ -0,0 +1,42 @@
+from unittest import mock
+
+from starwars.application_layer.persistency.reference_ids import ReferenceIds
+
+
+def test_missing_must_return_unknown_ids_in_order_and_without_repetitions():
+    ids = ReferenceIds()
+    ids.add("planets", ["b"])
+
+    assert ids.missing("planets", ["c", "b", "a", "c"]) == ["c", "a"]
+    assert ids.missing("films", ["b"]) == ["b"]
+
+
+def test_known_ids_must_expire_after_ttl():
+    ids = ReferenceIds()
+    ids.ttl_seconds = 30
+
+    with mock.patch("starwars.application_layer.persistency.reference_ids.time.monotonic") as monotonic:
+        monotonic.return_value = 1000
+        ids.add("planets", ["a"])
+
+        assert ids.missing("planets", ["a"]) == []
+
+        monotonic.return_value = 1031
+
+        assert ids.missing("planets", ["a"]) == ["a"]
+
+
+def test_add_must_evict_oldest_id_when_full():
+    ids = ReferenceIds()
+    ids.max_size = 2
+    ids.add("planets", ["a", "b", "c"])
+
+    assert ids.missing("planets", ["a", "b", "c"]) == ["a"]
+
+
+def test_discard_must_forget_a_known_id():
+    ids = ReferenceIds()
+    ids.add("planets", ["a"])
+    ids.discard("planets", "a")
+
+    assert ids.missing("planets", ["a"]) == ["a"]
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from starwars.application_layer.persistency.single_flight import SingleFlight
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+
+        time.sleep(0.001)
+
+
+def _run_concurrently(single_flight, fn, callers):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do("planets.get_planet_by_id", "id", fn)))
+        for _ in range(callers)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    return threads, results
+
+
+def test_concurrent_identical_lookups_must_share_one_call():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def _find_one():
+        calls.append(1)
+        release.wait()
+        return {"name": "Tatooine"}
+
+    threads, results = _run_concurrently(single_flight, _find_one, callers=5)
+    _wait_for(lambda: single_flight.stats.get("planets.get_planet_by_id", {}).get("followers") == 4)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"name": "Tatooine"}] * 5
+    assert single_flight.stats == {"planets.get_planet_by_id": {"leaders": 1, "followers": 4}}
+
+    # Every caller owns its result
+    assert len({id(result) for result in results}) == 5
+
+
+def test_followers_must_receive_the_leader_error():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def _find_one():
+        release.wait()
+        raise ValueError("boom")
+
+    def _lookup():
+        try:
+            single_flight.do("planets.get_planet_by_id", "id", _find_one)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_lookup) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    _wait_for(lambda: single_flight.stats.get("planets.get_planet_by_id", {}).get("followers") == 2)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+
+
+def test_sequential_lookups_must_not_be_coalesced():
+    single_flight = SingleFlight()
+
+    single_flight.do("films.get_film_by_id", "id", lambda: {})
+    single_flight.do("films.get_film_by_id", "id", lambda: {})
+
+    assert single_flight.stats == {"films.get_film_by_id": {"leaders": 2, "followers": 0}}
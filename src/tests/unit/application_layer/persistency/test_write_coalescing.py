@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from starwars.app import mongo_client
+from starwars.application_layer.adapters.films_repository import FilmsRepository
+from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+from starwars.application_layer.persistency.write_coalescing import WriteCoalescer, write_coalescer
+from starwars.domain_layer.ports.planets import DuplicatedPlanet, InvalidPlanet
+
+
+def _submit_concurrently(submit, items):
+    results = [None] * len(items)
+
+    def _run(index, item):
+        try:
+            results[index] = submit(item)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=_run, args=(index, item)) for index, item in enumerate(items)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+@pytest.fixture
+def coalescing(client):
+    write_coalescer.enabled = True
+    write_coalescer.window_seconds = 0.05
+
+    yield write_coalescer
+
+    write_coalescer.init_app(client.application)
+
+
+def test_writes_within_the_window_must_be_flushed_in_one_batch():
+    coalescer = WriteCoalescer()
+    coalescer.window_seconds = 0.05
+    batches = []
+
+    def _flush(items):
+        batches.append(list(items))
+        return [ValueError(item) if item == "bad" else item.upper() for item in items]
+
+    results = _submit_concurrently(lambda item: coalescer.submit("planets", item, _flush), ["a", "b", "bad"])
+
+    assert len(batches) == 1
+    assert sorted(batches[0]) == ["a", "b", "bad"]
+    assert results[:2] == ["A", "B"]
+    assert isinstance(results[2], ValueError)
+    assert coalescer.stats == {"batches": 1, "writes": 3}
+
+
+def test_full_batches_must_be_flushed_without_waiting_for_the_window():
+    coalescer = WriteCoalescer()
+    coalescer.window_seconds = 10
+    coalescer.max_batch_size = 2
+
+    results = _submit_concurrently(
+        lambda item: coalescer.submit("planets", item, lambda items: list(items)), ["a", "b"]
+    )
+
+    assert results == ["a", "b"]
+
+
+def test_coalesced_creates_must_get_their_own_ids_and_errors(coalescing):
+    film_id = FilmsRepository.persist_film(title="A New Hope", release_date=None, director=None, planets=[])
+    requests = [
+        {"name": "Tatooine", "films": [film_id]},
+        {"name": "Alderaan", "films": []},
+        {"name": "Tatooine", "films": []},
+        {"name": "Hoth", "films": ["6726b6b6ecec0bd07cb1fef5"]},
+    ]
+
+    results = _submit_concurrently(
+        lambda request: PlanetsRepository.persist_planet(
+            name=request["name"], climate=None, diameter=None, population=None, films=request["films"]
+        ),
+        requests
+    )
+
+    created = [result for result in results if isinstance(result, str)]
+    assert len(created) == 2
+    assert sum(isinstance(result, DuplicatedPlanet) for result in results) == 1
+    assert isinstance(results[3], InvalidPlanet)
+    assert sorted(planet["name"] for planet in mongo_client.db.planets.find()) == ["Alderaan", "Tatooine"]
+    assert coalescing.stats["batches"] < len(requests)
@@ -5,6 +5,8 @@ from unittest import mock
 
 from starwars.application_layer.adapters.films_repository import FilmsRepository
 from starwars.application_layer.use_cases.films import FilmAlreadyRegistered, FilmsUseCase
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.use_cases.jobs import REMOVE_FILM_REFERENCES, JobsUseCase
 from starwars.domain_layer.models.films import Film
 from starwars.domain_layer.ports.films import DuplicatedFilm
 from starwars.presentation_layer.mappings import FilmMapping
@@ -126,19 +128,32 @@ def test_update_film_must_raise_film_already_registered_exception_when_title_alr
         )
 
 
+@mock.patch.object(JobsUseCase, "enqueue")
 @mock.patch.object(Film, "remove_film")
-def test_remove_film(remove_film_mock):
+def test_remove_film(remove_film_mock, enqueue_mock):
     id = "123"
+    remove_film_mock.return_value = True
     removed_film = FilmsUseCase.remove_film(id=id)
 
     remove_film_mock.assert_called_once_with(
         id=id,
         using_service=FilmsRepository
     )
+    enqueue_mock.assert_called_once_with(REMOVE_FILM_REFERENCES, {"film_id": id}, delay_seconds=reference_ids.ttl_seconds)
 
     assert removed_film is None
 
 
+@mock.patch.object(JobsUseCase, "enqueue")
+@mock.patch.object(Film, "remove_film")
+def test_remove_film_must_not_enqueue_cleanup_when_nothing_was_removed(remove_film_mock, enqueue_mock):
+    remove_film_mock.return_value = False
+
+    FilmsUseCase.remove_film(id="123")
+
+    enqueue_mock.assert_not_called()
+
+
 @mock.patch.object(Film, "get_film_by_id")
 def test_get_film_by_id(get_film_by_id_mock, return_film_data_response):
     get_film_by_id_mock.return_value = Film(
@@ -155,7 +170,53 @@ def test_get_film_by_id(get_film_by_id_mock, return_film_data_response):
 
     get_film_by_id_mock.assert_called_once_with(
         return_film_data_response.id,
-        using_service=FilmsRepository
+        using_service=FilmsRepository,
+        fields=None
     )
 
     assert isinstance(response, dict)
+
+
+@mock.patch.object(Film, "get_films_by_ids")
+def test_get_films_by_ids_must_preserve_order_and_report_missing_ids(
+    get_films_by_ids_mock,
+    return_film_data_response
+):
+    return_film_data_response.created = datetime.now()
+    return_film_data_response.edited = datetime.now()
+    get_films_by_ids_mock.return_value = [return_film_data_response]
+
+    ids = ["missing", return_film_data_response.id]
+    response = FilmsUseCase.get_films_by_ids(ids=ids, fields=None)
+
+    get_films_by_ids_mock.assert_called_once_with(
+        ids,
+        using_service=FilmsRepository,
+        fields=None
+    )
+
+    assert response == {
+        "docs": [
+            {"id": "missing", "found": False},
+            {
+                "id": return_film_data_response.id,
+                "found": True,
+                "film": return_film_data_response.as_dict()
+            },
+        ]
+    }
+
+
+@mock.patch.object(Film, "upsert_film_by_title")
+def test_upsert_film_by_title_must_raise_film_already_registered_exception_on_duplicated_title(
+    upsert_film_by_title_mock,
+    return_film_data_response
+):
+    upsert_film_by_title_mock.side_effect = DuplicatedFilm()
+
+    data = FilmMapping(payload={"title": return_film_data_response.title})
+
+    with pytest.raises(
+        FilmAlreadyRegistered, match=f"Film with title {return_film_data_response.title} already exists"
+    ):
+        FilmsUseCase.upsert_film_by_title(data=data)
@@ -4,6 +4,8 @@ from datetime import datetime
 from unittest import mock
 
 from starwars.application_layer.adapters.planets_repository import PlanetsRepository
+from starwars.application_layer.persistency.reference_ids import reference_ids
+from starwars.application_layer.use_cases.jobs import REMOVE_PLANET_REFERENCES, JobsUseCase
 from starwars.application_layer.use_cases.planets import PlanetAlreadyRegistered, PlanetsUseCase
 from starwars.domain_layer.models.planets import Planet
 from starwars.domain_layer.ports.planets import DuplicatedPlanet
@@ -134,19 +136,32 @@ def test_update_planet_must_raise_planet_already_registered_exception_when_name_
         )
 
 
+@mock.patch.object(JobsUseCase, "enqueue")
 @mock.patch.object(Planet, "remove_planet")
-def test_remove_planet(remove_planet_mock):
+def test_remove_planet(remove_planet_mock, enqueue_mock):
     id = "123"
+    remove_planet_mock.return_value = True
     removed_planet = PlanetsUseCase.remove_planet(id=id)
 
     remove_planet_mock.assert_called_once_with(
         id=id,
         using_service=PlanetsRepository
     )
+    enqueue_mock.assert_called_once_with(REMOVE_PLANET_REFERENCES, {"planet_id": id}, delay_seconds=reference_ids.ttl_seconds)
 
     assert removed_planet is None
 
 
+@mock.patch.object(JobsUseCase, "enqueue")
+@mock.patch.object(Planet, "remove_planet")
+def test_remove_planet_must_not_enqueue_cleanup_when_nothing_was_removed(remove_planet_mock, enqueue_mock):
+    remove_planet_mock.return_value = False
+
+    PlanetsUseCase.remove_planet(id="123")
+
+    enqueue_mock.assert_not_called()
+
+
 @mock.patch.object(Planet, "get_planet_by_id")
 def test_get_planet_by_id(get_planet_by_id, return_planet_data_response):
     get_planet_by_id.return_value = Planet(
@@ -164,7 +179,53 @@ def test_get_planet_by_id(get_planet_by_id, return_planet_data_response):
 
     get_planet_by_id.assert_called_once_with(
         return_planet_data_response.id,
-        using_service=PlanetsRepository
+        using_service=PlanetsRepository,
+        fields=None
     )
 
     assert isinstance(response, dict)
+
+
+@mock.patch.object(Planet, "get_planets_by_ids")
+def test_get_planets_by_ids_must_preserve_order_and_report_missing_ids(
+    get_planets_by_ids_mock,
+    return_planet_data_response
+):
+    return_planet_data_response.created = datetime.now()
+    return_planet_data_response.edited = datetime.now()
+    get_planets_by_ids_mock.return_value = [return_planet_data_response]
+
+    ids = ["missing", return_planet_data_response.id]
+    response = PlanetsUseCase.get_planets_by_ids(ids=ids, fields=None)
+
+    get_planets_by_ids_mock.assert_called_once_with(
+        ids,
+        using_service=PlanetsRepository,
+        fields=None
+    )
+
+    assert response == {
+        "docs": [
+            {"id": "missing", "found": False},
+            {
+                "id": return_planet_data_response.id,
+                "found": True,
+                "planet": return_planet_data_response.as_dict()
+            },
+        ]
+    }
+
+
+@mock.patch.object(Planet, "upsert_planet_by_name")
+def test_upsert_planet_by_name_must_raise_planet_already_registered_exception_on_duplicated_name(
+    upsert_planet_by_name_mock,
+    return_planet_data_response
+):
+    upsert_planet_by_name_mock.side_effect = DuplicatedPlanet()
+
+    data = PlanetMapping(payload={"name": return_planet_data_response.name})
+
+    with pytest.raises(
+        PlanetAlreadyRegistered, match=f"Planet with name {return_planet_data_response.name} already exists"
+    ):
+        PlanetsUseCase.upsert_planet_by_name(data=data)
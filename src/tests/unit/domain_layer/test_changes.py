@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+
+from starwars.domain_layer.models.changes import Change, ChangeToken, InvalidChangeToken
+
+
+def test_change_token_must_round_trip_through_encode_and_decode():
+    token = ChangeToken(edited=datetime(2024, 11, 3, 11, 46, 3, 45000), id="6727627bb5d077fbd23c3c59")
+
+    assert ChangeToken.decode(token.encode()) == token
+
+
+def test_change_token_decode_must_raise_invalid_change_token_when_token_is_malformed():
+    with pytest.raises(InvalidChangeToken, match="abc is not a valid change token."):
+        ChangeToken.decode("abc")
+
+
+def test_change_as_dict_must_not_include_resource_for_tombstones():
+    edited = datetime(2024, 11, 3, 11, 46, 3)
+    change = Change(id="6727627bb5d077fbd23c3c59", edited=edited, deleted=True, resource=None)
+
+    assert change.as_dict("planet") == {
+        "id": "6727627bb5d077fbd23c3c59",
+        "deleted": True,
+        "edited": edited.isoformat()
+    }
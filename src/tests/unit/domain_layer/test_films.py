@@ -1,4 +1,7 @@
+import pytest
+
 from starwars.domain_layer.models.films import Film
+from starwars.domain_layer.ports.films import InvalidFilm
 
 
 def test_create_film_must_call_persist_film_and_get_film_by_id_from_service_when_success(
@@ -21,7 +24,8 @@ def test_create_film_must_call_persist_film_and_get_film_by_id_from_service_when
     )
 
     mocked_films_service.get_film_by_id.assert_called_once_with(
-        id=film_info["id"]
+        id=film_info["id"],
+        fields=None
     )
 
 
@@ -47,7 +51,8 @@ def test_update_film_must_call_update_film_and_get_film_by_id_from_service_when_
     )
 
     mocked_films_service.get_film_by_id.assert_called_once_with(
-        id=film_info["id"]
+        id=film_info["id"],
+        fields=None
     )
 
 
@@ -81,7 +86,8 @@ def test_get_film_by_id_must_call_get_film_by_id_from_service_and_return_a_film_
     )
 
     mocked_films_service.get_film_by_id.assert_called_once_with(
-        id=film_info["id"]
+        id=film_info["id"],
+        fields=None
     )
 
     assert isinstance(film, Film)
@@ -99,3 +105,78 @@ def test_remove_film_must_call_remove_film_from_service(
     mocked_films_service.remove_film.assert_called_once_with(
         id=film_info["id"]
     )
+
+
+def test_get_film_by_id_must_forward_fields_and_return_a_partial_film(
+    mocked_films_service,
+    film_info
+):
+    film = Film.get_film_by_id(
+        id=film_info["id"],
+        using_service=mocked_films_service,
+        fields=["title", "director"]
+    )
+
+    mocked_films_service.get_film_by_id.assert_called_once_with(
+        id=film_info["id"],
+        fields=["title", "director"]
+    )
+
+    assert film.id == film_info["id"]
+    assert film.loaded_fields == ["title", "director"]
+
+
+def test_get_film_by_id_must_raise_invalid_film_when_fields_are_unknown(
+    mocked_films_service,
+    film_info
+):
+    with pytest.raises(InvalidFilm, match="Unknown film fields: budget"):
+        Film.get_film_by_id(
+            id=film_info["id"],
+            using_service=mocked_films_service,
+            fields=["title", "budget"]
+        )
+
+    mocked_films_service.get_film_by_id.assert_not_called()
+
+
+def test_get_films_by_ids_must_call_get_films_by_ids_from_service_and_return_film_objects(
+    mocked_films_service,
+    film_info
+):
+    films = Film.get_films_by_ids(
+        ids=[film_info["id"], "123"],
+        using_service=mocked_films_service
+    )
+
+    mocked_films_service.get_films_by_ids.assert_called_once_with(
+        ids=[film_info["id"], "123"],
+        fields=None
+    )
+
+    assert [film.id for film in films] == [film_info["id"]]
+
+
+def test_upsert_film_by_title_must_build_the_film_from_the_upserted_document(
+    mocked_films_service,
+    film_info
+):
+    film, created = Film.upsert_film_by_title(
+        title=film_info["title"],
+        release_date=film_info["release_date"],
+        director=film_info["director"],
+        planets=film_info["planets"],
+        using_service=mocked_films_service
+    )
+
+    mocked_films_service.upsert_film_by_title.assert_called_once_with(
+        title=film_info["title"],
+        release_date=film_info["release_date"],
+        director=film_info["director"],
+        planets=film_info["planets"]
+    )
+
+    mocked_films_service.get_film_by_title.assert_not_called()
+
+    assert isinstance(film, Film)
+    assert created is False
@@ -1,4 +1,7 @@
+import pytest
+
 from starwars.domain_layer.models.planets import Planet
+from starwars.domain_layer.ports.planets import InvalidPlanet
 
 
 def test_create_planet_must_call_persist_planet_and_get_planet_by_id_from_service_when_success(
@@ -23,7 +26,8 @@ def test_create_planet_must_call_persist_planet_and_get_planet_by_id_from_servic
     )
 
     mocked_planets_service.get_planet_by_id.assert_called_once_with(
-        id=planet_info["id"]
+        id=planet_info["id"],
+        fields=None
     )
 
 
@@ -51,7 +55,8 @@ def test_update_planet_must_call_update_planet_and_get_planet_by_id_from_service
     )
 
     mocked_planets_service.get_planet_by_id.assert_called_once_with(
-        id=planet_info["id"]
+        id=planet_info["id"],
+        fields=None
     )
 
 
@@ -86,7 +91,8 @@ def test_get_planet_by_id_must_call_get_planet_by_id_from_service_and_return_a_p
     )
 
     mocked_planets_service.get_planet_by_id.assert_called_once_with(
-        id=planet_info["id"]
+        id=planet_info["id"],
+        fields=None
     )
 
     assert isinstance(planet, Planet)
@@ -104,3 +110,101 @@ def test_remove_planet_must_call_remove_planet_from_service(
     mocked_planets_service.remove_planet.assert_called_once_with(
         id=planet_info["id"]
     )
+
+
+def test_get_planet_by_id_must_forward_fields_and_return_a_partial_planet(
+    mocked_planets_service,
+    planet_info
+):
+    planet = Planet.get_planet_by_id(
+        id=planet_info["id"],
+        using_service=mocked_planets_service,
+        fields=["name", "climate"]
+    )
+
+    mocked_planets_service.get_planet_by_id.assert_called_once_with(
+        id=planet_info["id"],
+        fields=["name", "climate"]
+    )
+
+    assert planet.id == planet_info["id"]
+    assert planet.loaded_fields == ["name", "climate"]
+
+
+def test_get_planet_by_id_must_raise_invalid_planet_when_fields_are_unknown(
+    mocked_planets_service,
+    planet_info
+):
+    with pytest.raises(InvalidPlanet, match="Unknown planet fields: gravity"):
+        Planet.get_planet_by_id(
+            id=planet_info["id"],
+            using_service=mocked_planets_service,
+            fields=["name", "gravity"]
+        )
+
+    mocked_planets_service.get_planet_by_id.assert_not_called()
+
+
+def test_get_planets_by_ids_must_call_get_planets_by_ids_from_service_and_return_planet_objects(
+    mocked_planets_service,
+    planet_info
+):
+    planets = Planet.get_planets_by_ids(
+        ids=[planet_info["id"], "123"],
+        using_service=mocked_planets_service
+    )
+
+    mocked_planets_service.get_planets_by_ids.assert_called_once_with(
+        ids=[planet_info["id"], "123"],
+        fields=None
+    )
+
+    assert [planet.id for planet in planets] == [planet_info["id"]]
+
+
+def test_upsert_planet_by_name_must_build_the_planet_from_the_upserted_document(
+    mocked_planets_service,
+    planet_info
+):
+    planet, created = Planet.upsert_planet_by_name(
+        name=planet_info["name"],
+        climate=planet_info["climate"],
+        diameter=planet_info["diameter"],
+        population=planet_info["population"],
+        films=planet_info["films"],
+        using_service=mocked_planets_service
+    )
+
+    mocked_planets_service.upsert_planet_by_name.assert_called_once_with(
+        name=planet_info["name"],
+        climate=planet_info["climate"],
+        diameter=planet_info["diameter"],
+        population=planet_info["population"],
+        films=planet_info["films"]
+    )
+
+    mocked_planets_service.get_planet_by_name.assert_not_called()
+
+    assert isinstance(planet, Planet)
+    assert created is False
+
+
+def test_validate_planet_data_must_normalize_a_valid_planet():
+    assert Planet.validate_planet_data({"name": "Hoth", "climate": "frozen", "films": None, "extra": 1}) == {
+        "name": "Hoth",
+        "climate": "frozen",
+        "diameter": None,
+        "population": None,
+        "films": []
+    }
+
+
+@pytest.mark.parametrize("data, message", [
+    (["Hoth"], "A planet must be a JSON object"),
+    ({"name": ""}, "A planet must have a name"),
+    ({"name": "Hoth", "diameter": 7200}, "Planet diameter must be a string"),
+    ({"name": "Hoth", "films": "6726b6b6ecec0bd07cb1fef5"}, "Planet films must be a list of film ids"),
+])
+def test_validate_planet_data_must_raise_invalid_planet_when_data_is_invalid(data, message):
+    with pytest.raises(InvalidPlanet, match=message):
+        Planet.validate_planet_data(data)
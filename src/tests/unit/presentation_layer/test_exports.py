@@ -0,0 +1,23 @@
+import pytest
+import zlib
+
+from starwars.presentation_layer.exports import InvalidExportFormat, _gzip_chunks, parse_export_format
+
+
+def test_gzip_chunks_must_make_every_batch_readable_as_soon_as_it_is_sent():
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    chunks = _gzip_chunks(iter([b"first batch\n", b"second batch\n"]), level=6)
+
+    assert decompressor.decompress(next(chunks)) == b"first batch\n"
+    assert decompressor.decompress(next(chunks)) == b"second batch\n"
+
+    decompressor.decompress(b"".join(chunks))
+    assert decompressor.eof
+
+
+def test_parse_export_format_must_default_to_ndjson_and_reject_unknown_formats():
+    assert parse_export_format(None) == "ndjson"
+    assert parse_export_format("csv") == "csv"
+
+    with pytest.raises(InvalidExportFormat, match="format must be one of ndjson, csv, got xml"):
+        parse_export_format("xml")
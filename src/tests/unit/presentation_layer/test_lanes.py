@@ -0,0 +1,97 @@
+import pytest
+
+from flask import Flask, Response
+
+from starwars.presentation_layer.lanes import ExecutionLanes
+
+
+def _app(lane: str, bulk_max_concurrent: int = 1):
+    app = Flask(__name__)
+    app.config.update(
+        EXECUTION_LANE=lane,
+        BULK_LANE_MAX_CONCURRENT=bulk_max_concurrent,
+        STREAM_LANE_MAX_CONNECTIONS=1
+    )
+
+    lanes = ExecutionLanes()
+    lanes.init_app(app)
+
+    @app.route("/import", methods=["POST"])
+    @lanes.bulk
+    def bulk_import():
+        return {"imported": 1}, 200
+
+    @app.route("/export")
+    @lanes.bulk
+    def bulk_export():
+        return Response(iter(["a", "b"]))
+
+    @app.route("/stream")
+    @lanes.stream
+    def stream():
+        return Response(iter(["data: 1\n\n"]))
+
+    return app, lanes
+
+
+def test_bulk_endpoints_must_be_refused_by_interactive_instances():
+    app, _ = _app("interactive")
+
+    response = app.test_client().post("/import")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_bulk_endpoints_over_the_process_budget_must_get_503():
+    app, lanes = _app("bulk")
+    client = app.test_client()
+
+    assert lanes._bulk_slots.acquire(blocking=False)
+    assert client.post("/import").status_code == 503
+
+    lanes._bulk_slots.release()
+    assert client.post("/import").status_code == 200
+    assert client.post("/import").status_code == 200
+
+
+def test_streamed_bulk_responses_must_hold_the_slot_until_closed():
+    app, lanes = _app("all")
+    client = app.test_client()
+
+    response = client.get("/export")
+
+    assert client.post("/import").status_code == 503
+
+    response.close()
+    assert client.post("/import").status_code == 200
+
+
+def test_unknown_lane_must_be_rejected():
+    with pytest.raises(ValueError):
+        _app("batch")
+
+
+@pytest.mark.parametrize("lane, status_code", [("interactive", 503), ("bulk", 503), ("stream", 200), ("all", 200)])
+def test_event_streams_must_only_be_served_by_the_stream_and_all_lanes(lane, status_code):
+    app, _ = _app(lane)
+
+    assert app.test_client().get("/stream", buffered=True).status_code == status_code
+
+
+def test_bulk_endpoints_must_be_refused_by_the_stream_lane():
+    app, _ = _app("stream")
+
+    assert app.test_client().post("/import").status_code == 503
+
+
+def test_event_streams_over_the_process_budget_must_get_503():
+    app, _ = _app("stream")
+    client = app.test_client()
+
+    response = client.get("/stream")
+
+    assert client.get("/stream", buffered=True).status_code == 503
+
+    response.close()
+    assert client.get("/stream", buffered=True).status_code == 200
@@ -0,0 +1,142 @@
+import time
+
+from flask import Flask
+
+from starwars.presentation_layer.load_shedding import AdaptiveLoadShedder
+
+
+PLANETS_RESOURCE = "/api/planets"
+
+
+def _app(enabled: bool = True, max_queue_ms: float = 1000):
+    app = Flask(__name__)
+    app.config.update(
+        LOAD_SHED_ENABLED=enabled,
+        LOAD_SHED_WRITE_SHARE=0.5,
+        LOAD_SHED_MIN_QUEUE_MS=100,
+        LOAD_SHED_MAX_QUEUE_MS=max_queue_ms,
+        LOAD_SHED_TARGET_LATENCY_MS=250,
+        LOAD_SHED_BACKOFF=0.5,
+        LOAD_SHED_INCREASE_MS=10
+    )
+
+    @app.route(PLANETS_RESOURCE, methods=["GET", "POST"])
+    def planets():
+        return {"planets": []}, 200
+
+    @app.route("/api/planets/import", methods=["POST"])
+    def import_planets():
+        return {"done": True}, 200
+
+    @app.route("/health-status")
+    def health_status():
+        return {"status": "ok"}, 200
+
+    load_shedder = AdaptiveLoadShedder()
+    load_shedder.init_app(app)
+
+    return app.test_client(), load_shedder
+
+
+def _queued_for(seconds: float) -> dict:
+    return {"X-Request-Start": f"t={time.time() - seconds:.3f}"}
+
+
+def test_requests_queued_past_budget_must_be_shed_with_retry_after():
+    client, load_shedder = _app()
+
+    response = client.get(PLANETS_RESOURCE, headers=_queued_for(2))
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json == {"message": "Service overloaded, try again later"}
+    assert load_shedder.stats["shed"] == {"read_queue": 1}
+
+
+def test_recently_queued_requests_must_be_served():
+    client, load_shedder = _app()
+
+    response = client.get(PLANETS_RESOURCE, headers=_queued_for(0))
+
+    assert response.status_code == 200
+    assert load_shedder.stats["shed"] == {}
+
+
+def test_requests_without_request_start_must_be_served():
+    client, _ = _app()
+
+    assert client.get(PLANETS_RESOURCE).status_code == 200
+
+
+def test_writes_must_be_shed_before_reads():
+    client, load_shedder = _app()
+
+    assert client.post(PLANETS_RESOURCE, headers=_queued_for(0.75)).status_code == 503
+    assert client.get(PLANETS_RESOURCE, headers=_queued_for(0.75)).status_code == 200
+    assert load_shedder.stats["shed"] == {"write_queue": 1}
+
+
+def test_health_status_must_always_be_admitted():
+    client, _ = _app()
+
+    assert client.get("/health-status", headers=_queued_for(10)).status_code == 200
+
+
+def test_imports_must_be_left_to_the_bulk_lane():
+    client, _ = _app()
+
+    response = client.post("/api/planets/import", headers=_queued_for(10))
+
+    assert response.status_code == 200
+
+
+def test_disabled_shedder_must_serve_every_request():
+    client, load_shedder = _app(enabled=False)
+
+    assert client.get(PLANETS_RESOURCE, headers=_queued_for(10)).status_code == 200
+    assert load_shedder.stats["shed"] == {}
+
+
+def test_queue_budget_must_back_off_when_latency_is_over_target():
+    _, load_shedder = _app()
+
+    load_shedder.observe(0.5)
+    assert load_shedder.stats["queue_budget_ms"] == 500
+
+    load_shedder.observe(0.5)
+    load_shedder.observe(0.5)
+    load_shedder.observe(0.5)
+    assert load_shedder.stats["queue_budget_ms"] == 100
+
+
+def test_queue_budget_must_grow_back_additively_while_latency_is_healthy():
+    _, load_shedder = _app()
+    load_shedder.queue_budget = 0.5
+
+    load_shedder.observe(0.01)
+    load_shedder.observe(0.01)
+    assert load_shedder.stats["queue_budget_ms"] == 520
+
+    load_shedder.queue_budget = 0.995
+    load_shedder.observe(0.01)
+    assert load_shedder.stats["queue_budget_ms"] == 1000
+
+
+def test_requests_must_be_shed_once_slow_responses_shrink_the_budget():
+    client, load_shedder = _app()
+
+    assert client.get(PLANETS_RESOURCE, headers=_queued_for(0.3)).status_code == 200
+
+    load_shedder.observe(0.5)
+    load_shedder.observe(0.5)
+
+    assert client.get(PLANETS_RESOURCE, headers=_queued_for(0.3)).status_code == 503
+
+
+def test_served_requests_must_feed_their_latency_to_the_budget():
+    client, load_shedder = _app()
+    load_shedder.queue_budget = 0.5
+
+    client.get(PLANETS_RESOURCE, buffered=True)
+
+    assert load_shedder.stats["queue_budget_ms"] == 510
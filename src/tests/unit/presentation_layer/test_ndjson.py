@@ -0,0 +1,26 @@
+import io
+
+from starwars.presentation_layer.ndjson import InvalidLine, read_ndjson
+
+
+def test_read_ndjson_must_number_lines_and_skip_blank_ones():
+    stream = io.BytesIO(b'{"name": "Hoth"}\n\n  \n[1, 2]')
+
+    assert list(read_ndjson(stream, max_line_bytes=100)) == [(1, {"name": "Hoth"}), (4, [1, 2])]
+
+
+def test_read_ndjson_must_drop_lines_over_the_limit_without_losing_the_next_ones():
+    stream = io.BytesIO(b'{"name": "' + b"x" * 50 + b'"}\n{"name": "Hoth"}\n')
+
+    rows = list(read_ndjson(stream, max_line_bytes=20))
+
+    assert [line for line, _ in rows] == [1, 2]
+    assert isinstance(rows[0][1], InvalidLine)
+    assert str(rows[0][1]) == "Line is longer than 20 bytes"
+    assert rows[1][1] == {"name": "Hoth"}
+
+
+def test_read_ndjson_must_report_lines_that_are_not_json():
+    rows = list(read_ndjson(io.BytesIO(b"{oops\n"), max_line_bytes=100))
+
+    assert isinstance(rows[0][1], InvalidLine)
@@ -0,0 +1,117 @@
+import pytest
+
+from unittest import mock
+
+from starwars.presentation_layer.rate_limiting import (
+    MemoryBuckets,
+    parse_rate,
+    parse_trusted_proxies,
+    rate_limiter
+)
+
+
+PLANETS_CHANGES_RESOURCE = "/api/planets/changes"
+
+
+@pytest.fixture
+def read_limit(client):
+    limits = rate_limiter.limits
+    rate_limiter.limits = {**limits, "read": (2, 60.0)}
+
+    yield
+
+    rate_limiter.limits = limits
+
+
+def test_responses_must_carry_rate_limit_headers(client):
+    response = client.get(PLANETS_CHANGES_RESOURCE)
+    capacity, period = rate_limiter.limits["read"]
+
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == str(capacity)
+    assert response.headers["RateLimit-Remaining"] == str(capacity - 1)
+    assert response.headers["RateLimit-Policy"] == f"{capacity};w={period:g}"
+
+
+def test_client_over_its_bucket_must_receive_429_with_retry_after(client, read_limit):
+    assert client.get(PLANETS_CHANGES_RESOURCE).status_code == 200
+    assert client.get(PLANETS_CHANGES_RESOURCE).status_code == 200
+
+    response = client.get(PLANETS_CHANGES_RESOURCE)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert response.headers["RateLimit-Remaining"] == "0"
+
+
+def test_buckets_must_be_kept_per_client_and_route_group(client, read_limit):
+    for _ in range(2):
+        client.get(PLANETS_CHANGES_RESOURCE)
+
+    assert client.get(PLANETS_CHANGES_RESOURCE, headers={"X-Api-Key": "other"}).status_code == 200
+    assert client.get(PLANETS_CHANGES_RESOURCE, environ_base={"REMOTE_ADDR": "10.0.0.2"}).status_code == 200
+    assert client.get("/api/films/changes").status_code == 429
+    assert client.post("/api/planets/_mget", json={"ids": []}).status_code == 429
+    assert client.delete("/api/planets/6726b6b6ecec0bd07cb1fef5").status_code != 429
+
+
+def test_forwarded_addresses_must_be_ignored_from_untrusted_peers(client, read_limit):
+    for _ in range(2):
+        client.get(PLANETS_CHANGES_RESOURCE)
+
+    response = client.get(
+        PLANETS_CHANGES_RESOURCE, headers={"X-Real-IP": "10.0.0.2", "X-Forwarded-For": "10.0.0.3"}
+    )
+
+    assert response.status_code == 429
+
+
+def test_forwarded_addresses_must_identify_clients_behind_trusted_proxies(client, read_limit):
+    rate_limiter.trusted_proxies = parse_trusted_proxies("10.0.0.0/8")
+    proxy = {"REMOTE_ADDR": "10.0.0.1"}
+
+    for _ in range(2):
+        client.get(PLANETS_CHANGES_RESOURCE, headers={"X-Real-IP": "192.0.2.1"}, environ_base=proxy)
+
+    assert client.get(
+        PLANETS_CHANGES_RESOURCE, headers={"X-Real-IP": "192.0.2.1"}, environ_base=proxy
+    ).status_code == 429
+    assert client.get(
+        PLANETS_CHANGES_RESOURCE, headers={"X-Real-IP": "192.0.2.2"}, environ_base=proxy
+    ).status_code == 200
+    assert client.get(
+        PLANETS_CHANGES_RESOURCE, headers={"X-Forwarded-For": "198.51.100.1, 192.0.2.3"}, environ_base=proxy
+    ).status_code == 200
+
+
+def test_unavailable_bucket_store_must_not_block_requests(client, read_limit):
+    with mock.patch.object(MemoryBuckets, "take", side_effect=Exception("boom")):
+        for _ in range(3):
+            response = client.get(PLANETS_CHANGES_RESOURCE)
+
+            assert response.status_code == 200
+            assert "RateLimit-Limit" not in response.headers
+
+
+def test_memory_buckets_must_refill_with_elapsed_time():
+    buckets = MemoryBuckets()
+
+    assert buckets.take("key", 1, 0.5, now=100) == (True, 0)
+    assert buckets.take("key", 1, 0.5, now=101) == (False, 0.5)
+    assert buckets.take("key", 1, 0.5, now=102) == (True, 0)
+
+
+@pytest.mark.parametrize("value", ["100", "a/60", "0/60", "10/0"])
+def test_parse_rate_must_reject_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def test_parse_trusted_proxies_must_accept_addresses_and_networks():
+    assert [str(network) for network in parse_trusted_proxies(" 10.0.0.1, 172.16.0.0/12,")] == [
+        "10.0.0.1/32", "172.16.0.0/12"
+    ]
+    assert parse_trusted_proxies("") == []
+
+    with pytest.raises(ValueError):
+        parse_trusted_proxies("nginx")
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from starwars.application_layer.persistency.monitoring import (
+    pool_stats_listener,
+    slow_query_listener
+)
+from starwars.application_layer.persistency.single_flight import single_flight
+
+
+SLOW_QUERIES_RESOURCE = "/api/admin/slow-queries"
+
+
+def test_slow_queries_must_return_most_recent_first(client):
+    slow_queries = [{"command": "find", "duration_ms": 150}, {"command": "update", "duration_ms": 300}]
+
+    with mock.patch.object(
+        type(slow_query_listener), "slow_queries", new_callable=mock.PropertyMock
+    ) as mock_slow_queries:
+        mock_slow_queries.return_value = slow_queries
+
+        response = client.get(SLOW_QUERIES_RESOURCE)
+
+    assert response.status_code == 200
+    assert response.json["slow_queries"] == list(reversed(slow_queries))
+
+
+def test_admin_endpoints_must_require_configured_token(client):
+    client.application.config["ADMIN_TOKEN"] = "secret"
+
+    assert client.get(SLOW_QUERIES_RESOURCE).status_code == 401
+    assert client.get(
+        SLOW_QUERIES_RESOURCE, headers={"X-Admin-Token": "secret"}
+    ).status_code == 200
+
+
+def test_admin_endpoints_must_be_refused_without_token_unless_open(client):
+    client.application.config["ADMIN_TOKEN"] = None
+    client.application.config["ADMIN_OPEN_WITHOUT_TOKEN"] = False
+
+    response = client.get(SLOW_QUERIES_RESOURCE)
+
+    assert response.status_code == 403
+    assert response.json == {"message": "Admin endpoints are disabled, ADMIN_TOKEN is not configured"}
+
+    client.application.config["ADMIN_OPEN_WITHOUT_TOKEN"] = True
+
+    assert client.get(SLOW_QUERIES_RESOURCE).status_code == 200
+
+
+def test_admin_endpoints_must_only_be_open_without_token_in_testing_and_development():
+    from starwars.config import DevelopmentConfig, ProductionConfig, TestingConfig
+
+    assert TestingConfig.ADMIN_OPEN_WITHOUT_TOKEN is True
+    assert DevelopmentConfig.ADMIN_OPEN_WITHOUT_TOKEN is True
+    assert ProductionConfig.ADMIN_OPEN_WITHOUT_TOKEN is False
+
+
+def test_mongo_pool_must_return_settings_and_live_pool_stats(client):
+    pools = {"localhost:27017": {"open": 3, "in_use": 1, "waiting": 0}}
+
+    with mock.patch.object(
+        type(pool_stats_listener), "pools", new_callable=mock.PropertyMock
+    ) as mock_pools:
+        mock_pools.return_value = pools
+
+        response = client.get("/api/admin/mongo-pool")
+
+    assert response.status_code == 200
+    assert response.json["pools"] == pools
+    assert response.json["settings"]["maxPoolSize"] == client.application.config["MONGO_MAX_POOL_SIZE"]
+
+
+def test_single_flight_must_report_saved_calls(client):
+    stats = {"planets.get_planet_by_id": {"leaders": 2, "followers": 7}}
+
+    with mock.patch.object(
+        type(single_flight), "stats", new_callable=mock.PropertyMock
+    ) as mock_stats:
+        mock_stats.return_value = stats
+
+        response = client.get("/api/admin/single-flight")
+
+    assert response.status_code == 200
+    assert response.json["lookups"] == stats
+    assert response.json["saved_calls"] == 7
+
+
+def test_load_shedding_must_return_shedder_stats(client):
+    response = client.get("/api/admin/load-shedding")
+
+    assert response.status_code == 200
+    assert response.json == {
+        "enabled": False,
+        "queue_budget_ms": 1000,
+        "min_queue_ms": 50,
+        "max_queue_ms": 1000,
+        "target_latency_ms": 250,
+        "shed": {},
+    }
+
+
+def test_write_coalescing_must_return_batching_stats(client):
+    response = client.get("/api/admin/write-coalescing")
+
+    assert response.status_code == 200
+    assert response.json == {"enabled": False, "window_ms": 2.0, "batches": 0, "writes": 0}
@@ -1,5 +1,9 @@
+import json
+import pytest
+
 from unittest import mock
 
+from starwars.app import mongo_client
 from starwars.application_layer.use_cases.films import FilmAlreadyRegistered, FilmsUseCase
 
 
@@ -76,7 +80,7 @@ def test_get_films_must_return_400_when_get_film_by_id_raises_and_generic_except
     error_message = "Generic error"
     get_film_by_id_mock.side_effect = Exception(error_message)
 
-    response = client.get(FILMS_RESOURCE + "/123")
+    response = client.get(FILMS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
 
     assert response.status_code == 400
     assert response.json == {"message": error_message}
@@ -86,7 +90,7 @@ def test_get_films_must_return_400_when_get_film_by_id_raises_and_generic_except
 def test_get_films_must_return_404_when_film_not_found(get_film_by_id_mock, client):
     get_film_by_id_mock.return_value = None
 
-    id = "123"
+    id = "6726b6b6ecec0bd07cb1fef5"
     response = client.get(FILMS_RESOURCE + f"/{id}")
 
     assert response.status_code == 404
@@ -151,7 +155,7 @@ def test_put_films_must_return_400_when_update_film_raises_an_generic_exception(
 def test_delete_films_must_return_204_when_success(remove_film_mock, client):
     remove_film_mock.return_value = None
 
-    response = client.delete(FILMS_RESOURCE + "/123")
+    response = client.delete(FILMS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
 
     assert response.status_code == 204
 
@@ -161,7 +165,232 @@ def test_delete_films_must_return_400_when_remove_film_raises_an_generic_excepti
     error_message = "Generic error"
     remove_film_mock.side_effect = Exception(error_message)
 
-    response = client.delete(FILMS_RESOURCE + "/123")
+    response = client.delete(FILMS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
+
+    assert response.status_code == 400
+    assert response.json == {"message": error_message}
+
+
+@mock.patch.object(FilmsUseCase, "get_film_by_id")
+def test_get_films_must_forward_requested_fields(get_film_by_id_mock, film_info, client):
+    get_film_by_id_mock.return_value = {"id": film_info["id"], "title": film_info["title"]}
+
+    response = client.get(FILMS_RESOURCE + f"/{film_info['id']}?fields=title, director")
+
+    assert response.status_code == 200
+    assert get_film_by_id_mock.call_args.kwargs["fields"] == ["title", "director"]
+
+
+def test_get_films_must_accept_id_among_requested_fields(client):
+    film_id = str(mongo_client.db.films.insert_one(
+        {"title": "A New Hope", "director": "George Lucas", "planets": []}
+    ).inserted_id)
+
+    response = client.get(FILMS_RESOURCE + f"/{film_id}?fields=id,title")
+
+    assert response.status_code == 200
+    assert response.json == {"id": film_id, "title": "A New Hope"}
+
+
+@mock.patch.object(FilmsUseCase, "get_films_by_ids")
+def test_get_films_by_ids_must_return_200_when_success(get_films_by_ids_mock, film_info, client):
+    get_films_by_ids_mock.return_value = {"docs": [{"id": "123", "found": False}]}
+
+    response = client.get(FILMS_RESOURCE + f"?ids=123,{film_info['id']}&fields=title")
+
+    assert response.status_code == 200
+    assert response.json == {"docs": [{"id": "123", "found": False}]}
+    assert get_films_by_ids_mock.call_args.kwargs == {"ids": ["123", film_info["id"]], "fields": ["title"]}
+
+
+@mock.patch.object(FilmsUseCase, "get_films_by_ids")
+def test_post_films_mget_must_return_200_when_success(get_films_by_ids_mock, film_info, client):
+    get_films_by_ids_mock.return_value = {"docs": [{"id": "123", "found": False}]}
+
+    response = client.post(FILMS_RESOURCE + "/_mget", json={"ids": ["123", film_info["id"]]})
+
+    assert response.status_code == 200
+    assert get_films_by_ids_mock.call_args.kwargs == {"ids": ["123", film_info["id"]], "fields": None}
+
+
+def test_get_films_by_ids_must_return_400_when_no_id_is_informed(client):
+    response = client.get(FILMS_RESOURCE)
+
+    assert response.status_code == 400
+    assert response.json == {"message": "At least one film id must be informed"}
+
+
+def test_post_films_mget_must_return_400_when_too_many_ids_are_informed(client):
+    client.application.config["BATCH_MAX_IDS"] = 2
+
+    response = client.post(FILMS_RESOURCE + "/_mget", json={"ids": ["1", "2", "3"]})
+
+    assert response.status_code == 400
+    assert response.json == {"message": "At most 2 film ids can be fetched at once"}
+
+
+@mock.patch.object(FilmsUseCase, "get_film_by_title")
+def test_get_films_by_title_must_return_200_when_success(get_film_by_title_mock, film_info, client):
+    get_film_by_title_mock.return_value = film_info
+
+    response = client.get(FILMS_RESOURCE + f"/by-title/{film_info['title']}")
+
+    assert response.status_code == 200
+    assert response.json == film_info
+    assert get_film_by_title_mock.call_args.kwargs == {"title": film_info["title"], "fields": None}
+
+
+@mock.patch.object(FilmsUseCase, "get_film_by_title")
+def test_get_films_by_title_must_return_404_when_film_not_found(get_film_by_title_mock, client):
+    get_film_by_title_mock.return_value = None
+
+    response = client.get(FILMS_RESOURCE + "/by-title/Rogue One")
+
+    assert response.status_code == 404
+    assert response.json == {"message": "Film with title Rogue One was not found"}
+
+
+@mock.patch.object(FilmsUseCase, "upsert_film_by_title")
+def test_put_films_by_title_must_return_201_when_film_is_created(upsert_film_by_title_mock, film_info, client):
+    upsert_film_by_title_mock.return_value = (film_info, True)
+
+    response = client.put(
+        FILMS_RESOURCE + f"/by-title/{film_info['title']}",
+        json={"title": "Ignored", "director": film_info["director"]}
+    )
+
+    assert response.status_code == 201
+    assert response.json == film_info
+    assert upsert_film_by_title_mock.call_args.kwargs["data"].payload == {
+        "title": film_info["title"],
+        "director": film_info["director"]
+    }
+
+
+@mock.patch.object(FilmsUseCase, "upsert_film_by_title")
+def test_put_films_by_title_must_return_200_when_film_is_updated(upsert_film_by_title_mock, film_info, client):
+    upsert_film_by_title_mock.return_value = (film_info, False)
+
+    response = client.put(FILMS_RESOURCE + f"/by-title/{film_info['title']}", json={})
+
+    assert response.status_code == 200
+    assert response.json == film_info
+
+
+@mock.patch.object(FilmsUseCase, "upsert_film_by_title")
+def test_put_films_by_title_must_return_400_when_upsert_raises_an_generic_exception(upsert_film_by_title_mock, film_info, client):
+    error_message = "One or more planets do not exist"
+    upsert_film_by_title_mock.side_effect = Exception(error_message)
+
+    response = client.put(FILMS_RESOURCE + f"/by-title/{film_info['title']}", json={})
 
     assert response.status_code == 400
     assert response.json == {"message": error_message}
+
+
+@pytest.mark.parametrize("payload", [[], "Tatooine", 1])
+@mock.patch.object(FilmsUseCase, "upsert_film_by_title")
+def test_put_films_by_title_must_return_400_when_body_is_not_an_object(upsert_film_by_title_mock, payload, film_info, client):
+    response = client.put(FILMS_RESOURCE + f"/by-title/{film_info['title']}", json=payload)
+
+    assert response.status_code == 400
+    assert response.json == {"message": "Request body must be a JSON object"}
+    upsert_film_by_title_mock.assert_not_called()
+
+
+def test_get_films_changes_must_paginate_with_resume_token(client):
+    for title in ("Title 1", "Title 2", "Title 3"):
+        client.post(FILMS_RESOURCE, json={"title": title})
+
+    first_page = client.get(FILMS_RESOURCE + "/changes?limit=2")
+
+    assert first_page.status_code == 200
+    assert [change["film"]["title"] for change in first_page.json["changes"]] == ["Title 1", "Title 2"]
+    assert first_page.json["has_more"] is True
+
+    second_page = client.get(FILMS_RESOURCE + f"/changes?limit=2&since={first_page.json['next']}")
+
+    assert [change["film"]["title"] for change in second_page.json["changes"]] == ["Title 3"]
+    assert second_page.json["has_more"] is False
+
+
+def test_get_films_changes_must_return_400_when_limit_is_invalid(client):
+    response = client.get(FILMS_RESOURCE + "/changes?limit=abc")
+
+    assert response.status_code == 400
+    assert response.json == {"message": "limit must be an integer, got abc"}
+
+
+def test_films_endpoints_must_stay_within_query_budget(film_info, query_budget, client):
+    request_json = {
+        "title": film_info["title"],
+        "release_date": film_info["release_date"],
+        "director": film_info["director"],
+        "planets": []
+    }
+
+    with query_budget(2):
+        response = client.post(FILMS_RESOURCE, json=request_json)
+
+    assert response.status_code == 201
+    assert response.headers["X-DB-Calls"] == "2"
+
+    with query_budget(1):
+        response = client.get(f"{FILMS_RESOURCE}/{response.json['id']}")
+
+    assert response.status_code == 200
+    assert response.headers["X-DB-Calls"] == "1"
+
+
+@mock.patch.object(FilmsUseCase, "get_film_by_id")
+def test_get_films_must_return_404_from_routing_when_id_is_not_an_object_id(get_film_by_id_mock, client):
+    response = client.get(FILMS_RESOURCE + "/123")
+
+    assert response.status_code == 404
+    assert response.content_type == "application/json"
+    assert "message" in response.json
+    get_film_by_id_mock.assert_not_called()
+
+
+def test_post_films_import_must_insert_films_referencing_existing_planets(client):
+    planet_id = str(mongo_client.db.planets.insert_one({"name": "Tatooine"}).inserted_id)
+    body = "\n".join([
+        json.dumps({"title": "A New Hope", "planets": [planet_id]}),
+        json.dumps({"title": "The Empire Strikes Back", "director": 1980}),
+    ]).encode()
+
+    response = client.post(
+        "/api/films/import", data=body, content_type="application/x-ndjson", buffered=True
+    )
+
+    assert [json.loads(line) for line in response.get_data().splitlines()] == [
+        {"batch": 1, "lines": 2, "inserted": 1, "errors": [
+            {"line": 2, "message": "Film director must be a string"},
+        ]},
+        {"done": True, "lines": 2, "inserted": 1, "failed": 1},
+    ]
+    assert mongo_client.db.films.find_one()["planets"] == [planet_id]
+
+
+def test_get_films_export_must_stream_an_empty_csv_with_its_header(client):
+    response = client.get("/api/films/export?format=csv", buffered=True)
+
+    assert response.status_code == 200
+    assert response.get_data().decode().splitlines() == [
+        "id,title,release_date,director,planets,created,edited"
+    ]
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"ids": "abc"}, "ids must be a list of strings"),
+    ({"ids": {"a": 1}}, "ids must be a list of strings"),
+    ({"ids": [1, 2]}, "ids must be a list of strings"),
+    ({"ids": [["x"]]}, "ids must be a list of strings"),
+    ({"ids": ["6726b6b6ecec0bd07cb1fef5"], "fields": "name"}, "fields must be a list of strings"),
+    (["6726b6b6ecec0bd07cb1fef5"], "Request body must be a JSON object"),
+])
+def test_post_films_mget_must_return_400_when_payload_is_malformed(payload, message, client):
+    response = client.post("/api/films/_mget", json=payload)
+
+    assert response.status_code == 400
+    assert response.json == {"message": message}
@@ -3,3 +3,11 @@ def test_health_status(client):
 
     assert result.json == {"service": "API Star Wars HealthCheck", "version": "1.0"}
     assert result.status_code == 200
+
+
+def test_unknown_routes_must_return_json_404(client):
+    result = client.get("/api/unknown")
+
+    assert result.status_code == 404
+    assert result.content_type == "application/json"
+    assert "message" in result.json
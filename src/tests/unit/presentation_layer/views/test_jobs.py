@@ -0,0 +1,26 @@
+from unittest import mock
+
+from starwars.application_layer.use_cases.jobs import JobsUseCase
+
+
+JOBS_RESOURCE = "/api/jobs"
+
+
+@mock.patch.object(JobsUseCase, "get_job")
+def test_get_job_must_return_job_status_and_200(get_job_mock, client):
+    job = {"id": "6726b6b6ecec0bd07cb1fef5", "type": "films.remove_planet_references", "status": "running"}
+    get_job_mock.return_value = job
+
+    response = client.get(JOBS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
+
+    assert response.status_code == 200
+    assert response.json == job
+
+
+@mock.patch.object(JobsUseCase, "get_job")
+def test_get_job_must_return_404_when_job_not_found(get_job_mock, client):
+    get_job_mock.return_value = None
+
+    response = client.get(JOBS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
+
+    assert response.status_code == 404
@@ -1,5 +1,12 @@
+import gzip
+import json
+import pytest
+
 from unittest import mock
 
+from pymongo.errors import ExecutionTimeout, ServerSelectionTimeoutError
+
+from starwars.app import mongo_client
 from starwars.application_layer.use_cases.planets import PlanetAlreadyRegistered, PlanetsUseCase
 
 
@@ -79,7 +86,7 @@ def test_get_planets_must_return_400_when_get_planet_by_id_raises_and_generic_ex
     error_message = "Generic error"
     get_planet_by_id_mock.side_effect = Exception(error_message)
 
-    response = client.get(PLANETS_RESOURCE + "/123")
+    response = client.get(PLANETS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
 
     assert response.status_code == 400
     assert response.json == {"message": error_message}
@@ -89,7 +96,7 @@ def test_get_planets_must_return_400_when_get_planet_by_id_raises_and_generic_ex
 def test_get_planets_must_return_404_when_planet_not_found(get_planet_by_id_mock, client):
     get_planet_by_id_mock.return_value = None
 
-    id = "123"
+    id = "6726b6b6ecec0bd07cb1fef5"
     response = client.get(PLANETS_RESOURCE + f"/{id}")
 
     assert response.status_code == 404
@@ -157,7 +164,7 @@ def test_put_planets_must_return_400_when_update_planet_raises_an_generic_except
 def test_delete_planets_must_return_204_when_success(remove_planet_mock, client):
     remove_planet_mock.return_value = None
 
-    response = client.delete(PLANETS_RESOURCE + "/123")
+    response = client.delete(PLANETS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
 
     assert response.status_code == 204
 
@@ -167,7 +174,374 @@ def test_delete_planets_must_return_400_when_remove_planet_raises_an_generic_exc
     error_message = "Generic error"
     remove_planet_mock.side_effect = Exception(error_message)
 
-    response = client.delete(PLANETS_RESOURCE + "/123")
+    response = client.delete(PLANETS_RESOURCE + "/6726b6b6ecec0bd07cb1fef5")
 
     assert response.status_code == 400
     assert response.json == {"message": error_message}
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_id")
+def test_get_planets_must_forward_requested_fields(get_planet_by_id_mock, planet_info, client):
+    get_planet_by_id_mock.return_value = {"id": planet_info["id"], "name": planet_info["name"]}
+
+    response = client.get(PLANETS_RESOURCE + f"/{planet_info['id']}?fields=name, climate")
+
+    assert response.status_code == 200
+    assert get_planet_by_id_mock.call_args.kwargs["fields"] == ["name", "climate"]
+
+
+def test_get_planets_must_accept_id_among_requested_fields(client):
+    planet_id = str(mongo_client.db.planets.insert_one(
+        {"name": "Tatooine", "climate": "arid", "films": []}
+    ).inserted_id)
+
+    response = client.get(PLANETS_RESOURCE + f"/{planet_id}?fields=id,name")
+
+    assert response.status_code == 200
+    assert response.json == {"id": planet_id, "name": "Tatooine"}
+
+
+def test_get_planets_export_must_not_repeat_id_when_requested(client):
+    planet_id = str(mongo_client.db.planets.insert_one({"name": "Tatooine"}).inserted_id)
+
+    response = client.get("/api/planets/export?format=csv&fields=id,name", buffered=True)
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == ["id,name", f"{planet_id},Tatooine"]
+
+
+@mock.patch.object(PlanetsUseCase, "get_planets_by_ids")
+def test_get_planets_by_ids_must_return_200_when_success(get_planets_by_ids_mock, planet_info, client):
+    get_planets_by_ids_mock.return_value = {"docs": [{"id": "123", "found": False}]}
+
+    response = client.get(PLANETS_RESOURCE + f"?ids=123,{planet_info['id']}&fields=name")
+
+    assert response.status_code == 200
+    assert response.json == {"docs": [{"id": "123", "found": False}]}
+    assert get_planets_by_ids_mock.call_args.kwargs == {"ids": ["123", planet_info["id"]], "fields": ["name"]}
+
+
+@mock.patch.object(PlanetsUseCase, "get_planets_by_ids")
+def test_post_planets_mget_must_return_200_when_success(get_planets_by_ids_mock, planet_info, client):
+    get_planets_by_ids_mock.return_value = {"docs": [{"id": "123", "found": False}]}
+
+    response = client.post(PLANETS_RESOURCE + "/_mget", json={"ids": ["123", planet_info["id"]]})
+
+    assert response.status_code == 200
+    assert get_planets_by_ids_mock.call_args.kwargs == {"ids": ["123", planet_info["id"]], "fields": None}
+
+
+def test_get_planets_by_ids_must_return_400_when_no_id_is_informed(client):
+    response = client.get(PLANETS_RESOURCE)
+
+    assert response.status_code == 400
+    assert response.json == {"message": "At least one planet id must be informed"}
+
+
+def test_post_planets_mget_must_return_400_when_too_many_ids_are_informed(client):
+    client.application.config["BATCH_MAX_IDS"] = 2
+
+    response = client.post(PLANETS_RESOURCE + "/_mget", json={"ids": ["1", "2", "3"]})
+
+    assert response.status_code == 400
+    assert response.json == {"message": "At most 2 planet ids can be fetched at once"}
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_name")
+def test_get_planets_by_name_must_return_200_when_success(get_planet_by_name_mock, planet_info, client):
+    get_planet_by_name_mock.return_value = planet_info
+
+    response = client.get(PLANETS_RESOURCE + f"/by-name/{planet_info['name']}")
+
+    assert response.status_code == 200
+    assert response.json == planet_info
+    assert get_planet_by_name_mock.call_args.kwargs == {"name": planet_info["name"], "fields": None}
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_name")
+def test_get_planets_by_name_must_return_404_when_planet_not_found(get_planet_by_name_mock, client):
+    get_planet_by_name_mock.return_value = None
+
+    response = client.get(PLANETS_RESOURCE + "/by-name/Alderaan")
+
+    assert response.status_code == 404
+    assert response.json == {"message": "Planet with name Alderaan was not found"}
+
+
+@mock.patch.object(PlanetsUseCase, "upsert_planet_by_name")
+def test_put_planets_by_name_must_return_201_when_planet_is_created(upsert_planet_by_name_mock, planet_info, client):
+    upsert_planet_by_name_mock.return_value = (planet_info, True)
+
+    response = client.put(
+        PLANETS_RESOURCE + f"/by-name/{planet_info['name']}",
+        json={"name": "Ignored", "climate": planet_info["climate"]}
+    )
+
+    assert response.status_code == 201
+    assert response.json == planet_info
+    assert upsert_planet_by_name_mock.call_args.kwargs["data"].payload == {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"]
+    }
+
+
+@mock.patch.object(PlanetsUseCase, "upsert_planet_by_name")
+def test_put_planets_by_name_must_return_200_when_planet_is_updated(upsert_planet_by_name_mock, planet_info, client):
+    upsert_planet_by_name_mock.return_value = (planet_info, False)
+
+    response = client.put(PLANETS_RESOURCE + f"/by-name/{planet_info['name']}", json={})
+
+    assert response.status_code == 200
+    assert response.json == planet_info
+
+
+@mock.patch.object(PlanetsUseCase, "upsert_planet_by_name")
+def test_put_planets_by_name_must_return_400_when_upsert_raises_an_generic_exception(upsert_planet_by_name_mock, planet_info, client):
+    error_message = "One or more films do not exist"
+    upsert_planet_by_name_mock.side_effect = Exception(error_message)
+
+    response = client.put(PLANETS_RESOURCE + f"/by-name/{planet_info['name']}", json={})
+
+    assert response.status_code == 400
+    assert response.json == {"message": error_message}
+
+
+@pytest.mark.parametrize("payload", [[], "Tatooine", 1])
+@mock.patch.object(PlanetsUseCase, "upsert_planet_by_name")
+def test_put_planets_by_name_must_return_400_when_body_is_not_an_object(upsert_planet_by_name_mock, payload, planet_info, client):
+    response = client.put(PLANETS_RESOURCE + f"/by-name/{planet_info['name']}", json=payload)
+
+    assert response.status_code == 400
+    assert response.json == {"message": "Request body must be a JSON object"}
+    upsert_planet_by_name_mock.assert_not_called()
+
+
+def test_get_planets_changes_must_paginate_with_resume_token(client):
+    for name in ("Planet1", "Planet2", "Planet3"):
+        client.post(PLANETS_RESOURCE, json={"name": name})
+
+    first_page = client.get(PLANETS_RESOURCE + "/changes?limit=2")
+
+    assert first_page.status_code == 200
+    assert [change["planet"]["name"] for change in first_page.json["changes"]] == ["Planet1", "Planet2"]
+    assert first_page.json["has_more"] is True
+
+    second_page = client.get(PLANETS_RESOURCE + f"/changes?limit=2&since={first_page.json['next']}")
+
+    assert [change["planet"]["name"] for change in second_page.json["changes"]] == ["Planet3"]
+    assert second_page.json["has_more"] is False
+
+
+def test_get_planets_changes_must_return_400_when_since_is_invalid(client):
+    response = client.get(PLANETS_RESOURCE + "/changes?since=abc")
+
+    assert response.status_code == 400
+    assert response.json == {"message": "abc is not a valid change token."}
+
+
+def test_planets_endpoints_must_stay_within_query_budget(planet_info, query_budget, client):
+    request_json = {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"],
+        "diameter": planet_info["diameter"],
+        "population": planet_info["population"],
+        "films": []
+    }
+
+    with query_budget(2):
+        response = client.post(PLANETS_RESOURCE, json=request_json)
+
+    assert response.status_code == 201
+    assert response.headers["X-DB-Calls"] == "2"
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+    with query_budget(1):
+        response = client.get(f"{PLANETS_RESOURCE}/{response.json['id']}")
+
+    assert response.status_code == 200
+    assert response.headers["X-DB-Calls"] == "1"
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_id")
+def test_get_planets_must_return_504_when_request_deadline_expires(get_planet_by_id_mock, client):
+    get_planet_by_id_mock.side_effect = ExecutionTimeout("operation exceeded time limit", 50)
+
+    response = client.get(f"{PLANETS_RESOURCE}/6727627bb5d077fbd23c3c59")
+
+    assert response.status_code == 504
+    assert response.json == {"message": "Request deadline exceeded"}
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_id")
+def test_get_planets_must_return_503_when_database_is_unavailable(get_planet_by_id_mock, client):
+    get_planet_by_id_mock.side_effect = ServerSelectionTimeoutError("No replica set members found")
+
+    response = client.get(f"{PLANETS_RESOURCE}/6727627bb5d077fbd23c3c59")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_planets_must_return_400_when_request_timeout_header_is_invalid(client):
+    response = client.get(
+        f"{PLANETS_RESOURCE}/6727627bb5d077fbd23c3c59", headers={"X-Request-Timeout": "soon"}
+    )
+
+    assert response.status_code == 400
+    assert response.json == {"message": "X-Request-Timeout must be a number of seconds, got soon"}
+
+
+def test_post_planets_must_replay_response_for_retries_with_same_idempotency_key(planet_info, client):
+    request_json = {
+        "name": planet_info["name"],
+        "climate": planet_info["climate"],
+        "diameter": planet_info["diameter"],
+        "population": planet_info["population"],
+        "films": []
+    }
+    headers = {"Idempotency-Key": "2f1b6c1e-5d8f-4a56-9e0c-7f4a3c9d1b20"}
+
+    first_response = client.post(PLANETS_RESOURCE, json=request_json, headers=headers)
+
+    with mock.patch.object(PlanetsUseCase, "create_planet") as create_planet_mock:
+        retry_response = client.post(PLANETS_RESOURCE, json=request_json, headers=headers)
+
+    assert first_response.status_code == 201
+    assert retry_response.status_code == 201
+    assert retry_response.json == first_response.json
+    assert retry_response.headers["Idempotent-Replayed"] == "true"
+    create_planet_mock.assert_not_called()
+
+
+def test_post_planets_must_return_422_when_idempotency_key_is_reused_with_another_payload(planet_info, client):
+    headers = {"Idempotency-Key": "2f1b6c1e-5d8f-4a56-9e0c-7f4a3c9d1b20"}
+
+    client.post(PLANETS_RESOURCE, json={"name": planet_info["name"], "films": []}, headers=headers)
+    response = client.post(PLANETS_RESOURCE, json={"name": "Hoth", "films": []}, headers=headers)
+
+    assert response.status_code == 422
+
+
+@mock.patch.object(PlanetsUseCase, "get_planet_by_id")
+def test_get_planets_must_return_404_from_routing_when_id_is_not_an_object_id(get_planet_by_id_mock, client):
+    response = client.get(PLANETS_RESOURCE + "/123")
+
+    assert response.status_code == 404
+    assert response.content_type == "application/json"
+    assert "message" in response.json
+    get_planet_by_id_mock.assert_not_called()
+
+
+def test_post_planets_import_must_stream_the_progress_of_each_batch(client):
+    client.application.config["IMPORT_BATCH_SIZE"] = 2
+    body = b"\n".join([
+        b'{"name": "Tatooine", "climate": "arid"}',
+        b'not json',
+        b'',
+        b'{"climate": "frozen"}',
+        b'{"name": "Tatooine"}',
+        b'{"name": "Hoth", "films": ["6726b6b6ecec0bd07cb1fef5"]}',
+        b'{"name": "Dagobah"}',
+    ])
+
+    response = client.post(
+        "/api/planets/import", data=body, content_type="application/x-ndjson", buffered=True
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in response.get_data().splitlines()] == [
+        {"batch": 1, "lines": 2, "inserted": 1, "errors": [
+            {"line": 2, "message": "Line is not valid JSON"},
+        ]},
+        {"batch": 2, "lines": 2, "inserted": 0, "errors": [
+            {"line": 4, "message": "A planet must have a name"},
+            {"line": 5, "message": "Planet with name Tatooine already exists"},
+        ]},
+        {"batch": 3, "lines": 2, "inserted": 1, "errors": [
+            {"line": 6, "message": "One or more films do not exist"},
+        ]},
+        {"done": True, "lines": 6, "inserted": 2, "failed": 4},
+    ]
+    assert sorted(planet["name"] for planet in mongo_client.db.planets.find()) == ["Dagobah", "Tatooine"]
+
+
+@mock.patch.object(PlanetsUseCase, "import_planets")
+def test_post_planets_import_must_report_an_interrupted_import_in_the_body(import_planets_mock, client):
+    def _progress(rows, batch_size):
+        yield {"batch": 1, "lines": 1, "inserted": 1, "errors": []}
+        raise ServerSelectionTimeoutError("No servers found")
+
+    import_planets_mock.side_effect = _progress
+
+    response = client.post("/api/planets/import", data=b'{"name": "Hoth"}\n', buffered=True)
+
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.get_data().splitlines()][-1] == {
+        "done": False, "message": "Database unavailable, try again later"
+    }
+
+
+def test_get_planets_export_must_stream_every_planet_as_ndjson(client):
+    client.application.config["EXPORT_BATCH_SIZE"] = 2
+    for name in ("Tatooine", "Alderaan", "Hoth"):
+        mongo_client.db.planets.insert_one({"name": name, "films": []})
+
+    response = client.get("/api/planets/export", buffered=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert "Content-Encoding" not in response.headers
+    assert [json.loads(line)["name"] for line in response.get_data().splitlines()] == [
+        "Tatooine", "Alderaan", "Hoth"
+    ]
+
+
+def test_get_planets_export_must_gzip_csv_when_accepted(client):
+    films = ["6726b6b6ecec0bd07cb1fef5", "6726b6b6ecec0bd07cb1fef6"]
+    planet_id = str(mongo_client.db.planets.insert_one({"name": "Tatooine", "films": films}).inserted_id)
+
+    response = client.get(
+        "/api/planets/export?format=csv&fields=name,films",
+        headers={"Accept-Encoding": "gzip"},
+        buffered=True
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()).decode().splitlines() == [
+        "id,name,films",
+        f'{planet_id},Tatooine,"{films[0]},{films[1]}"',
+    ]
+
+
+def test_get_planets_export_must_return_400_when_format_or_fields_are_unknown(client):
+    assert client.get("/api/planets/export?format=xml").status_code == 400
+    assert client.get("/api/planets/export?fields=name,height").status_code == 400
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"ids": "abc"}, "ids must be a list of strings"),
+    ({"ids": {"a": 1}}, "ids must be a list of strings"),
+    ({"ids": [1, 2]}, "ids must be a list of strings"),
+    ({"ids": [["x"]]}, "ids must be a list of strings"),
+    ({"ids": ["6726b6b6ecec0bd07cb1fef5"], "fields": "name"}, "fields must be a list of strings"),
+    (["6726b6b6ecec0bd07cb1fef5"], "Request body must be a JSON object"),
+])
+def test_post_planets_mget_must_return_400_when_payload_is_malformed(payload, message, client):
+    response = client.post("/api/planets/_mget", json=payload)
+
+    assert response.status_code == 400
+    assert response.json == {"message": message}
+
+
+def test_get_planet_must_see_writes_served_by_other_processes(client):
+    planet_id = str(mongo_client.db.planets.insert_one({"name": "Tatooine", "films": []}).inserted_id)
+
+    assert client.get(f"{PLANETS_RESOURCE}/{planet_id}").json["name"] == "Tatooine"
+
+    # Another process invalidates its own cache only
+    mongo_client.db.planets.update_one({"name": "Tatooine"}, {"$set": {"name": "Tatooine II"}})
+
+    assert client.get(f"{PLANETS_RESOURCE}/{planet_id}").json["name"] == "Tatooine II"
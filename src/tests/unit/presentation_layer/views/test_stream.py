@@ -0,0 +1,36 @@
+import json
+
+from starwars.application_layer.events.broadcaster import broadcaster
+
+
+STREAM_RESOURCE = "/api/stream"
+
+
+def test_stream_must_push_events_of_followed_resources(client):
+    client.application.config["STREAM_HEARTBEAT_SECONDS"] = 0
+    client.application.config["STREAM_MAX_SECONDS"] = 1
+
+    response = client.get(STREAM_RESOURCE + "?resources=planets", buffered=False)
+    broadcaster.publish("deleted", "films", "6726b6b6ecec0bd07cb1fef5")
+    broadcaster.publish("created", "planets", "6727627bb5d077fbd23c3c59")
+
+    chunks = iter(response.response)
+    assert next(chunks).decode() == "retry: 3000\n\n"
+
+    event_chunk = next(chunk.decode() for chunk in chunks if chunk.startswith(b"event:"))
+    event_type, data = event_chunk.strip().split("\n")
+    assert event_type == "event: created"
+    assert json.loads(data[len("data: "):])["id"] == "6727627bb5d077fbd23c3c59"
+
+    response.close()
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert broadcaster.subscribers_count == 0
+
+
+def test_stream_must_return_400_when_resource_is_unknown(client):
+    response = client.get(STREAM_RESOURCE + "?resources=starships")
+
+    assert response.status_code == 400
+    assert response.json == {"message": "Unknown resources: starships"}
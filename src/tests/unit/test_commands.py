@@ -0,0 +1,59 @@
+import bson
+
+from starwars.app import mongo_client
+from starwars.commands import _exercise_repositories, _sync_indexes
+
+
+def test_sync_indexes_must_build_missing_and_drop_undeclared_indexes(client):
+    mongo_client.db.planets.drop_index("name_1")
+    mongo_client.db.planets.create_index("climate")
+
+    actions = _sync_indexes()
+
+    assert actions == [
+        ("create", "planets", "name_1"),
+        ("drop", "planets", "climate_1"),
+    ]
+    assert sorted(mongo_client.db.planets.index_information()) == ["_id_", "edited_1__id_1", "films_1", "name_1"]
+    assert _sync_indexes() == []
+
+
+def test_sync_indexes_must_not_change_anything_on_dry_run(client):
+    mongo_client.db.films.create_index("director")
+
+    actions = _sync_indexes(dry_run=True)
+
+    assert actions == [("drop", "films", "director_1")]
+    assert "director_1" in mongo_client.db.films.index_information()
+
+
+def test_exercise_repositories_must_seed_and_touch_every_repository_method(client):
+    _exercise_repositories(seed_size=5)
+
+    assert mongo_client.db.planets.count_documents({}) == 6
+    assert mongo_client.db.films.count_documents({}) == 6
+    assert mongo_client.db.planets_tombstones.count_documents({}) == 1
+    assert mongo_client.db.films_tombstones.count_documents({}) == 1
+
+
+def test_exercise_repositories_must_seed_documents_the_collection_validators_accept(client):
+    _exercise_repositories(seed_size=5)
+
+    planet = mongo_client.db.planets.find_one({"name": "Planet 1"})
+    film = mongo_client.db.films.find_one({"title": "Film imported"})
+
+    assert all(isinstance(film_id, bson.ObjectId) for film_id in planet["films"])
+    assert all(isinstance(planet_id, bson.ObjectId) for planet_id in film["planets"])
+    assert None not in (planet["climate"], planet["diameter"], planet["population"])
+    assert None not in (film["release_date"], film["director"])
+
+
+def test_run_worker_burst_must_run_queued_jobs_and_exit(client):
+    from starwars.application_layer.use_cases.jobs import JobsUseCase
+
+    JobsUseCase.enqueue("unknown", {})
+
+    result = client.application.test_cli_runner().invoke(args=["run-worker", "--burst"])
+
+    assert result.exit_code == 0
+    assert mongo_client.db.jobs.find_one()["status"] == "failed"